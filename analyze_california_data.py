@@ -1,32 +1,33 @@
 #!/usr/bin/env python3
 """
 Analyze the uploaded California housing data to understand its structure
+
+With --footer only the Parquet footers are fetched (ranged GETs of a few KB
+per file), and the report is built from the schema and row-group statistics
+without reading any data pages, so even multi-GB datasets are inspected
+instantly. --profile computes the describe() report and distinct counts in
+one streaming, parallel pass (see profiling.py), for sources larger than RAM.
 """
-import boto3
+import argparse
+import time
 import pandas as pd
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from minio_io import column_statistics, get_s3_client, list_dataset_keys, read_dataset, read_parquet_metadata
+from profiling import describe, profile_dataset
 
-def analyze_california_data():
+def analyze_california_data(prefix="feast/data/california"):
     print("🔍 ANALYZING CALIFORNIA HOUSING DATA")
     print("=" * 50)
     
     # MinIO configuration
-    s3_client = boto3.client(
-        's3',
-        endpoint_url="http://localhost:9001",
-        aws_access_key_id="minio",
-        aws_secret_access_key="minio123",
-        region_name='us-east-1'
-    )
+    s3_client = get_s3_client()
     
     # Read the data from MinIO
-    print("📖 Reading california_data.parquet from MinIO...")
     bucket_name = "test-bucket"
-    key = "feast/data/california_data.parquet"
+    print(f"📖 Reading s3://{bucket_name}/{prefix}/ from MinIO...")
     
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=key)
-        df = pd.read_parquet(BytesIO(response['Body'].read()))
+        df = read_dataset(s3_client, bucket_name, prefix)
         
         print(f"✅ Successfully read data!")
         print(f"   Shape: {df.shape}")
@@ -60,5 +61,108 @@ def analyze_california_data():
         print(f"❌ Error reading data: {e}")
         return None
 
+def analyze_footers(prefix="feast/data/california", max_workers=16):
+    """Report schema, row counts and column statistics from the Parquet footers only."""
+    print("🔍 ANALYZING CALIFORNIA HOUSING DATA (footers only)")
+    print("=" * 50)
+
+    s3_client = get_s3_client(max_pool_connections=max_workers)
+    bucket_name = "test-bucket"
+    keys = list_dataset_keys(s3_client, bucket_name, prefix)
+    if not keys:
+        print(f"❌ No Parquet files under s3://{bucket_name}/{prefix}/")
+        return None
+
+    print(f"📖 Reading the footers of {len(keys)} files under s3://{bucket_name}/{prefix}/...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        footers = list(executor.map(lambda key: read_parquet_metadata(s3_client, bucket_name, key), keys))
+    elapsed = time.perf_counter() - started
+
+    total_size = sum(size for _, size, _ in footers)
+    fetched = sum(fetched for _, _, fetched in footers)
+    rows = sum(metadata.num_rows for metadata, _, _ in footers)
+    row_groups = sum(metadata.num_row_groups for metadata, _, _ in footers)
+    schema = footers[0][0].schema.to_arrow_schema()
+    stats = pd.DataFrame.from_dict(column_statistics(*(metadata for metadata, _, _ in footers)), orient='index')
+
+    print(f"✅ Fetched {fetched / 1024:,.1f} KB of {total_size / 1e6:,.1f} MB in {elapsed:.2f}s")
+    print(f"   Shape: ({rows}, {len(schema)})")
+    print(f"   Files: {len(keys)}, row groups: {row_groups}")
+    print(f"   Columns: {schema.names}")
+
+    print("\n📊 Data Types:")
+    for field in schema:
+        print(f"   {field.name}: {field.type}")
+    other_schemas = {str(metadata.schema.to_arrow_schema()) for metadata, _, _ in footers} - {str(schema)}
+    if other_schemas:
+        print(f"   ⚠️  {len(other_schemas)} other schema(s) found across files")
+
+    print("\n📈 Column Statistics:")
+    print(stats[['min', 'max', 'null_count', 'compressed_size', 'uncompressed_size']].to_string())
+
+    print("\n🕐 Timestamp Analysis:")
+    for column in ('event_timestamp', 'created'):
+        if column in stats.index:
+            print(f"   {column} range: {stats.at[column, 'min']} to {stats.at[column, 'max']}")
+
+    if 'target' in stats.index and stats.at['target', 'min'] is not None:
+        print("\n🎯 Target Analysis:")
+        print(f"   Target range: ${stats.at['target', 'min']:,.2f} - ${stats.at['target', 'max']:,.2f}")
+
+    if 'house_id' in stats.index:
+        print("\n🗂️ Entity Analysis:")
+        print(f"   house_id range: {stats.at['house_id', 'min']} - {stats.at['house_id', 'max']}")
+        print("   Unique house_ids: not in the footer (run without --footer)")
+
+    return stats
+
+def analyze_profile(prefix="feast/data/california", workers=None):
+    """Streaming describe() and approximate distinct counts, without loading the dataset."""
+    print("🔍 ANALYZING CALIFORNIA HOUSING DATA (streaming profile)")
+    print("=" * 50)
+
+    bucket_name = "test-bucket"
+    print(f"📖 Profiling s3://{bucket_name}/{prefix}/ row group by row group...")
+    started = time.perf_counter()
+    profiles = profile_dataset(bucket_name, prefix, workers=workers)
+    if not profiles:
+        print(f"❌ No Parquet files under s3://{bucket_name}/{prefix}/")
+        return None
+    stats = describe(profiles)
+    print(f"✅ Profiled {len(profiles)} columns in {time.perf_counter() - started:.2f}s")
+
+    print("\n📈 Statistical Summary (quantiles and distinct counts are approximate):")
+    print(stats.to_string())
+
+    print("\n🕐 Timestamp Analysis:")
+    for column in ('event_timestamp', 'created'):
+        if column in stats:
+            print(f"   {column} range: {stats.at['min', column]} to {stats.at['max', column]}")
+
+    if 'target' in stats:
+        print("\n🎯 Target Analysis:")
+        print(f"   Target range: ${stats.at['min', 'target']:,.2f} - ${stats.at['max', 'target']:,.2f}")
+        print(f"   Target mean: ${stats.at['mean', 'target']:,.2f}")
+
+    if 'house_id' in stats:
+        print("\n🗂️ Entity Analysis:")
+        print(f"   house_id range: {stats.at['min', 'house_id']:.0f} - {stats.at['max', 'house_id']:.0f}")
+        print(f"   Unique house_ids: ~{stats.at['distinct (approx)', 'house_id']:,.0f}")
+
+    return stats
+
 if __name__ == "__main__":
-    df = analyze_california_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--footer', action='store_true', help='read only the Parquet footers (no data pages)')
+    parser.add_argument('--profile', action='store_true', help='streaming describe() with approximate distinct counts')
+    parser.add_argument('--workers', type=int, default=None, help='profiler processes (default: CPU count)')
+    parser.add_argument('--prefix', default='feast/data/california')
+    args = parser.parse_args()
+    if args.footer:
+        stats = analyze_footers(args.prefix)
+    elif args.profile:
+        stats = analyze_profile(args.prefix, workers=args.workers)
+    else:
+        df = analyze_california_data(args.prefix)
+ 
\ No newline at end of file
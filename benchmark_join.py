@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark the point-in-time join engines of the MinIO offline store
+
+Generates a synthetic california_housing source in memory (--rows rows over
+rows / --timestamps-per-entity houses) and an entity DataFrame with
+--entity-timestamps random timestamps per house, then joins them with each
+engine exactly as MinioOfflineStore.get_historical_features does after the
+source is read:
+
+    dask        Feast's merge / TTL / sort / drop_duplicates chain
+    sort_merge  the vectorized as-of merge (join_engine: sort_merge)
+
+No MinIO is needed: only the join is timed, not the Parquet reads.
+
+    python benchmark_join.py --rows 1000000 10000000 100000000
+
+The dask engine materializes every source row of a house next to every entity
+row of that house, so it is skipped above --dask-max-rows source rows.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import dask.dataframe as dd
+from datetime import timedelta
+from feast import Entity, FeatureView, Field, FileSource
+from feast.types import Float32
+from create_sample_data import generate_shard_batches
+from feature_repo.minio_offline_store import (_drop_columns, _drop_duplicates, _field_mapping, _merge,
+                                              _normalize_entity_df, _normalize_timestamp, _null_outside_ttl,
+                                              _sort_merge_join)
+
+START = np.datetime64('2020-01-01T00:00:00', 'us')
+INTERVAL = np.timedelta64(60, 'm')
+# Source rows per Dask partition, like one Parquet file per partition in the store
+PARTITION_ROWS = 1_000_000
+
+def generate_join_inputs(rows, timestamps_per_entity, entity_timestamps, features, seed=42):
+    """Source rows and an entity DataFrame with the same houses."""
+    entities = max(1, rows // timestamps_per_entity)
+    columns = features + ['house_id', 'event_timestamp', 'created']
+    batches = (
+        batch.select(columns)
+        for batch in generate_shard_batches(0, 0, entities, timestamps_per_entity, START, INTERVAL, seed, 1_000_000)
+    )
+    source = pa.Table.from_batches(batches).to_pandas(self_destruct=True, split_blocks=True)
+
+    # Entity timestamps anywhere in the source's time span
+    rng = np.random.default_rng([seed, 1])
+    span_us = int((timestamps_per_entity * INTERVAL) / np.timedelta64(1, 'us'))
+    entity_df = pd.DataFrame({
+        'house_id': np.repeat(np.arange(entities, dtype=np.int64), entity_timestamps),
+        'event_timestamp': pd.to_datetime(
+            START + rng.integers(0, span_us, entities * entity_timestamps).astype('timedelta64[us]'), utc=True),
+    })
+    return source, entity_df
+
+def benchmark_feature_view(features, ttl):
+    house = Entity(name='house', join_keys=['house_id'])
+    source = FileSource(path='s3://test-bucket/feast/data/california_benchmark/', timestamp_field='event_timestamp',
+                        created_timestamp_column='created')
+    return FeatureView(name='california_housing', entities=[house], ttl=ttl,
+                       schema=[Field(name=feature, dtype=Float32) for feature in features], source=source)
+
+def join_dask(entity_df, source_df, feature_view, features):
+    timestamp_field = 'event_timestamp'
+    created = 'created'
+    entity_df = _normalize_entity_df(entity_df, 'event_timestamp')
+    df_to_join, timestamp_field = _field_mapping(source_df, feature_view, features,
+                                                 [timestamp_field, created, 'house_id'], 'event_timestamp',
+                                                 timestamp_field, False)
+    value_columns = [column for column in df_to_join.columns if column != 'house_id']
+    df_to_join = _merge(entity_df, df_to_join, ['house_id']).repartition(npartitions=1)
+    df_to_join = _normalize_timestamp(df_to_join, timestamp_field, created)
+    df_to_join = _null_outside_ttl(df_to_join, feature_view, 'event_timestamp', timestamp_field, value_columns)
+    df_to_join = _drop_duplicates(df_to_join, ['house_id'], timestamp_field, created, 'event_timestamp')
+    return _drop_columns(df_to_join, features, timestamp_field, created).compute()
+
+def join_sort_merge(entity_df, source_df, feature_view, features, workers=None):
+    timestamp_field = 'event_timestamp'
+    created = 'created'
+    entity_df = _normalize_entity_df(entity_df, 'event_timestamp')
+    df_to_join, timestamp_field = _field_mapping(source_df, feature_view, features,
+                                                 [timestamp_field, created, 'house_id'], 'event_timestamp',
+                                                 timestamp_field, False)
+    return _sort_merge_join(entity_df, df_to_join, ['house_id'], 'event_timestamp', timestamp_field, created,
+                            feature_view.ttl, workers=workers)
+
+def check_results(dask_result, sort_merge_result, features):
+    """Every row the dask engine returns has the same features from sort_merge."""
+    keys = ['house_id', 'event_timestamp']
+    expected = dask_result.sort_values(keys).reset_index(drop=True)
+    actual = (sort_merge_result.drop_duplicates(keys).merge(expected[keys], on=keys)
+              .sort_values(keys).reset_index(drop=True))
+    pd.testing.assert_frame_equal(expected[keys + features], actual[keys + features], check_dtype=False)
+
+def benchmark_join(row_counts, timestamps_per_entity=100, entity_timestamps=1, features=('MedInc', 'target'),
+                   ttl=timedelta(days=1), dask_max_rows=10_000_000, workers=None, check=False):
+    print("⚡ BENCHMARKING POINT-IN-TIME JOIN ENGINES")
+    print("=" * 50)
+    features = list(features)
+    feature_view = benchmark_feature_view(features, ttl)
+    report = []
+
+    for rows in row_counts:
+        print(f"\n🏗️  Generating {rows:,} source rows ({timestamps_per_entity} per house)...")
+        source, entity_df = generate_join_inputs(rows, timestamps_per_entity, entity_timestamps, features)
+        source_df = dd.from_pandas(source, npartitions=max(1, len(source) // PARTITION_ROWS), sort=False)
+        print(f"📋 Entity DataFrame: {len(entity_df):,} rows, TTL {ttl}")
+
+        results = {}
+        for engine in ('dask', 'sort_merge'):
+            if engine == 'dask' and rows > dask_max_rows:
+                print(f"⏭️  {engine}: skipped (more than --dask-max-rows {dask_max_rows:,} source rows)")
+                report.append((rows, engine, None, None, None))
+                continue
+            started = time.perf_counter()
+            if engine == 'dask':
+                result = join_dask(entity_df, source_df, feature_view, features)
+            else:
+                result = join_sort_merge(entity_df, source_df, feature_view, features, workers=workers)
+            elapsed = time.perf_counter() - started
+            matched = int(result[features[0]].notna().sum())
+            print(f"⏱️  {engine}: {elapsed:.2f}s, {rows / elapsed:,.0f} source rows/s, "
+                  f"{len(result):,} rows ({matched:,} with features)")
+            report.append((rows, engine, elapsed, rows / elapsed, len(entity_df) / elapsed))
+            results[engine] = result if check else None
+
+        if check and len(results) == 2:
+            check_results(results['dask'], results['sort_merge'], features)
+            print("✅ sort_merge matches dask on every row dask returns")
+        del source, source_df, entity_df, results
+
+    report = pd.DataFrame(report, columns=['source rows', 'engine', 'seconds', 'source rows/s', 'entity rows/s'])
+    print("\n📊 Results:")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:,.2f}", na_rep='skipped'))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000, 100_000_000],
+                        help='source sizes to benchmark')
+    parser.add_argument('--timestamps-per-entity', type=int, default=100, help='source rows per house_id')
+    parser.add_argument('--entity-timestamps', type=int, default=1, help='entity DataFrame rows per house_id')
+    parser.add_argument('--features', nargs='+', default=['MedInc', 'target'])
+    parser.add_argument('--ttl-hours', type=float, default=24)
+    parser.add_argument('--dask-max-rows', type=int, default=10_000_000,
+                        help='skip the dask engine above this many source rows')
+    parser.add_argument('--workers', type=int, default=None, help='sort_merge threads (default: CPU count)')
+    parser.add_argument('--check', action='store_true', help='compare the engines\' results')
+    args = parser.parse_args()
+    report = benchmark_join(
+        args.rows,
+        timestamps_per_entity=args.timestamps_per_entity,
+        entity_timestamps=args.entity_timestamps,
+        features=args.features,
+        ttl=timedelta(hours=args.ttl_hours),
+        dask_max_rows=args.dask_max_rows,
+        workers=args.workers,
+        check=args.check,
+    )
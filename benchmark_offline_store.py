@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark the offline store engines on the california_housing workloads
+
+Runs the same retrievals through each offline store type against a local S3
+stand-in and reports wall time, peak RSS and the bytes read from S3:
+
+    full_export      every house at the end of the data
+    selective        --lookup-entities random houses at the end of the data
+    many_timestamps  --sweep-entities houses x --sweep-timestamps hourly timestamps
+
+Engines: file (Feast's Dask store, reading the whole source directory), minio
+(MinioOfflineStore with pruning and pushdown), minio_sort_merge (the same with
+join_engine: sort_merge) and duckdb (Feast's DuckDB store, skipped unless
+duckdb and ibis are installed).
+
+Without --endpoint a moto server is started in-process. To use a local MinIO
+binary instead, start it and pass its endpoint with the credentials exported:
+
+    python benchmark_offline_store.py --entities 10000 --timestamps-per-entity 100
+    AWS_ACCESS_KEY_ID=minio AWS_SECRET_ACCESS_KEY=minio123 python benchmark_offline_store.py --endpoint http://localhost:9000
+
+The source is generated by create_sample_data.generate_benchmark_data (and
+reused while its parameters are unchanged). Every engine reads it through a
+proxy that counts the bytes S3 returns, and every retrieval runs in a fresh
+process so its peak RSS is its own.
+"""
+import argparse
+import http.client
+import importlib.util
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from feast import FeatureStore, FeatureView, FileSource, RepoConfig
+from create_sample_data import generate_benchmark_data
+from feature_repo.minio_features import california_housing_view, house
+from feature_repo.minio_offline_store import MINIO_OFFLINE_STORE_TYPE
+from minio_io import get_s3_client
+
+ENGINES = {
+    'file': {'type': 'file'},
+    'minio': {'type': MINIO_OFFLINE_STORE_TYPE},
+    'minio_sort_merge': {'type': MINIO_OFFLINE_STORE_TYPE, 'join_engine': 'sort_merge'},
+    'duckdb': {'type': 'duckdb'},
+}
+# Packages an engine needs beyond Feast's defaults; engines missing one are skipped
+ENGINE_REQUIREMENTS = {'duckdb': ['duckdb', 'ibis']}
+WORKLOADS = ['full_export', 'selective', 'many_timestamps']
+
+START = np.datetime64('2020-01-01T00:00:00', 'us')
+INTERVAL = np.timedelta64(1, 'h')
+
+class CountingProxy(ThreadingHTTPServer):
+    """HTTP proxy in front of an S3 endpoint that counts the bytes it returns."""
+
+    daemon_threads = True
+
+    def __init__(self, target):
+        super().__init__(('127.0.0.1', 0), _ProxyHandler)
+        self.target = urlsplit(target)
+        self.lock = threading.Lock()
+        self.bytes_read = 0
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def counters(self):
+        with self.lock:
+            return self.bytes_read, self.requests
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _forward(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        # Host is forwarded unchanged: it is part of the request signature
+        connection = http.client.HTTPConnection(self.server.target.hostname, self.server.target.port, timeout=300)
+        try:
+            connection.request(self.command, self.path, body=body, headers=dict(self.headers))
+            response = connection.getresponse()
+            payload = response.read()
+        finally:
+            connection.close()
+
+        self.send_response(response.status, response.reason)
+        for name, value in response.getheaders():
+            if name.lower() not in ('transfer-encoding', 'connection', 'content-length'):
+                self.send_header(name, value)
+        if self.command == 'HEAD':
+            self.send_header('Content-Length', response.getheader('Content-Length', '0'))
+        else:
+            self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+        with self.server.lock:
+            self.server.bytes_read += len(payload)
+            self.server.requests += 1
+
+    do_GET = do_HEAD = do_PUT = do_POST = do_DELETE = _forward
+
+    def log_message(self, format, *args):
+        pass
+
+def start_moto_server():
+    from moto.server import ThreadedMotoServer
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+def workload_entity_df(workload, entities, timestamps_per_entity, lookup_entities=100, sweep_entities=1000,
+                       sweep_timestamps=24, seed=42):
+    """Entity DataFrame of a workload; every workload ends at the last generated timestamp."""
+    rng = np.random.default_rng(seed)
+    end = START + timestamps_per_entity * INTERVAL
+    if workload == 'full_export':
+        house_ids = np.arange(entities, dtype=np.int64)
+        timestamps = np.full(entities, end)
+    elif workload == 'selective':
+        house_ids = np.sort(rng.choice(entities, min(lookup_entities, entities), replace=False)).astype(np.int64)
+        timestamps = np.full(len(house_ids), end)
+    elif workload == 'many_timestamps':
+        chosen = np.sort(rng.choice(entities, min(sweep_entities, entities), replace=False)).astype(np.int64)
+        house_ids = np.repeat(chosen, sweep_timestamps)
+        timestamps = np.tile(end - np.arange(sweep_timestamps)[::-1] * INTERVAL, len(chosen))
+    else:
+        raise ValueError(f"Unknown workload {workload}")
+    return pd.DataFrame({'house_id': house_ids, 'event_timestamp': pd.to_datetime(timestamps, utc=True)})
+
+def benchmark_repo_config(repo_dir, offline_store):
+    return RepoConfig(
+        project='offline_store_benchmark',
+        provider='local',
+        registry=os.path.join(repo_dir, 'registry.db'),
+        offline_store=offline_store,
+        online_store={'type': 'sqlite', 'path': os.path.join(repo_dir, 'online.db')},
+        entity_key_serialization_version=3,
+        repo_path=repo_dir,
+    )
+
+def apply_benchmark_view(repo_dir, bucket_name, prefix, endpoint_url):
+    """Register california_housing over the benchmark source, read through endpoint_url."""
+    source = FileSource(
+        name='california_housing_benchmark_source',
+        path=f"s3://{bucket_name}/{prefix}/",
+        timestamp_field='event_timestamp',
+        created_timestamp_column='created',
+        s3_endpoint_override=endpoint_url,
+    )
+    view = FeatureView(
+        name='california_housing',
+        entities=[house],
+        ttl=california_housing_view.ttl,
+        schema=california_housing_view.schema,
+        source=source,
+    )
+    store = FeatureStore(config=benchmark_repo_config(repo_dir, {'type': 'file'}))
+    store.apply([house, view])
+    return [f"california_housing:{feature.name}" for feature in view.features]
+
+def _run_retrieval(repo_dir, offline_store, entity_df, features):
+    """Child process: one timed retrieval; returns seconds, result rows and peak RSS in bytes."""
+    store = FeatureStore(config=benchmark_repo_config(repo_dir, offline_store))
+    started = time.perf_counter()
+    result = store.get_historical_features(entity_df=entity_df, features=features).to_df()
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux
+    return elapsed, len(result), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def missing_requirements(engine):
+    return [module for module in ENGINE_REQUIREMENTS.get(engine, []) if importlib.util.find_spec(module) is None]
+
+def benchmark_offline_store(entities=10000, timestamps_per_entity=100, shards=8, engines=tuple(ENGINES),
+                            workloads=tuple(WORKLOADS), endpoint=None, bucket_name='test-bucket',
+                            prefix='feast/data/california_benchmark', lookup_entities=100, sweep_entities=1000,
+                            sweep_timestamps=24, output=None):
+    print("⚡ BENCHMARKING OFFLINE STORE ENGINES")
+    print("=" * 50)
+
+    moto_server = None
+    if endpoint is None:
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+        moto_server, endpoint = start_moto_server()
+        print(f"🧪 Started a moto S3 server at {endpoint}")
+    os.environ['FEAST_S3_ENDPOINT_URL'] = endpoint
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    s3_client = get_s3_client()
+    if bucket_name not in [bucket['Name'] for bucket in s3_client.list_buckets()['Buckets']]:
+        s3_client.create_bucket(Bucket=bucket_name)
+    generate_benchmark_data(entities, timestamps_per_entity, shards=shards, bucket_name=bucket_name, prefix=prefix,
+                            start=str(START), interval=INTERVAL)
+
+    proxy = CountingProxy(endpoint)
+    threading.Thread(target=proxy.serve_forever, daemon=True).start()
+    report = []
+    try:
+        with tempfile.TemporaryDirectory() as repo_dir:
+            features = apply_benchmark_view(repo_dir, bucket_name, prefix, proxy.url)
+            for workload in workloads:
+                entity_df = workload_entity_df(workload, entities, timestamps_per_entity, lookup_entities,
+                                               sweep_entities, sweep_timestamps)
+                print(f"\n📋 {workload}: {len(entity_df):,} entity rows")
+                for engine in engines:
+                    missing = missing_requirements(engine)
+                    if missing:
+                        print(f"   ⏭️  {engine}: skipped ({', '.join(missing)} not installed)")
+                        continue
+                    bytes_before, requests_before = proxy.counters()
+                    try:
+                        # A fresh process per run, so peak RSS and caches are the run's own
+                        with ProcessPoolExecutor(max_workers=1,
+                                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+                            elapsed, rows, peak_rss = executor.submit(
+                                _run_retrieval, repo_dir, ENGINES[engine], entity_df, features).result()
+                    except Exception as e:
+                        print(f"   ❌ {engine}: {e}")
+                        continue
+                    bytes_after, requests_after = proxy.counters()
+                    bytes_read = bytes_after - bytes_before
+                    print(f"   ⏱️  {engine}: {elapsed:.2f}s, {rows:,} rows, peak RSS {peak_rss / 1e6:,.0f} MB, "
+                          f"{bytes_read / 1e6:,.1f} MB read in {requests_after - requests_before:,} requests")
+                    report.append((workload, engine, elapsed, rows, peak_rss / 1e6, bytes_read / 1e6,
+                                   requests_after - requests_before))
+    finally:
+        proxy.shutdown()
+        if moto_server is not None:
+            moto_server.stop()
+
+    report = pd.DataFrame(report, columns=['workload', 'engine', 'seconds', 'rows', 'peak RSS MB', 'MB read',
+                                           'requests'])
+    print("\n📊 Results:")
+    print(report.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+    if output:
+        report.to_csv(output, index=False)
+        print(f"\n💾 Saved to {output}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', default=None, help='S3 endpoint (default: start a moto server)')
+    parser.add_argument('--entities', type=int, default=10000, help='number of distinct house_ids')
+    parser.add_argument('--timestamps-per-entity', type=int, default=100, help='hourly observations per house_id')
+    parser.add_argument('--shards', type=int, default=8, help='number of source files')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument('--lookup-entities', type=int, default=100, help='houses in the selective workload')
+    parser.add_argument('--sweep-entities', type=int, default=1000, help='houses in the many_timestamps workload')
+    parser.add_argument('--sweep-timestamps', type=int, default=24, help='timestamps per house in many_timestamps')
+    parser.add_argument('--bucket', default='test-bucket')
+    parser.add_argument('--prefix', default='feast/data/california_benchmark')
+    parser.add_argument('--output', default=None, help='also write the results to this CSV file')
+    args = parser.parse_args()
+    report = benchmark_offline_store(
+        entities=args.entities,
+        timestamps_per_entity=args.timestamps_per_entity,
+        shards=args.shards,
+        engines=args.engines,
+        workloads=args.workloads,
+        endpoint=args.endpoint,
+        bucket_name=args.bucket,
+        prefix=args.prefix,
+        lookup_entities=args.lookup_entities,
+        sweep_entities=args.sweep_entities,
+        sweep_timestamps=args.sweep_timestamps,
+        output=args.output,
+    )
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Apply a vectorized column transformation to every Parquet file under a prefix.
+
+Each file is rewritten in place, row group by row group, in a pool of worker
+processes. Finished files are appended to a local checkpoint log, so an
+interrupted run picks up where it stopped: files whose current ETag matches
+the checkpoint are skipped. Every dataset under the prefix (the prefix itself
+and each directory below it with a _manifest.json or _entity_index) is handled
+on its own: its manifest, if any, gets the entries (size, ETag, timestamp
+range) of its rewritten files at the end, and its entity index is rebuilt from
+the rewritten data. A file belongs to the nearest dataset above it.
+
+    python bulk_transform.py --prefix feast/data/california --transform utc-timestamps
+    python bulk_transform.py --prefix feast/data --transform utc-timestamps --source-timezone America/Los_Angeles
+    python bulk_transform.py --prefix feast/data/california --transform my_module:my_function --workers 16
+
+A custom transform is any importable ``function(table) -> table`` working on
+one pyarrow row group at a time. Files whose rows it would move out of their
+date=YYYY-MM-DD partition fail and are left untouched; repartitioning needs
+minio_io.rewrite_dataset (see fix_california_timestamps.py). A worker killed between finishing a file and
+logging it makes the resumed run transform that file again, so transforms
+should be idempotent, as the built-in ones are.
+"""
+import argparse
+import functools
+import importlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.compute as pc
+from minio_io import (ENTITY_INDEX_NAME, LEGACY_ENTITY_INDEX_NAME, MANIFEST_NAME, TIMESTAMP_TYPE, build_entity_index,
+                      commit_manifest, get_s3_client, list_parquet_objects, read_entity_index, read_manifest,
+                      transform_object)
+
+CHECKPOINT_DIR = '.bulk_transform'
+
+def utc_timestamps(table, source_timezone='UTC'):
+    """Store every timestamp column as timestamp[us, UTC]; tz-naive values are read as source_timezone."""
+    columns = []
+    for column in table.columns:
+        if pa.types.is_timestamp(column.type):
+            if column.type.tz is None:
+                # Wall times repeated or skipped by a DST change resolve to the earlier instant
+                column = pc.assume_timezone(column, source_timezone, ambiguous='earliest', nonexistent='earliest')
+            column = column.cast(TIMESTAMP_TYPE, safe=False)
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+def float32_features(table):
+    """Downcast float64 columns to float32, the type of the Float32 features in the views."""
+    columns = [
+        column.cast(pa.float32()) if pa.types.is_float64(column.type) else column
+        for column in table.columns
+    ]
+    return pa.table(columns, names=table.column_names)
+
+TRANSFORMS = {
+    'utc-timestamps': utc_timestamps,
+    'float32-features': float32_features,
+}
+
+def resolve_transform(spec, source_timezone='UTC'):
+    """Look up a built-in transform by name, or import one given as module:function."""
+    if spec == 'utc-timestamps':
+        return functools.partial(utc_timestamps, source_timezone=source_timezone)
+    if spec in TRANSFORMS:
+        return TRANSFORMS[spec]
+    module_name, sep, function_name = spec.partition(':')
+    if not sep:
+        raise ValueError(f"Unknown transform {spec!r}: use one of {sorted(TRANSFORMS)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def default_checkpoint_path(bucket, prefix, spec):
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', f"{bucket}/{prefix.strip('/')}/{spec}")
+    return os.path.join(CHECKPOINT_DIR, f"{slug}.jsonl")
+
+def load_checkpoint(path):
+    """Return {key: manifest entry} for the files a previous run finished."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # line cut short by an interrupted run
+            done[entry['key']] = entry
+    return done
+
+def dataset_prefixes(s3_client, bucket_name, prefix):
+    """The prefix and every directory under it holding a manifest or an entity index, deepest first."""
+    prefix = prefix.rstrip('/')
+    datasets = {prefix}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/" if prefix else ''):
+        for obj in page.get('Contents', []):
+            directory, _, name = obj['Key'].rpartition('/')
+            if name in (MANIFEST_NAME, ENTITY_INDEX_NAME, LEGACY_ENTITY_INDEX_NAME):
+                datasets.add(directory)
+    return sorted(datasets, key=len, reverse=True)
+
+def group_by_dataset(objects, datasets):
+    """{dataset prefix: its objects}, each object under the nearest (deepest) dataset above it."""
+    groups = {dataset: [] for dataset in datasets}
+    for obj in objects:
+        dataset = next(dataset for dataset in datasets if not dataset or obj['Key'].startswith(f"{dataset}/"))
+        groups[dataset].append(obj)
+    return groups
+
+def bulk_transform(bucket_name, prefix, spec, workers=None, checkpoint=None, source_timezone='UTC'):
+    """Transform every data file under s3://bucket_name/prefix/ in parallel, resumably."""
+    transform = resolve_transform(spec, source_timezone)
+    checkpoint = checkpoint or default_checkpoint_path(bucket_name, prefix, spec)
+    os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+
+    s3_client = get_s3_client()
+    groups = group_by_dataset(list_parquet_objects(s3_client, bucket_name, prefix),
+                              dataset_prefixes(s3_client, bucket_name, prefix))
+    manifests = {}
+    for dataset, dataset_objects in groups.items():
+        manifest, _ = read_manifest(s3_client, bucket_name, dataset)
+        if manifest is not None:
+            manifests[dataset] = manifest
+            # Files not in the manifest are leftovers no reader sees
+            listed = {entry['key'] for entry in manifest['files']}
+            groups[dataset] = [obj for obj in dataset_objects if obj['Key'] in listed]
+    objects = [obj for dataset_objects in groups.values() for obj in dataset_objects]
+
+    done = load_checkpoint(checkpoint)
+    pending = [obj for obj in objects if done.get(obj['Key'], {}).get('etag') != obj['ETag']]
+    print(f"🔧 Applying '{spec}' to s3://{bucket_name}/{prefix.rstrip('/')}/")
+    print(f"   {len(objects)} files, {len(objects) - len(pending)} already done (checkpoint: {checkpoint})")
+
+    started = time.perf_counter()
+    rewritten = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(checkpoint, 'a') as log:
+        futures = {
+            executor.submit(transform_object, bucket_name, obj['Key'], transform, max_workers=2): obj
+            for obj in pending
+        }
+        for future in as_completed(futures):
+            obj = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failed.append(obj['Key'])
+                print(f"   ❌ {obj['Key']}: {e}")
+                continue
+            log.write(json.dumps(dict(entry, source_etag=obj['ETag'])) + '\n')
+            log.flush()
+            done[entry['key']] = entry
+            rewritten.append(entry)
+            print(f"   ✅ {entry['key']}: {entry['rows']:,} rows")
+
+    rewritten_keys = {entry['key'] for entry in rewritten}
+    for dataset, dataset_objects in groups.items():
+        keys = {obj['Key'] for obj in dataset_objects}
+        if dataset in manifests:
+            entries = [
+                {name: value for name, value in entry.items() if name != 'source_etag'}
+                for key, entry in done.items() if key in keys
+            ]
+            commit_manifest(s3_client, bucket_name, dataset, added=entries)
+        index, _ = read_entity_index(s3_client, bucket_name, dataset)
+        if index is not None and keys & rewritten_keys:
+            # The transform may have changed keys or timestamps
+            build_entity_index(bucket_name, dataset, index.column_names[0], s3_client=s3_client)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(entry['rows'] for entry in rewritten)
+    print(f"\n✅ Rewrote {len(rewritten)} files ({rows:,} rows) in {elapsed:,.1f}s")
+    if failed:
+        print(f"❌ {len(failed)} files failed; run the same command again to retry them")
+    return rewritten, failed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bucket', default='test-bucket')
+    parser.add_argument('--prefix', required=True, help='every Parquet file under this prefix is transformed')
+    parser.add_argument('--transform', required=True,
+                        help=f"one of {', '.join(TRANSFORMS)}, or module:function")
+    parser.add_argument('--source-timezone', default='UTC',
+                        help='timezone of tz-naive timestamps (utc-timestamps only)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--checkpoint', help=f'checkpoint log (default: under {CHECKPOINT_DIR}/)')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    _, failed = bulk_transform(
+        args.bucket,
+        args.prefix,
+        args.transform,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        source_timezone=args.source_timezone,
+    )
+    raise SystemExit(1 if failed else 0)
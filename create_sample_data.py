@@ -1,77 +1,259 @@
 #!/usr/bin/env python3
 """
 Create sample California housing data for testing
+
+Without arguments this writes the 600-record sample dataset. With --benchmark
+it generates a large synthetic california_housing dataset for load testing:
+every column is built with vectorized NumPy, shards are generated in a
+process pool, and each shard is streamed straight to MinIO.
+
+    python create_sample_data.py --benchmark --rows 100000000 --entities 1000000 --shards 64
 """
-import boto3
+import argparse
+import hashlib
+import json
+import math
+import time
 import pandas as pd
 import numpy as np
-from io import BytesIO
-from datetime import datetime, timedelta
-from botocore.client import Config
+import pyarrow as pa
+import pyarrow.compute as pc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from minio_io import (commit_entity_index, commit_manifest, coerce_to_schema, entity_index, feature_view_schema,
+                      get_s3_client, head_object, load_feature_view, manifest_entry, merge_entity_index,
+                      read_entity_index, read_manifest, upload_batches, upload_partitioned)
+
+# Value ranges for the california_housing feature view columns
+# (BENCHMARK_SCHEMA mirrors the view: Float32 features, UTC timestamps)
+FEATURE_RANGES = {
+    'MedInc': (0.5, 15.0),
+    'HouseAge': (1.0, 52.0),
+    'AveRooms': (1.0, 10.0),
+    'AveBedrms': (0.5, 3.0),
+    'Population': (3.0, 35000.0),
+    'AveOccup': (1.0, 10.0),
+    'Latitude': (32.5, 42.0),
+    'Longitude': (-124.3, -114.3),
+    'target': (0.15, 5.0),
+}
 
-def create_sample_data():
+BENCHMARK_SCHEMA = pa.schema(
+    [pa.field(name, pa.float32()) for name in FEATURE_RANGES]
+    + [
+        pa.field('house_id', pa.int64()),
+        pa.field('event_timestamp', pa.timestamp('us', tz='UTC')),
+        pa.field('created', pa.timestamp('us', tz='UTC')),
+    ]
+)
+
+def create_sample_data(append=False):
     print("📊 Creating sample California housing data...")
     
-    # Generate sample data (600 records like California housing dataset)
+    # Generate sample data (600 records like California housing dataset),
+    # one column per feature of the view, so every column is coerced to its type
+    target_schema = feature_view_schema(load_feature_view("california_housing"))
     np.random.seed(42)
     n_samples = 600
     
-    data = {
-        'house_id': range(n_samples),
-        'longitude': np.random.uniform(-124.3, -114.3, n_samples),
-        'latitude': np.random.uniform(32.5, 42.0, n_samples),
-        'housing_median_age': np.random.uniform(1, 52, n_samples),
-        'total_rooms': np.random.uniform(100, 5000, n_samples),
-        'total_bedrooms': np.random.uniform(20, 1000, n_samples),
-        'population': np.random.uniform(100, 8000, n_samples),
-        'households': np.random.uniform(50, 2000, n_samples),
-        'median_income': np.random.uniform(0.5, 15.0, n_samples),
-        'median_house_value': np.random.uniform(15000, 500000, n_samples),
-    }
+    data = {'house_id': range(n_samples)}
+    for field in target_schema:
+        if field.name not in data and not pa.types.is_timestamp(field.type):
+            low, high = FEATURE_RANGES.get(field.name, (0.0, 1.0))
+            data[field.name] = np.random.uniform(low, high, n_samples)
     
-    # Add timestamps - initially different for each record
-    base_time = datetime(2020, 1, 1)
-    data['event_timestamp'] = [base_time + timedelta(days=i) for i in range(n_samples)]
-    data['created'] = [base_time + timedelta(days=i) for i in range(n_samples)]
+    # Add timestamps - initially different for each record (one day apart)
+    base_time = np.datetime64('2020-01-01', 'us')
+    data['event_timestamp'] = base_time + np.arange(n_samples) * np.timedelta64(1, 'D')
+    data['created'] = data['event_timestamp'].copy()
     
     df = pd.DataFrame(data)
+    df, schema = coerce_to_schema(df, target_schema)
     
     print(f"✅ Generated {len(df)} sample records")
     print(f"   house_id range: {df['house_id'].min()} - {df['house_id'].max()}")
     print(f"   Timestamp range: {df['event_timestamp'].min()} to {df['event_timestamp'].max()}")
     
-    # Upload to MinIO
-    print("\n💾 Converting to parquet...")
-    parquet_buffer = BytesIO()
-    df.to_parquet(parquet_buffer, index=False)
-    parquet_buffer.seek(0)
-    
     # MinIO configuration
-    s3_client = boto3.client(
-        's3',
-        endpoint_url="http://localhost:9001",
-        aws_access_key_id="minio",
-        aws_secret_access_key="minio123",
-        config=Config(signature_version='s3v4'),
-        region_name='us-east-1'
-    )
+    s3_client = get_s3_client()
     
     bucket_name = "test-bucket"
-    key = "feast/data/california_data.parquet"
+    prefix = "feast/data/california"
     
-    print("⬆️  Uploading to MinIO...")
-    s3_client.put_object(
-        Bucket=bucket_name,
-        Key=key,
-        Body=parquet_buffer.getvalue(),
-        ContentType='application/octet-stream'
-    )
+    if append:
+        print("\n⬆️  Appending delta files to MinIO...")
+    else:
+        print("\n⬆️  Streaming date-partitioned parquet to MinIO...")
+    uploads = upload_partitioned(df, bucket_name, prefix, s3_client=s3_client, schema=schema,
+                                 overwrite=not append, index_column='house_id')
     
+    skipped = sum(upload['skipped'] for upload in uploads)
     print("✅ Successfully uploaded sample California housing data!")
-    print(f"   Location: s3://{bucket_name}/{key}")
+    print(f"   Location: s3://{bucket_name}/{prefix}/ ({len(uploads)} partitions, {skipped} unchanged and skipped)")
     print(f"   Records: {len(df)}")
     
     return True
 
+def generate_shard_batches(shard, entity_start, entity_stop, timestamps_per_entity,
+                           start, interval, seed, chunk_rows):
+    """Yield record batches for the entities in [entity_start, entity_stop).
+
+    Each entity gets timestamps_per_entity observations spaced `interval`
+    apart from `start`, with random jitter inside the interval. Only
+    chunk_rows rows are materialized at a time.
+    """
+    rng = np.random.default_rng([seed, shard])
+    start = np.datetime64(start, 'us')
+    interval_us = int(np.timedelta64(interval, 'us').astype(np.int64))
+    steps = np.arange(timestamps_per_entity, dtype=np.int64)
+    entities_per_chunk = max(1, chunk_rows // timestamps_per_entity)
+
+    for chunk_start in range(entity_start, entity_stop, entities_per_chunk):
+        entities = np.arange(chunk_start, min(chunk_start + entities_per_chunk, entity_stop), dtype=np.int64)
+        n_rows = len(entities) * timestamps_per_entity
+
+        house_id = np.repeat(entities, timestamps_per_entity)
+        offsets_us = np.tile(steps, len(entities)) * interval_us + rng.integers(0, interval_us, n_rows)
+        event_timestamp = start + offsets_us.astype('timedelta64[us]')
+        # Rows land in the offline store up to a minute after the event
+        created = event_timestamp + rng.integers(0, 60_000_000, n_rows).astype('timedelta64[us]')
+
+        columns = [
+            pa.array(rng.uniform(low, high, n_rows).astype(np.float32))
+            for low, high in FEATURE_RANGES.values()
+        ]
+        columns += [
+            pa.array(house_id),
+            pa.array(event_timestamp, type=BENCHMARK_SCHEMA.field('event_timestamp').type),
+            pa.array(created, type=BENCHMARK_SCHEMA.field('created').type),
+        ]
+        yield pa.RecordBatch.from_arrays(columns, schema=BENCHMARK_SCHEMA)
+
+def _generate_and_upload_shard(shard, entity_start, entity_stop, timestamps_per_entity,
+                               start, interval, seed, chunk_rows, bucket, key):
+    """Process pool worker: generate one shard and stream it to s3://bucket/key.
+
+    Returns the shard's manifest entry, including its event timestamp range,
+    and the shard's entity index.
+    """
+    timestamp_range = []
+    indexes = []
+
+    def tracked_batches():
+        for batch in generate_shard_batches(shard, entity_start, entity_stop, timestamps_per_entity,
+                                            start, interval, seed, chunk_rows):
+            bounds = pc.min_max(batch.column('event_timestamp'))
+            timestamp_range.extend([bounds['min'].as_py(), bounds['max'].as_py()])
+            indexes.append(entity_index(pa.Table.from_batches([batch]), 'house_id'))
+            yield batch
+
+    fingerprint = shard_fingerprint(shard, entity_start, entity_stop, timestamps_per_entity,
+                                    start, interval, seed, chunk_rows)
+    result = upload_batches(tracked_batches(), BENCHMARK_SCHEMA, bucket, key, max_workers=2,
+                            metadata={'content-sha256': fingerprint})
+    result['content_sha256'] = fingerprint
+    return manifest_entry(result, timestamp_range), merge_entity_index(*indexes)
+
+def shard_fingerprint(*params):
+    """Content hash for a shard: the generator is deterministic, so hash its inputs."""
+    payload = json.dumps([str(param) for param in params] + [str(BENCHMARK_SCHEMA)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def generate_benchmark_data(entities, timestamps_per_entity, shards=8, workers=None,
+                            bucket_name="test-bucket", prefix="feast/data/california_benchmark",
+                            start='2020-01-01', interval=np.timedelta64(1, 'h'), seed=42,
+                            chunk_rows=1_000_000):
+    """Generate entities * timestamps_per_entity synthetic rows as `shards` Parquet files."""
+    total_rows = entities * timestamps_per_entity
+    print(f"📊 Generating {total_rows:,} benchmark rows "
+          f"({entities:,} houses x {timestamps_per_entity:,} timestamps) in {shards} shards...")
+
+    boundaries = np.linspace(0, entities, shards + 1, dtype=np.int64)
+    s3_client = get_s3_client()
+    manifest, _ = read_manifest(s3_client, bucket_name, prefix)
+    previous = {entry['key']: entry for entry in (manifest or {}).get('files', [])}
+    previous_index, _ = read_entity_index(s3_client, bucket_name, prefix)
+
+    started = time.perf_counter()
+    results = []
+    indexes = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for shard in range(shards):
+            shard_args = (shard, int(boundaries[shard]), int(boundaries[shard + 1]),
+                          timestamps_per_entity, start, interval, seed, chunk_rows)
+            if shard_args[1] == shard_args[2]:
+                continue
+            key = f"{prefix.rstrip('/')}/part-{shard:05d}.parquet"
+            entry = previous.get(key)
+            # Same generator inputs and untouched object: nothing to regenerate
+            # (its entity index rows are the shard's house_id range of the previous index)
+            unchanged = entry and entry.get('content_sha256') == shard_fingerprint(*shard_args)
+            if unchanged and previous_index is not None:
+                existing = head_object(s3_client, bucket_name, key)
+                if existing and existing['ETag'] == entry['etag']:
+                    results.append(entry)
+                    house_ids = previous_index['house_id']
+                    indexes.append(previous_index.filter(pc.and_(pc.greater_equal(house_ids, shard_args[1]),
+                                                                 pc.less(house_ids, shard_args[2]))))
+                    print(f"   ⏭️  {key}: unchanged, skipped")
+                    continue
+            futures.append(executor.submit(_generate_and_upload_shard, *shard_args, bucket_name, key))
+        for future in as_completed(futures):
+            result, index = future.result()
+            results.append(result)
+            indexes.append(index)
+            print(f"   ✅ {result['key']}: {result['rows']:,} rows, {result['size'] / 1e6:,.1f} MB")
+
+    # Publish all shards at once
+    commit_manifest(s3_client, bucket_name, prefix, added=results, replace=True)
+    if indexes:
+        commit_entity_index(s3_client, bucket_name, prefix, merge_entity_index(*indexes), replace=True)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    size = sum(result['size'] for result in results)
+    print(f"\n✅ Wrote {rows:,} rows ({size / 1e9:,.2f} GB) to s3://{bucket_name}/{prefix}/ "
+          f"in {elapsed:,.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--benchmark', action='store_true', help='generate a large synthetic dataset')
+    parser.add_argument('--append', action='store_true',
+                        help='append the sample rows as delta files instead of rewriting the dataset')
+    parser.add_argument('--rows', type=int, help='total rows (with --entities or --timestamps-per-entity)')
+    parser.add_argument('--entities', type=int, help='number of distinct house_ids')
+    parser.add_argument('--timestamps-per-entity', type=int, help='observations per house_id')
+    parser.add_argument('--shards', type=int, default=8, help='number of output files')
+    parser.add_argument('--workers', type=int, default=None, help='generator processes (default: CPU count)')
+    parser.add_argument('--prefix', default='feast/data/california_benchmark')
+    parser.add_argument('--start', default='2020-01-01', help='first event timestamp (UTC)')
+    parser.add_argument('--interval-minutes', type=int, default=60, help='spacing between observations')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        given = [value is not None for value in (args.rows, args.entities, args.timestamps_per_entity)]
+        if sum(given) != 2:
+            parser.error('--benchmark needs exactly two of --rows, --entities and --timestamps-per-entity')
+        if args.entities is None:
+            args.entities = math.ceil(args.rows / args.timestamps_per_entity)
+        elif args.timestamps_per_entity is None:
+            args.timestamps_per_entity = math.ceil(args.rows / args.entities)
+    return args
+
 if __name__ == "__main__":
-    create_sample_data() 
\ No newline at end of file
+    args = parse_args()
+    if args.benchmark:
+        generate_benchmark_data(
+            args.entities,
+            args.timestamps_per_entity,
+            shards=args.shards,
+            workers=args.workers,
+            prefix=args.prefix,
+            start=args.start,
+            interval=np.timedelta64(args.interval_minutes, 'm'),
+            seed=args.seed,
+        )
+    else:
+        create_sample_data(append=args.append)
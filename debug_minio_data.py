@@ -2,18 +2,32 @@
 """
 Debug script to inspect the actual data in MinIO bucket
 to understand the timestamp format causing comparison issues.
+
+--audit checks a whole bucket (or --prefix) instead: it reads only the
+Parquet footers, concurrently, and reports every file's timestamp columns
+with their unit, timezone and min/max, flagging the tz-naive ones that break
+Feast's TTL comparisons.
+
+    python debug_minio_data.py --audit --prefix feast/data
 """
+import argparse
 import os
+import time
 import pandas as pd
+import pyarrow as pa
 import s3fs
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# MinIO configuration
-os.environ.update({
+# MinIO configuration (environment variables take precedence)
+for name, value in {
     "AWS_ACCESS_KEY_ID": "minio",
     "AWS_SECRET_ACCESS_KEY": "minio123",
     "FEAST_S3_ENDPOINT_URL": "http://localhost:9001"
-})
+}.items():
+    os.environ.setdefault(name, value)
+
+from minio_io import column_statistics, get_s3_client, list_parquet_objects, read_parquet_metadata
 
 def inspect_minio_data():
     """Inspect the actual data stored in MinIO"""
@@ -112,6 +126,88 @@ def test_timestamp_comparisons():
         elif hasattr(ts, 'tzinfo'):
             print(f"   Timezone: {ts.tzinfo}")
 
+# Columns of the audit report; a file without timestamp columns or an unreadable footer leaves some empty
+AUDIT_COLUMNS = ['key', 'column', 'unit', 'tz', 'min', 'max', 'rows', 'status', 'detail']
+
+def _audit_file(s3_client, bucket, key):
+    """Return one report row per timestamp column of a file, read from its footer."""
+    try:
+        metadata, _, _ = read_parquet_metadata(s3_client, bucket, key)
+    except Exception as e:
+        return [{'key': key, 'column': None, 'status': 'unreadable', 'detail': str(e)}]
+    schema = metadata.schema.to_arrow_schema()
+    stats = column_statistics(metadata)
+    rows = []
+    for field in schema:
+        if not pa.types.is_timestamp(field.type):
+            continue
+        column = stats.get(field.name, {})
+        rows.append({
+            'key': key,
+            'column': field.name,
+            'unit': field.type.unit,
+            'tz': field.type.tz,
+            'min': column.get('min'),
+            'max': column.get('max'),
+            'rows': metadata.num_rows,
+            'status': 'ok' if field.type.tz else 'tz-naive',
+        })
+    if not rows:
+        rows.append({'key': key, 'column': None, 'rows': metadata.num_rows, 'status': 'no timestamp column'})
+    return rows
+
+def audit_timestamps(bucket="test-bucket", prefix="", max_workers=32, show_all=False):
+    """Audit the timestamp columns of every Parquet file under a prefix from their footers."""
+    print("🔍 AUDITING TIMESTAMP COLUMNS")
+    print("=" * 50)
+
+    s3_client = get_s3_client(max_pool_connections=max_workers)
+    started = time.perf_counter()
+    keys = [obj['Key'] for obj in list_parquet_objects(s3_client, bucket, prefix)]
+    print(f"1. Found {len(keys)} Parquet files under s3://{bucket}/{prefix}")
+    if not keys:
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda key: _audit_file(s3_client, bucket, key), keys)
+        report = pd.DataFrame([row for rows in results for row in rows], columns=AUDIT_COLUMNS)
+    report['rows'] = report['rows'].astype('Int64')
+    elapsed = time.perf_counter() - started
+    print(f"   Read {len(keys)} footers in {elapsed:.2f}s")
+
+    timestamps = report[report['column'].notna()].fillna({'tz': 'None'})
+    print("\n2. Timestamp column types:")
+    for (column, unit, tz), count in timestamps.groupby(['column', 'unit', 'tz']).size().items():
+        print(f"   {column}: timestamp[{unit}, tz={tz}] in {count} files")
+
+    problems = report[report['status'] != 'ok']
+    print(f"\n3. Files needing attention: {problems['key'].nunique()}")
+    for status, count in problems.groupby('status')['key'].nunique().items():
+        print(f"   ⚠️  {status}: {count} files")
+
+    shown = report if show_all else problems
+    if len(shown):
+        with pd.option_context('display.max_rows', None, 'display.max_colwidth', None, 'display.width', 200):
+            print()
+            print(shown.astype(object).where(shown.notna(), '').to_string(index=False))
+    if problems['status'].eq('tz-naive').any():
+        print("\n   Fix tz-naive files with: python bulk_transform.py --prefix <prefix> --transform utc-timestamps")
+    elif timestamps.empty:
+        print("\n⚠️  No file has a readable timestamp column")
+    else:
+        print("\n✅ All timestamp columns are timezone-aware")
+    return report
+
 if __name__ == "__main__":
-    inspect_minio_data()
-    test_timestamp_comparisons() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--audit', action='store_true', help='audit the footers of every file under --prefix')
+    parser.add_argument('--bucket', default='test-bucket')
+    parser.add_argument('--prefix', default='', help='prefix to audit (default: the whole bucket)')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent footer reads')
+    parser.add_argument('--all', action='store_true', help='list every file, not only the problems')
+    args = parser.parse_args()
+    if args.audit:
+        audit_timestamps(args.bucket, args.prefix, max_workers=args.workers, show_all=args.all)
+    else:
+        inspect_minio_data()
+        test_timestamp_comparisons()
@@ -0,0 +1,1227 @@
+"""
+File offline store for MinIO-backed FileSources.
+
+Behaves like Feast's built-in ``file`` (Dask) offline store, but resolves each
+FileSource into an explicit list of Parquet files before reading. For
+Hive-partitioned sources (``<path>/date=YYYY-MM-DD/...``) only the partitions
+that overlap the requested time range are read, so retrieval cost grows with
+the query window instead of with the total history. When the dataset has a
+``_manifest.json`` (written by minio_io), the file list comes from it instead
+of a recursive listing, so files from an unfinished write are never read.
+
+With ``cache_dir`` set, S3 source files are read through a local on-disk
+cache keyed by bucket, key and ETag: each read costs one HEAD per file, and
+only new or changed objects are downloaded. The cache is bounded by
+``cache_max_bytes`` (least recently used files are evicted first) and can be
+shared by concurrent processes.
+
+Reads push the query's time window, and for historical retrievals the
+entity_df key set (a min/max range, plus the exact keys for sets up to
+MAX_PUSHDOWN_KEYS), into the Parquet scan as filters: row groups whose
+statistics miss them are skipped and the remaining rows are filtered while
+they are decoded.
+
+``join_engine: sort_merge`` replaces Dask's merge-filter-sort point-in-time
+join (which materializes every source row of each entity key next to every
+entity row) with a vectorized as-of merge: both sides are sorted by (key,
+timestamp) and each entity row picks the latest row within the TTL, in
+parallel over key partitions. Entity rows without a match keep null features.
+
+Retrieval jobs are MinioRetrievalJobs: besides to_df()/to_arrow() they can
+stream their result with to_arrow_batches(), which joins the entity rows a
+slice at a time and hands out each slice's rows before the next is joined.
+
+Select it in feature_store.yaml with:
+
+    offline_store:
+        type: feature_repo.minio_offline_store.MinioOfflineStore
+        cache_dir: /var/cache/feast       # optional: cache S3 source files locally
+        cache_max_bytes: 10737418240     # optional: disk budget (default 10 GiB)
+        join_engine: sort_merge          # optional: default dask
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Tuple, Union
+
+import boto3
+import dask.dataframe as dd
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.compute
+import pyarrow.dataset
+import pyarrow.fs
+import pyarrow.parquet
+import pytz
+
+from feast.data_source import DataSource
+from feast.errors import FeastJoinKeysDuringMaterialization
+from feast.feature_view import DUMMY_ENTITY_ID, DUMMY_ENTITY_VAL, FeatureView
+from feast.infra.offline_stores.dask import (
+    DaskOfflineStore,
+    DaskOfflineStoreConfig,
+    DaskRetrievalJob,
+    _drop_columns,
+    _drop_duplicates,
+    _field_mapping,
+    _get_entity_df_event_timestamp_range,
+    _merge,
+    _normalize_timestamp,
+)
+from feast.infra.offline_stores.file_source import FileSource
+from feast.infra.offline_stores.offline_store import RetrievalJob, RetrievalMetadata
+from feast.infra.offline_stores.offline_utils import (
+    DEFAULT_ENTITY_DF_EVENT_TIMESTAMP_COL,
+)
+from feast.infra.registry.base_registry import BaseRegistry
+from feast.on_demand_feature_view import OnDemandFeatureView
+from feast.repo_config import RepoConfig
+from feast.utils import _get_requested_feature_views_to_features_dict
+
+MINIO_OFFLINE_STORE_TYPE = "feature_repo.minio_offline_store.MinioOfflineStore"
+
+# Matches the date partition directory written by minio_io.upload_partitioned
+DATE_PARTITION_PATTERN = re.compile(r"(?:^|/)date=(\d{4}-\d{2}-\d{2})(?:/|$)")
+
+# Dataset manifest written by minio_io.commit_manifest
+MANIFEST_NAME = "_manifest.json"
+
+DEFAULT_BATCH_ROWS = 64 * 1024
+
+# entity_df key sets up to this size are pushed down as an "in" filter, larger ones as a range only
+MAX_PUSHDOWN_KEYS = 100_000
+
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024**3
+# Files used this recently are never evicted, so a reader never loses a file it just got
+CACHE_EVICTION_GRACE_SECONDS = 300
+CACHE_DOWNLOAD_WORKERS = 16
+
+# Sort-merge joins smaller than this (entity plus source rows) run in one thread
+SORT_MERGE_PARALLEL_ROWS = 1_000_000
+# Missing timestamps as epoch nanoseconds
+NAT = np.iinfo(np.int64).min
+NS_PER_UNIT = {"s": 10**9, "ms": 10**6, "us": 10**3, "ns": 1}
+
+
+class MinioOfflineStoreConfig(DaskOfflineStoreConfig):
+    """Offline store config for the MinIO file offline store"""
+
+    type: Literal["feature_repo.minio_offline_store.MinioOfflineStore"] = (
+        MINIO_OFFLINE_STORE_TYPE  # type: ignore[assignment]
+    )
+    """ Offline store type selector"""
+
+    cache_dir: Optional[str] = None
+    """ Local directory caching S3 source files (unset: no cache)"""
+
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    """ Disk budget of the cache; least recently used files are evicted beyond it"""
+
+    join_engine: Literal["dask", "sort_merge"] = "dask"
+    """ Point-in-time join used by get_historical_features"""
+
+    join_workers: Optional[int] = None
+    """ Threads of the sort_merge join (default: CPU count)"""
+
+
+class MinioRetrievalJob(DaskRetrievalJob):
+    def __init__(
+        self,
+        *args,
+        evaluate_entity_slices: Optional[
+            Callable[[int], Iterator[pd.DataFrame]]
+        ] = None,
+        **kwargs,
+    ):
+        """evaluate_entity_slices(n) yields the result of each n entity rows, earliest first."""
+        super().__init__(*args, **kwargs)
+        self.evaluate_entity_slices = evaluate_entity_slices
+
+    def to_arrow_batches(
+        self, batch_size: int = DEFAULT_BATCH_ROWS
+    ) -> pyarrow.RecordBatchReader:
+        """Stream the result as Arrow record batches of at most batch_size rows.
+
+        Historical retrievals join batch_size entity rows at a time (by
+        timestamp, then entity key), reading only the source rows of each
+        slice, so memory holds one slice's join and the first batch is
+        available once the first slice is joined. Rows come in that order, not
+        in to_arrow()'s. Other jobs (pull_latest/pull_all) are evaluated whole
+        and converted one Dask partition at a time. Every batch has the first
+        batch's schema. Jobs with on-demand feature views are converted
+        through to_arrow().
+        """
+        if self.on_demand_feature_views:
+            return self.to_arrow().to_reader(max_chunksize=batch_size)
+        if self.evaluate_entity_slices is not None:
+            frames = self.evaluate_entity_slices(batch_size)
+        else:
+            frames = (
+                partition.compute()
+                for partition in self.evaluation_function().to_delayed()
+            )
+        first = _frame_table(next(frames))
+        return pyarrow.RecordBatchReader.from_batches(
+            first.schema, _iter_frame_batches(first, frames, batch_size)
+        )
+
+
+def _frame_table(df: pd.DataFrame) -> pyarrow.Table:
+    return pyarrow.Table.from_pandas(df, preserve_index=False)
+
+
+def _iter_frame_batches(table, frames, batch_size):
+    schema = table.schema
+    while table is not None:
+        yield from table.to_batches(max_chunksize=batch_size)
+        # Drop the previous frame before the next one is computed
+        table = None
+        frame = next(frames, None)
+        if frame is not None:
+            table = _frame_table(frame).cast(schema)
+
+
+def split_entity_df(
+    entity_df: pd.DataFrame, rows: int, timestamp_column: str = "event_timestamp"
+) -> Iterator[pd.DataFrame]:
+    """Yield entity_df in slices of about `rows`, ordered by timestamp then entity key.
+
+    Rows sharing a timestamp are split by entity key, so every slice spans the
+    shortest possible time range. Identical rows stay in one slice: the Dask
+    join returns them once, so splitting them would change the result. Used
+    by to_arrow_batches and by retrieval's chunked retrievals.
+    """
+    columns = [timestamp_column] + [
+        c for c in entity_df.columns if c != timestamp_column
+    ]
+    entity_df = entity_df.sort_values(columns, kind="stable", ignore_index=True)
+    repeated = entity_df.duplicated().to_numpy()
+    start = 0
+    while start < len(entity_df):
+        end = min(start + rows, len(entity_df))
+        while end < len(entity_df) and repeated[end]:
+            end += 1
+        yield entity_df.iloc[start:end]
+        start = end
+
+
+class MinioOfflineStore(DaskOfflineStore):
+    @staticmethod
+    def get_historical_features(
+        config: RepoConfig,
+        feature_views: List[FeatureView],
+        feature_refs: List[str],
+        entity_df: Union[pd.DataFrame, str],
+        registry: BaseRegistry,
+        project: str,
+        full_feature_names: bool = False,
+    ) -> RetrievalJob:
+        assert isinstance(config.offline_store, MinioOfflineStoreConfig)
+        for fv in feature_views:
+            assert isinstance(fv.batch_source, FileSource)
+
+        if not isinstance(entity_df, pd.DataFrame):
+            raise ValueError(
+                f"Please provide an entity_df of type {type(pd.DataFrame)} instead of type {type(entity_df)}"
+            )
+        entity_df_event_timestamp_col = _get_entity_df_event_timestamp_col(entity_df)
+        (
+            feature_views_to_features,
+            _,
+        ) = _get_requested_feature_views_to_features_dict(
+            feature_refs,
+            feature_views,
+            registry.list_on_demand_feature_views(config.project),
+        )
+
+        entity_df_event_timestamp_range = _get_entity_df_event_timestamp_range(
+            entity_df, entity_df_event_timestamp_col
+        )
+
+        def evaluate_entity_rows(entity_rows):
+            """Point-in-time join of the features onto entity_rows (all or a slice of entity_df)."""
+            event_timestamp_range = _get_entity_df_event_timestamp_range(
+                entity_rows, entity_df_event_timestamp_col
+            )
+            min_event_timestamp = _to_utc(event_timestamp_range[0])
+            max_event_timestamp = _to_utc(event_timestamp_range[1])
+            entity_df_with_features = _normalize_entity_df(
+                entity_rows, entity_df_event_timestamp_col
+            )
+
+            all_join_keys = []
+
+            # Load feature view data from sources and join them incrementally
+            for feature_view, features in feature_views_to_features.items():
+                timestamp_field = feature_view.batch_source.timestamp_field
+                created_timestamp_column = (
+                    feature_view.batch_source.created_timestamp_column
+                )
+
+                join_keys = [
+                    feature_view.projection.join_key_map.get(
+                        entity_column.name, entity_column.name
+                    )
+                    for entity_column in feature_view.entity_columns
+                ]
+                right_entity_key_columns = [
+                    c
+                    for c in [timestamp_field, created_timestamp_column] + join_keys
+                    if c
+                ]
+                all_join_keys = list(set(all_join_keys + join_keys))
+
+                # entity_df keys by source column, for the Parquet scan filters
+                source_names = {
+                    value: key
+                    for key, value in (
+                        feature_view.batch_source.field_mapping or {}
+                    ).items()
+                }
+                entity_keys = {
+                    source_names.get(
+                        entity_column.name, entity_column.name
+                    ): entity_rows[join_key]
+                    for entity_column, join_key in zip(
+                        feature_view.entity_columns, join_keys
+                    )
+                    if join_key in entity_rows.columns
+                }
+
+                # Only rows inside [min(ts) - ttl, max(ts)] can survive the TTL filter
+                start_date = (
+                    min_event_timestamp - feature_view.ttl
+                    if feature_view.ttl and feature_view.ttl.total_seconds() != 0
+                    else None
+                )
+                df_to_join = _read_datasource(
+                    feature_view.batch_source,
+                    config.repo_path,
+                    start_date=start_date,
+                    end_date=max_event_timestamp,
+                    cache=source_file_cache(config.offline_store),
+                    entity_keys=entity_keys,
+                )
+
+                df_to_join, timestamp_field = _field_mapping(
+                    df_to_join,
+                    feature_view,
+                    features,
+                    right_entity_key_columns,
+                    entity_df_event_timestamp_col,
+                    timestamp_field,
+                    full_feature_names,
+                )
+                if config.offline_store.join_engine == "sort_merge":
+                    entity_df_with_features = _sort_merge_join(
+                        entity_df_with_features,
+                        df_to_join,
+                        join_keys,
+                        entity_df_event_timestamp_col,
+                        timestamp_field,
+                        created_timestamp_column,
+                        feature_view.ttl,
+                        workers=config.offline_store.join_workers,
+                    )
+                    del df_to_join
+                    continue
+
+                value_columns = [c for c in df_to_join.columns if c not in join_keys]
+                # The Dask helpers below sort on timestamps that are null for
+                # unmatched entities, which only works on a single partition
+                df_to_join = _merge(
+                    entity_df_with_features, df_to_join, join_keys
+                ).repartition(npartitions=1)
+                df_to_join = _normalize_timestamp(
+                    df_to_join, timestamp_field, created_timestamp_column
+                )
+                df_to_join = _null_outside_ttl(
+                    df_to_join,
+                    feature_view,
+                    entity_df_event_timestamp_col,
+                    timestamp_field,
+                    value_columns,
+                )
+                df_to_join = _drop_duplicates(
+                    df_to_join,
+                    all_join_keys,
+                    timestamp_field,
+                    created_timestamp_column,
+                    entity_df_event_timestamp_col,
+                )
+                entity_df_with_features = _drop_columns(
+                    df_to_join, features, timestamp_field, created_timestamp_column
+                )
+
+                # Ensure that we delete dataframes to free up memory
+                del df_to_join
+
+            if isinstance(entity_df_with_features, pd.DataFrame):
+                # The sort_merge engine joins in pandas
+                entity_df_with_features = dd.from_pandas(
+                    entity_df_with_features, npartitions=1, sort=False
+                )
+            return entity_df_with_features.persist()
+
+        # Create lazy functions that are only called from the RetrievalJob object
+        def evaluate_historical_retrieval():
+            return evaluate_entity_rows(entity_df)
+
+        def evaluate_entity_slices(slice_rows):
+            if entity_df.empty:
+                yield evaluate_entity_rows(entity_df).compute()
+                return
+            for entity_rows in split_entity_df(
+                entity_df, slice_rows, entity_df_event_timestamp_col
+            ):
+                yield evaluate_entity_rows(entity_rows).compute()
+
+        return MinioRetrievalJob(
+            evaluation_function=evaluate_historical_retrieval,
+            evaluate_entity_slices=evaluate_entity_slices,
+            full_feature_names=full_feature_names,
+            on_demand_feature_views=OnDemandFeatureView.get_requested_odfvs(
+                feature_refs, project, registry
+            ),
+            metadata=RetrievalMetadata(
+                features=feature_refs,
+                keys=list(set(entity_df.columns) - {entity_df_event_timestamp_col}),
+                min_event_timestamp=entity_df_event_timestamp_range[0],
+                max_event_timestamp=entity_df_event_timestamp_range[1],
+            ),
+            repo_path=str(config.repo_path),
+        )
+
+    @staticmethod
+    def evaluate_offline_job(
+        config: RepoConfig,
+        data_source: FileSource,
+        join_key_columns: List[str],
+        timestamp_field: str,
+        created_timestamp_column: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> dd.DataFrame:
+        start_date = _to_utc(start_date) if start_date else None
+        end_date = _to_utc(end_date) if end_date else None
+
+        source_df = _read_datasource(
+            data_source,
+            config.repo_path,
+            start_date=start_date,
+            end_date=end_date,
+            cache=source_file_cache(config.offline_store),
+        )
+        source_df = _normalize_timestamp(
+            source_df, timestamp_field, created_timestamp_column
+        )
+
+        source_columns = set(source_df.columns)
+        if not set(join_key_columns).issubset(source_columns):
+            raise FeastJoinKeysDuringMaterialization(
+                data_source.path, set(join_key_columns), source_columns
+            )
+
+        # Sorting into a single partition avoids https://github.com/dask/dask/issues/8939
+        sort_columns = [c for c in [timestamp_field, created_timestamp_column] if c]
+        source_df = source_df.sort_values(by=sort_columns, npartitions=1)
+
+        if start_date:
+            source_df = source_df[source_df[timestamp_field] >= start_date]
+        if end_date:
+            source_df = source_df[source_df[timestamp_field] <= end_date]
+
+        return source_df.persist()
+
+    @staticmethod
+    def pull_latest_from_table_or_query(
+        config: RepoConfig,
+        data_source: DataSource,
+        join_key_columns: List[str],
+        feature_name_columns: List[str],
+        timestamp_field: str,
+        created_timestamp_column: Optional[str],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> RetrievalJob:
+        assert isinstance(config.offline_store, MinioOfflineStoreConfig)
+        assert isinstance(data_source, FileSource)
+
+        def evaluate_func():
+            df = MinioOfflineStore.evaluate_offline_job(
+                config=config,
+                data_source=data_source,
+                join_key_columns=join_key_columns,
+                timestamp_field=timestamp_field,
+                created_timestamp_column=created_timestamp_column,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            columns_to_extract = _columns_to_extract(
+                join_key_columns,
+                feature_name_columns,
+                timestamp_field,
+                created_timestamp_column,
+            )
+            if join_key_columns:
+                df = df.drop_duplicates(
+                    join_key_columns, keep="last", ignore_index=True
+                )
+            else:
+                df[DUMMY_ENTITY_ID] = DUMMY_ENTITY_VAL
+                columns_to_extract.add(DUMMY_ENTITY_ID)
+
+            return df[list(columns_to_extract)].persist()
+
+        # When materializing a single feature view, we don't need full feature names. On demand transforms aren't materialized
+        return MinioRetrievalJob(
+            evaluation_function=evaluate_func,
+            full_feature_names=False,
+            repo_path=str(config.repo_path),
+        )
+
+    @staticmethod
+    def pull_all_from_table_or_query(
+        config: RepoConfig,
+        data_source: DataSource,
+        join_key_columns: List[str],
+        feature_name_columns: List[str],
+        timestamp_field: str,
+        created_timestamp_column: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> RetrievalJob:
+        assert isinstance(config.offline_store, MinioOfflineStoreConfig)
+        assert isinstance(data_source, FileSource)
+
+        def evaluate_func():
+            df = MinioOfflineStore.evaluate_offline_job(
+                config=config,
+                data_source=data_source,
+                join_key_columns=join_key_columns,
+                timestamp_field=timestamp_field,
+                created_timestamp_column=created_timestamp_column,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            columns_to_extract = _columns_to_extract(
+                join_key_columns,
+                feature_name_columns,
+                timestamp_field,
+                created_timestamp_column,
+            )
+            if not join_key_columns:
+                df[DUMMY_ENTITY_ID] = DUMMY_ENTITY_VAL
+                columns_to_extract.add(DUMMY_ENTITY_ID)
+
+            return df[list(columns_to_extract)].persist()
+
+        return MinioRetrievalJob(
+            evaluation_function=evaluate_func,
+            full_feature_names=False,
+            repo_path=str(config.repo_path),
+        )
+
+
+def _columns_to_extract(
+    join_key_columns: List[str],
+    feature_name_columns: List[str],
+    timestamp_field: str,
+    created_timestamp_column: Optional[str],
+) -> set:
+    ts_columns = [c for c in [timestamp_field, created_timestamp_column] if c]
+    return set(join_key_columns + feature_name_columns + ts_columns)
+
+
+def _get_entity_df_event_timestamp_col(entity_df: pd.DataFrame) -> str:
+    if DEFAULT_ENTITY_DF_EVENT_TIMESTAMP_COL in entity_df.columns:
+        return DEFAULT_ENTITY_DF_EVENT_TIMESTAMP_COL
+    datetime_columns = entity_df.select_dtypes(
+        include=["datetime", "datetimetz"]
+    ).columns
+    if len(datetime_columns) == 1:
+        print(
+            f"Using {datetime_columns[0]} as the event timestamp. To specify a column explicitly, please name it {DEFAULT_ENTITY_DF_EVENT_TIMESTAMP_COL}."
+        )
+        return datetime_columns[0]
+    raise ValueError(
+        f"Please provide an entity_df with a column named {DEFAULT_ENTITY_DF_EVENT_TIMESTAMP_COL} representing the time of events."
+    )
+
+
+def _normalize_entity_df(
+    entity_df: pd.DataFrame, entity_df_event_timestamp_col: str
+) -> pd.DataFrame:
+    """Copy entity_df with a tz-aware UTC event timestamp, sorted by it."""
+    entity_df = entity_df.copy()
+    timestamp_type = entity_df.dtypes[entity_df_event_timestamp_col]
+    if not hasattr(timestamp_type, "tz") or timestamp_type.tz != pytz.UTC:
+        # tz-naive timestamps are treated as UTC, same as the Dask store
+        entity_df[entity_df_event_timestamp_col] = pd.to_datetime(
+            entity_df[entity_df_event_timestamp_col], utc=True
+        ).dt.tz_convert(pytz.UTC)
+    return entity_df.sort_values(entity_df_event_timestamp_col)
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _get_filesystem_and_path(
+    data_source: FileSource, repo_path
+) -> Tuple[pyarrow.fs.FileSystem, str]:
+    uri = FileSource.get_uri_for_file_path(
+        repo_path=repo_path, uri=data_source.file_options.uri
+    )
+    filesystem, path = FileSource.create_filesystem_and_path(
+        str(uri), data_source.file_options.s3_endpoint_override
+    )
+    return filesystem or pyarrow.fs.LocalFileSystem(), path
+
+
+def _to_uri(data_source: FileSource, path: str) -> str:
+    if data_source.file_options.uri.startswith("s3://"):
+        return f"s3://{path}"
+    return path
+
+
+def _partition_in_range(
+    path: str, start_date: Optional[datetime], end_date: Optional[datetime]
+) -> bool:
+    """Return False only for files in a date partition outside [start_date, end_date]."""
+    match = DATE_PARTITION_PATTERN.search(path)
+    if not match:
+        return True
+    partition_date = datetime.strptime(match.group(1), "%Y-%m-%d").date()
+    if start_date and partition_date < start_date.date():
+        return False
+    if end_date and partition_date > end_date.date():
+        return False
+    return True
+
+
+def _entry_in_range(
+    entry: dict, start_date: Optional[datetime], end_date: Optional[datetime]
+) -> bool:
+    """Return False only for manifest entries whose timestamps miss [start_date, end_date]."""
+    if start_date and "max_timestamp" in entry:
+        if pd.Timestamp(entry["max_timestamp"]) < start_date:
+            return False
+    if end_date and "min_timestamp" in entry:
+        if pd.Timestamp(entry["min_timestamp"]) > end_date:
+            return False
+    return True
+
+
+def _read_manifest(filesystem: pyarrow.fs.FileSystem, path: str) -> Optional[dict]:
+    try:
+        with filesystem.open_input_stream(f"{path}/{MANIFEST_NAME}") as stream:
+            return json.loads(stream.read())
+    except FileNotFoundError:
+        return None
+
+
+def _list_manifest_files(
+    manifest: dict,
+    path: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> List[str]:
+    # Manifest keys are full object keys; path is "<bucket>/<prefix>" for S3
+    prefix = path.split("/", 1)[1] if "/" in path else ""
+    files = []
+    for entry in manifest["files"]:
+        relative_key = entry["key"][len(prefix) :].lstrip("/")
+        file_path = f"{path}/{relative_key}"
+        if _partition_in_range(file_path, start_date, end_date) and _entry_in_range(
+            entry, start_date, end_date
+        ):
+            files.append(file_path)
+    return files
+
+
+def _list_directory_files(
+    filesystem: pyarrow.fs.FileSystem,
+    path: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> List[str]:
+    selector = pyarrow.fs.FileSelector(path, recursive=True)
+    files = []
+    for info in filesystem.get_file_info(selector):
+        name = info.base_name
+        if (
+            info.type != pyarrow.fs.FileType.File
+            or not name.endswith(".parquet")
+            or name.startswith(("_", "."))
+        ):
+            continue
+        if _partition_in_range(info.path, start_date, end_date):
+            files.append(info.path)
+    return files
+
+
+def list_source_files(
+    data_source: FileSource,
+    repo_path,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[str]:
+    """List the Parquet files of a FileSource that may hold rows in [start_date, end_date].
+
+    A source path ending in ``.parquet`` is a single file and is returned as is.
+    Otherwise it is treated as a dataset directory. Its files come from the
+    ``_manifest.json`` if there is one, and from a recursive listing otherwise
+    (names starting with ``_`` or ``.`` are skipped). Files in
+    ``date=YYYY-MM-DD`` partitions outside the UTC date range, and manifest
+    entries whose min/max timestamps miss the range, are pruned.
+    """
+    filesystem, path = _get_filesystem_and_path(data_source, repo_path)
+    if path.endswith(".parquet"):
+        return [_to_uri(data_source, path)]
+
+    path = path.rstrip("/")
+    manifest = _read_manifest(filesystem, path)
+    if manifest is not None:
+        files = _list_manifest_files(manifest, path, start_date, end_date)
+    else:
+        files = _list_directory_files(filesystem, path, start_date, end_date)
+    return sorted(_to_uri(data_source, file_path) for file_path in files)
+
+
+class SourceFileCache:
+    """Read-through local cache of S3 objects, keyed by bucket, key and ETag.
+
+    A lookup HEADs the object; if a file for its current ETag is cached it is
+    used, otherwise the object is downloaded with a GET conditioned on that
+    ETag. Downloads go to a temporary file that is renamed into place, so
+    concurrent processes never see a partial file; a file lock serializes
+    eviction. Cached files' mtimes record their last use for LRU eviction;
+    files of superseded ETags are never touched again and age out that way.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._clients: Dict[Optional[str], object] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _client(self, endpoint_url: Optional[str]):
+        with self._lock:
+            if endpoint_url not in self._clients:
+                self._clients[endpoint_url] = boto3.client(
+                    "s3",
+                    endpoint_url=endpoint_url
+                    or os.environ.get("FEAST_S3_ENDPOINT_URL"),
+                )
+            return self._clients[endpoint_url]
+
+    def _path(self, bucket: str, key: str, etag: str) -> str:
+        key_hash = hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest()[:32]
+        etag_hash = hashlib.sha256(etag.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key_hash}-{etag_hash}.parquet")
+
+    def get(self, uri: str, endpoint_url: Optional[str] = None) -> str:
+        """Return a local path holding the current content of s3://bucket/key."""
+        bucket, key = uri.replace("s3://", "", 1).split("/", 1)
+        client = self._client(endpoint_url)
+        etag = client.head_object(Bucket=bucket, Key=key)["ETag"]
+        path = self._path(bucket, key, etag)
+        try:
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.misses += 1
+        temporary = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+        try:
+            # IfMatch: never store another version's bytes under this ETag
+            body = client.get_object(Bucket=bucket, Key=key, IfMatch=etag)["Body"]
+            with open(temporary, "wb") as f:
+                shutil.copyfileobj(body, f, 1024 * 1024)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return path
+
+    def get_many(self, uris: List[str], endpoint_url: Optional[str] = None) -> List[str]:
+        """Look up (and download) uris concurrently, then evict down to the budget."""
+        with ThreadPoolExecutor(max_workers=CACHE_DOWNLOAD_WORKERS) as executor:
+            paths = list(executor.map(lambda uri: self.get(uri, endpoint_url), uris))
+        self.evict()
+        return paths
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes."""
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            now = time.time()
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(".tmp-"):
+                    # Left behind by a killed process
+                    if now - entry.stat().st_mtime > 3600:
+                        _remove_quietly(entry.path)
+                elif entry.name.endswith(".parquet"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if now - mtime < CACHE_EVICTION_GRACE_SECONDS:
+                    break
+                _remove_quietly(path)
+                total -= size
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+_source_file_caches: Dict[Tuple[str, int], SourceFileCache] = {}
+
+
+def source_file_cache(
+    offline_store_config: MinioOfflineStoreConfig,
+) -> Optional[SourceFileCache]:
+    """The process-wide SourceFileCache for an offline store config, or None if it has no cache_dir."""
+    cache_dir = getattr(offline_store_config, "cache_dir", None)
+    if not cache_dir:
+        return None
+    key = (cache_dir, offline_store_config.cache_max_bytes)
+    if key not in _source_file_caches:
+        _source_file_caches[key] = SourceFileCache(*key)
+    return _source_file_caches[key]
+
+
+def _read_datasource(
+    data_source: FileSource,
+    repo_path,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cache: Optional[SourceFileCache] = None,
+    entity_keys: Optional[Dict[str, pd.Series]] = None,
+) -> dd.DataFrame:
+    storage_options = (
+        {
+            "client_kwargs": {
+                "endpoint_url": data_source.file_options.s3_endpoint_override
+            }
+        }
+        if data_source.file_options.s3_endpoint_override
+        else None
+    )
+
+    files = list_source_files(data_source, repo_path, start_date, end_date)
+    filesystem, _ = _get_filesystem_and_path(data_source, repo_path)
+    if files and cache and files[0].startswith("s3://"):
+        files = cache.get_many(files, data_source.file_options.s3_endpoint_override)
+        storage_options = None
+        filesystem = pyarrow.fs.LocalFileSystem()
+    if not files:
+        # Nothing overlaps the window: return an empty frame with the source schema
+        return dd.from_pandas(
+            _localize_timestamps(_read_empty_frame(data_source, repo_path)),
+            npartitions=1,
+        )
+
+    # Filters are typed after the first file, like the dataset schema dask infers
+    schema = pyarrow.parquet.read_schema(
+        files[0].replace("s3://", "", 1), filesystem=filesystem
+    )
+    filters = _pushdown_filters(data_source, schema, start_date, end_date, entity_keys)
+
+    # Partition values are encoded in the path only; the files carry every column
+    source_df = dd.read_parquet(
+        files,
+        storage_options=storage_options,
+        dataset={"partitioning": None},
+        filters=filters or None,
+    )
+    return _localize_timestamps(source_df)
+
+
+def _pushdown_filters(
+    data_source: FileSource,
+    schema: pyarrow.Schema,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    entity_keys: Optional[Dict[str, pd.Series]] = None,
+) -> List[Tuple]:
+    """Parquet scan filters (ANDed) for the time window and the entity_df keys.
+
+    Rows outside them could never be joined, so the filters only save reads.
+    The key range lets row-group statistics prune; the exact key set is only
+    added when it is small enough to ship with every task.
+    """
+    filters: List[Tuple] = []
+    timestamp_field = data_source.timestamp_field
+    if timestamp_field in schema.names and pyarrow.types.is_timestamp(
+        schema.field(timestamp_field).type
+    ):
+        naive = schema.field(timestamp_field).type.tz is None
+        for op, value in ((">=", start_date), ("<=", end_date)):
+            if value is not None:
+                # tz-naive source timestamps are UTC (see _localize_timestamps)
+                filters.append(
+                    (timestamp_field, op, value.replace(tzinfo=None) if naive else value)
+                )
+
+    for column, values in (entity_keys or {}).items():
+        if column not in schema.names:
+            continue
+        values = pd.Series(values.dropna().unique())
+        if values.empty:
+            continue
+        filters.append((column, ">=", _python_scalar(values.min())))
+        filters.append((column, "<=", _python_scalar(values.max())))
+        if len(values) <= MAX_PUSHDOWN_KEYS:
+            filters.append((column, "in", values.tolist()))
+    return filters
+
+
+def _python_scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def _null_outside_ttl(
+    df_to_join: dd.DataFrame,
+    feature_view: FeatureView,
+    entity_df_event_timestamp_col: str,
+    timestamp_field: str,
+    value_columns: List[str],
+) -> dd.DataFrame:
+    """Like Feast's _filter_ttl, but source rows outside the TTL are nulled instead of dropped.
+
+    Feast drops them, which also drops entity rows whose key only has rows
+    outside the TTL, while an entity row whose key has no rows at all is
+    kept with null features. Which of the two an entity row is depends on
+    the rows the scan pruned, so chunked retrievals returned other rows than
+    one call. Here every entity row keeps its latest row in the TTL or an
+    all-null one, like the sort_merge engine.
+    """
+    event_timestamps = df_to_join[entity_df_event_timestamp_col]
+    in_ttl = df_to_join[timestamp_field] <= event_timestamps
+    if feature_view.ttl and feature_view.ttl.total_seconds() != 0:
+        in_ttl = in_ttl & (df_to_join[timestamp_field] >= event_timestamps - feature_view.ttl)
+    for column in value_columns:
+        df_to_join[column] = df_to_join[column].where(in_ttl)
+    return df_to_join.persist()
+
+
+def _sort_merge_join(
+    entity_df: pd.DataFrame,
+    df_to_join: dd.DataFrame,
+    join_keys: List[str],
+    entity_df_event_timestamp_col: str,
+    timestamp_field: str,
+    created_timestamp_column: Optional[str],
+    ttl: Optional[timedelta],
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Point-in-time join of one feature view onto entity_df, in pandas.
+
+    Every entity_df row is kept: rows with no match within the TTL get null
+    features (the Dask engine drops a row whose key only has rows outside
+    it), and duplicate entity rows are not collapsed.
+    """
+    entity_df = entity_df.reset_index(drop=True)
+    source_df = df_to_join.compute().reset_index(drop=True)
+    feature_columns = [
+        column
+        for column in source_df.columns
+        if column not in join_keys + [timestamp_field, created_timestamp_column]
+    ]
+    matches = sort_merge_asof(
+        entity_df,
+        source_df,
+        join_keys,
+        entity_df_event_timestamp_col,
+        timestamp_field,
+        created_timestamp_column,
+        ttl,
+        workers,
+    )
+    # -1 (no match) is not in the RangeIndex, so those rows get nulls
+    features = source_df[feature_columns].reindex(matches).reset_index(drop=True)
+    return pd.concat([entity_df, features], axis=1)
+
+
+def sort_merge_asof(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    join_keys: List[str],
+    left_timestamp_column: str,
+    right_timestamp_column: str,
+    created_timestamp_column: Optional[str] = None,
+    ttl: Optional[timedelta] = None,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """Position in right of the point-in-time match of every left row (-1: none).
+
+    The match is the right row with equal join keys and the latest timestamp
+    at or before the left row's, and not older than ttl; ties go to the latest
+    created timestamp. Rows are split into key partitions, each sorted by
+    (key, timestamp) and merged with a vectorized as-of scan in its own
+    thread (NumPy sorts release the GIL).
+    """
+    left_codes, right_codes = _key_codes(left, right, join_keys)
+    left_times = _epoch_ns(left[left_timestamp_column])
+    right_times = _epoch_ns(right[right_timestamp_column])
+    created = (
+        _epoch_ns(right[created_timestamp_column])
+        if created_timestamp_column
+        else np.zeros(len(right), dtype=np.int64)
+    )
+    ttl_ns = pd.Timedelta(ttl).value if ttl and ttl.total_seconds() != 0 else None
+    # Rows without a key or an event timestamp never match
+    left_codes[left_times == NAT] = -1
+    right_codes[right_times == NAT] = -1
+
+    partitions = max(1, workers or os.cpu_count() or 1)
+    if len(left) + len(right) < SORT_MERGE_PARALLEL_ROWS:
+        partitions = 1
+    left_partitions = np.where(left_codes >= 0, left_codes % partitions, -1)
+    right_partitions = np.where(right_codes >= 0, right_codes % partitions, -1)
+    matches = np.full(len(left), -1, dtype=np.int64)
+
+    def join_partition(partition):
+        left_rows = np.flatnonzero(left_partitions == partition)
+        right_rows = np.flatnonzero(right_partitions == partition)
+        if not len(left_rows) or not len(right_rows):
+            return
+        positions = _asof_positions(
+            left_codes[left_rows],
+            left_times[left_rows],
+            right_codes[right_rows],
+            right_times[right_rows],
+            created[right_rows],
+            ttl_ns,
+        )
+        found = positions >= 0
+        matches[left_rows[found]] = right_rows[positions[found]]
+
+    if partitions == 1:
+        join_partition(0)
+    else:
+        with ThreadPoolExecutor(max_workers=partitions) as executor:
+            list(executor.map(join_partition, range(partitions)))
+    return matches
+
+
+def _asof_positions(left_codes, left_times, right_codes, right_times, created, ttl_ns):
+    # Pack (key, timestamp rank) into one sortable int64, so the right rows
+    # sort with a single stable argsort (near linear on sources that are
+    # already in key and time order)
+    distinct_times, right_ranks = np.unique(right_times, return_inverse=True)
+    width = len(distinct_times)
+    right_packed = right_codes * width + right_ranks.reshape(-1)
+    right_order = np.argsort(right_packed, kind="stable")
+    right_packed = right_packed[right_order]
+
+    # Rows with equal key and timestamp are ordered by created, latest last
+    ties = np.flatnonzero(right_packed[1:] == right_packed[:-1])
+    if len(ties):
+        tied = np.unique(np.concatenate([ties, ties + 1]))
+        rows = right_order[tied]
+        right_order[tied] = rows[np.lexsort((created[rows], right_packed[tied]))]
+
+    # Each left row matches the last right row at or before its (key, rank);
+    # a left row before every right timestamp packs into the previous key's
+    # range and is rejected by the key check
+    left_ranks = np.searchsorted(distinct_times, left_times, side="right") - 1
+    candidates = (
+        np.searchsorted(right_packed, left_codes * width + left_ranks, side="right")
+        - 1
+    )
+    matches = right_order[np.maximum(candidates, 0)]
+    valid = (candidates >= 0) & (right_codes[matches] == left_codes)
+    if ttl_ns is not None:
+        valid &= right_times[matches] >= left_times - ttl_ns
+    return np.where(valid, matches, -1)
+
+
+def _key_codes(
+    left: pd.DataFrame, right: pd.DataFrame, join_keys: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Shared integer codes of the join key values; -1 for null keys."""
+    if not join_keys:
+        return np.zeros(len(left), dtype=np.int64), np.zeros(len(right), dtype=np.int64)
+    keys = pd.concat([left[join_keys], right[join_keys]], ignore_index=True)
+    if len(join_keys) == 1:
+        codes, _ = pd.factorize(keys[join_keys[0]])
+    else:
+        codes = (
+            keys.groupby(join_keys, sort=False, dropna=True)
+            .ngroup()
+            .fillna(-1)
+            .to_numpy(np.int64)
+        )
+    codes = codes.astype(np.int64, copy=False)
+    return codes[: len(left)].copy(), codes[len(left) :].copy()
+
+
+def _epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    # tz-naive timestamps are UTC, NaT becomes NAT. Scaled in NumPy: a
+    # pandas unit conversion checks every value for overflow and is far slower
+    values = pd.to_datetime(timestamps, utc=True).array
+    scale = NS_PER_UNIT[np.datetime_data(values.dtype.base)[0]]
+    epoch = np.asarray(values.asi8)
+    if scale == 1:
+        return epoch
+    return np.where(epoch == NAT, NAT, epoch * scale)
+
+
+def read_latest_values(
+    data_source: FileSource,
+    repo_path,
+    join_key_columns: List[str],
+    feature_name_columns: List[str],
+    timestamp_field: str,
+    created_timestamp_column: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cache: Optional[SourceFileCache] = None,
+    entity_keys: Optional[Dict[str, pd.Series]] = None,
+) -> pyarrow.Table:
+    """Latest row per join key with timestamp_field in [start_date, end_date].
+
+    Column names are source column names. The pruned files are scanned once,
+    batch by batch, and each batch is folded into the running result with a
+    vectorized latest-per-key reduction, so memory is bounded by the number of
+    distinct keys rather than by the source size. Ties on timestamp_field are
+    broken by created_timestamp_column, like the point-in-time join.
+    entity_keys (source column -> keys) restricts the result to those keys
+    and is pushed into the scan like a historical retrieval's keys.
+    """
+    start_date = _to_utc(start_date) if start_date else None
+    end_date = _to_utc(end_date) if end_date else None
+    filesystem, _ = _get_filesystem_and_path(data_source, repo_path)
+    order_columns = [c for c in [timestamp_field, created_timestamp_column] if c]
+    columns = list(dict.fromkeys(join_key_columns + feature_name_columns + order_columns))
+
+    files = list_source_files(data_source, repo_path, start_date, end_date)
+    if files and cache and files[0].startswith("s3://"):
+        files = cache.get_many(files, data_source.file_options.s3_endpoint_override)
+        filesystem = pyarrow.fs.LocalFileSystem()
+
+    latest = None
+    for file_uri in files:
+        dataset = pyarrow.dataset.dataset(
+            file_uri.replace("s3://", "", 1), filesystem=filesystem, format="parquet"
+        )
+        # Only the keys are pushed down: the window is applied below on UTC values
+        filters = _pushdown_filters(data_source, dataset.schema, None, None, entity_keys)
+        file_latest = []
+        for batch in dataset.to_batches(
+            columns=columns,
+            filter=pyarrow.parquet.filters_to_expression(filters) if filters else None,
+        ):
+            table = _utc_timestamps(pyarrow.Table.from_batches([batch]))
+            if start_date:
+                table = table.filter(
+                    pyarrow.compute.greater_equal(table[timestamp_field], start_date)
+                )
+            if end_date:
+                table = table.filter(
+                    pyarrow.compute.less_equal(table[timestamp_field], end_date)
+                )
+            file_latest.append(
+                _latest_per_key(table, join_key_columns, order_columns)
+            )
+        if file_latest:
+            tables = file_latest + ([latest] if latest is not None else [])
+            latest = _latest_per_key(
+                pyarrow.concat_tables(tables, promote_options="permissive"),
+                join_key_columns,
+                order_columns,
+            )
+
+    if latest is None:
+        latest = _utc_timestamps(
+            pyarrow.Table.from_pandas(
+                _read_empty_frame(data_source, repo_path)[columns],
+                preserve_index=False,
+            )
+        )
+    return latest.select(columns)
+
+
+def _latest_per_key(
+    table: pyarrow.Table, join_key_columns: List[str], order_columns: List[str]
+) -> pyarrow.Table:
+    """Keep the row with the greatest order_columns for each join key."""
+    if not join_key_columns:
+        return table.sort_by([(c, "descending") for c in order_columns]).slice(0, 1)
+    # Grouping a table sorted newest-first keeps, per key, the first row it sees;
+    # nulls are kept so every value comes from that same row
+    table = table.sort_by([(c, "descending") for c in order_columns])
+    values = [c for c in table.column_names if c not in join_key_columns]
+    keep_nulls = pyarrow.compute.ScalarAggregateOptions(skip_nulls=False)
+    latest = table.group_by(join_key_columns, use_threads=False).aggregate(
+        [(c, "first", keep_nulls) for c in values]
+    )
+    aggregated = {f"{c}_first": c for c in values}
+    return latest.rename_columns(
+        [aggregated.get(name, name) for name in latest.column_names]
+    )
+
+
+def _utc_timestamps(table: pyarrow.Table) -> pyarrow.Table:
+    """Make every timestamp column tz-aware UTC; tz-naive values are read as UTC."""
+    columns = [
+        column.cast(pyarrow.timestamp(column.type.unit, tz="UTC"))
+        if pyarrow.types.is_timestamp(column.type)
+        else column
+        for column in table.columns
+    ]
+    return pyarrow.Table.from_arrays(columns, names=table.column_names)
+
+
+def _localize_timestamps(df):
+    """Make every timestamp column tz-aware UTC up front.
+
+    The Dask helpers fix tz-naive columns with a row-wise apply, which leaves
+    empty partitions tz-naive once a source spans several files.
+    """
+    for column, dtype in df.dtypes.items():
+        if not pd.api.types.is_datetime64_any_dtype(dtype):
+            continue
+        if getattr(dtype, "tz", None) is None:
+            df[column] = df[column].dt.tz_localize(pytz.UTC)
+        elif dtype.tz != pytz.UTC:
+            df[column] = df[column].dt.tz_convert(pytz.UTC)
+    return df
+
+
+def _read_empty_frame(data_source: FileSource, repo_path) -> pd.DataFrame:
+    filesystem, path = _get_filesystem_and_path(data_source, repo_path)
+    all_files = list_source_files(data_source, repo_path)
+    if not all_files:
+        raise FileNotFoundError(f"No parquet files found under {data_source.path}")
+    schema_path = all_files[0].replace("s3://", "", 1)
+    schema = pyarrow.parquet.read_schema(schema_path, filesystem=filesystem)
+    return schema.empty_table().to_pandas()
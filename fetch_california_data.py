@@ -1,11 +1,52 @@
 #!/usr/bin/env python3
 """
 Fetch entire California housing dataset using the california_housing feature view.
+
+--chunked runs the retrieval for a large entity DataFrame (--houses house IDs
+x --timestamps-per-house timestamps) in parallel chunks and streams the
+results to Parquet instead of building one in-memory result:
+
+    python fetch_california_data.py --chunked --houses 1000000 --output s3://test-bucket/feast/output/california
+
+--stream retrieves the same houses as the default run, but reads the result
+as Arrow record batches while it is produced and hands the Float32 features
+to NumPy without copying (the full result is never built in memory):
+
+    python fetch_california_data.py --stream --chunk-rows 100000
+
+With --check, --chunked, --stream and --training-set also run the retrieval in
+one call and fail unless the chunked result has exactly the same rows.
+
+--cache memoizes the default retrieval: a repeated run with the same houses,
+features and source data reads the stored result instead of joining again:
+
+    python fetch_california_data.py --cache s3://test-bucket/feast/cache/retrieval
+
+--latest exports the whole view as it stood at --as-of (default: now): the
+latest values of every house, found with one scan of the source and no
+entity DataFrame or point-in-time join:
+
+    python fetch_california_data.py --latest --as-of 2020-01-15T12:00:00 --output s3://test-bucket/feast/output/latest
+
+--training-set samples every active house at many points in time (every
+--every-hours, --samples-per-house random times, or the rows of a --labels
+Parquet table) and streams the training set to one Parquet file per
+partition of --partition-houses houses:
+
+    python fetch_california_data.py --training-set interval --start 2020-01-01 --end 2020-01-15T12:00:00 --every-hours 6
 """
+import argparse
 import os
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Union
 from feast import FeatureStore
+from retrieval import (DEFAULT_CHUNK_ROWS, DEFAULT_PARTITION_ENTITIES, IntervalSchedule, LabelSchedule, RandomSchedule,
+                       active_entity_df, build_training_set, check_chunked_retrieval, check_training_set, export_latest,
+                       feature_arrays, get_historical_features_cached, get_historical_features_chunked,
+                       iter_historical_features)
 
 # Set MinIO credentials
 os.environ.update({
@@ -17,44 +58,49 @@ os.environ.update({
 # Connect to Feast store
 store = FeatureStore(repo_path="./feature_repo")
 
-def fetch_california_housing_data():
+# All California housing features
+FEATURES = [
+    "california_housing:MedInc",
+    "california_housing:HouseAge", 
+    "california_housing:AveRooms",
+    "california_housing:AveBedrms",
+    "california_housing:Population",
+    "california_housing:AveOccup",
+    "california_housing:Latitude",
+    "california_housing:Longitude",
+    "california_housing:target"
+]
+
+def fetch_california_housing_data(cache=None):
     print("🏠 FETCHING ALL CALIFORNIA HOUSING DATA")
     print("=" * 50)
     
-    # Create entity DataFrame with all house IDs and the fixed timestamp
+    # Create entity DataFrame with every house active within the view's TTL before the fixed timestamp
+    # (read from the source's entity index, no data files are scanned)
     # All records now have the same timestamp: 2020-01-15 12:00:00
-    entity_df = pd.DataFrame({
-        "house_id": list(range(600)),  # All house IDs: 0, 1, 2, ..., 599
-        "event_timestamp": [datetime(2020, 1, 15, 12, 0, 0)] * 600  # Same timestamp for all
-    })
+    entity_df = active_entity_df(store, "california_housing", end=datetime(2020, 1, 15, 12, 0, 0))
     
     print(f"📋 Entity DataFrame shape: {entity_df.shape}")
     print(f"🏠 House ID range: {entity_df['house_id'].min()} - {entity_df['house_id'].max()}")
     print(f"🕐 Timestamp: {entity_df['event_timestamp'].iloc[0]} (same for all records)")
     
     # Fetch all California housing features
-    features = [
-        "california_housing:MedInc",
-        "california_housing:HouseAge", 
-        "california_housing:AveRooms",
-        "california_housing:AveBedrms",
-        "california_housing:Population",
-        "california_housing:AveOccup",
-        "california_housing:Latitude",
-        "california_housing:Longitude",
-        "california_housing:target"
-    ]
+    features = FEATURES
     
     print(f"\n🔍 Requesting features: {len(features)} features")
     
     try:
-        print("\n⏳ Fetching historical features for all 600 houses...")
-        historical_features = store.get_historical_features(
-            entity_df=entity_df,
-            features=features
-        )
-        
-        result = historical_features.to_df()
+        print(f"\n⏳ Fetching historical features for all {len(entity_df)} houses...")
+        if cache:
+            # Reuse the stored result while the request and the source data are unchanged
+            result = get_historical_features_cached(store, entity_df, features, cache).to_pandas()
+        else:
+            historical_features = store.get_historical_features(
+                entity_df=entity_df,
+                features=features
+            )
+            
+            result = historical_features.to_df()
         
         print("✅ Successfully fetched California housing data!")
         print(f"\n📊 Result shape: {result.shape}")
@@ -98,6 +144,165 @@ def fetch_california_housing_data():
         traceback.print_exc()
         return None
 
+def check_chunked(entity_df, chunk_rows):
+    print(f"\n🔍 Checking the chunked result against one retrieval of {len(entity_df):,} rows...")
+    rows = check_chunked_retrieval(store, entity_df, FEATURES, chunk_rows=chunk_rows)
+    print(f"✅ Chunked and single retrieval return the same {rows:,} rows")
+
+def fetch_california_housing_data_chunked(houses, timestamps_per_house, output, chunk_rows=DEFAULT_CHUNK_ROWS,
+                                         workers=None, check=False):
+    print("🏠 FETCHING CALIFORNIA HOUSING DATA IN PARALLEL CHUNKS")
+    print("=" * 50)
+    
+    # One row per house and day, ending at the fixed timestamp
+    end = np.datetime64(datetime(2020, 1, 15, 12, 0, 0), 'us')
+    days = np.arange(timestamps_per_house - 1, -1, -1) * np.timedelta64(1, 'D')
+    entity_df = pd.DataFrame({
+        "house_id": np.repeat(np.arange(houses, dtype=np.int64), timestamps_per_house),
+        "event_timestamp": np.tile(end - days, houses),
+    })
+    
+    print(f"📋 Entity DataFrame shape: {entity_df.shape}")
+    print(f"🔀 Chunks of {chunk_rows:,} rows -> {output}")
+    
+    results = get_historical_features_chunked(
+        entity_df,
+        FEATURES,
+        output,
+        repo_path="./feature_repo",
+        chunk_rows=chunk_rows,
+        workers=workers,
+    )
+    print(f"\n🎉 SUCCESS: Wrote {sum(result['rows'] for result in results):,} records to {output}")
+    if check:
+        check_chunked(entity_df, chunk_rows)
+    return results
+
+def fetch_california_housing_stream(chunk_rows=DEFAULT_CHUNK_ROWS, check=False):
+    print("🏠 STREAMING CALIFORNIA HOUSING DATA AS ARROW BATCHES")
+    print("=" * 50)
+    
+    entity_df = active_entity_df(store, "california_housing", end=datetime(2020, 1, 15, 12, 0, 0))
+    print(f"📋 Entity DataFrame shape: {entity_df.shape}")
+    
+    started = time.perf_counter()
+    reader = iter_historical_features(store, entity_df, FEATURES, chunk_rows=chunk_rows)
+    rows = 0
+    batches = 0
+    target_sum = 0.0
+    for batch in reader:
+        if not batches:
+            print(f"⏱️  First batch after {time.perf_counter() - started:.2f}s")
+        # Zero-copy float32 views of the feature columns, ready for a training loop
+        arrays = feature_arrays(batch)
+        target_sum += float(np.nansum(arrays["target"], dtype=np.float64))
+        rows += batch.num_rows
+        batches += 1
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 SUCCESS: Streamed {rows:,} records in {batches} batches in {elapsed:.2f}s")
+    print(f"   Schema: {reader.schema}")
+    if rows:
+        print(f"   Target mean: ${target_sum / rows:,.2f}")
+    if check:
+        check_chunked(entity_df, chunk_rows)
+    return rows
+
+def fetch_california_housing_latest(as_of=None, output=None):
+    print("🏠 EXPORTING LATEST CALIFORNIA HOUSING VALUES")
+    print("=" * 50)
+    print(f"🕐 As of: {as_of or 'now'}")
+    
+    table = export_latest(store, "california_housing", as_of=as_of, output=output)
+    result = table.to_pandas()
+    
+    print(f"\n🎉 SUCCESS: Exported {len(result)} houses" + (f" to {output}" if output else ""))
+    print(f"   Columns: {list(result.columns)}")
+    print(result.head())
+    return result
+
+def fetch_california_training_set(schedule, output, partition_houses=DEFAULT_PARTITION_ENTITIES,
+                                  chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, check=False):
+    print("🏠 BUILDING A CALIFORNIA HOUSING TRAINING SET")
+    print("=" * 50)
+    print(f"🕐 Schedule: {type(schedule).__name__}")
+    
+    results = build_training_set(store, FEATURES, schedule, output, partition_entities=partition_houses,
+                                 chunk_rows=chunk_rows, workers=workers)
+    print(f"\n🎉 SUCCESS: Wrote {sum(result['rows'] for result in results):,} training rows to {output}")
+    if check:
+        print("\n🔍 Checking the training set against one retrieval of its entity rows...")
+        rows = check_training_set(store, FEATURES, schedule, output, partition_entities=partition_houses)
+        print(f"✅ Training set and single retrieval return the same {rows:,} rows")
+    return results
+
 if __name__ == "__main__":
-    result = fetch_california_housing_data()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunked', action='store_true', help='parallel chunked retrieval streamed to Parquet')
+    parser.add_argument('--cache', default=None,
+                        help='memoize the default retrieval in this directory or s3://bucket/prefix')
+    parser.add_argument('--stream', action='store_true', help='stream the result as Arrow record batches')
+    parser.add_argument('--latest', action='store_true', help='export the latest values of every house')
+    parser.add_argument('--as-of', type=datetime.fromisoformat, default=None,
+                        help='point in time for --latest, ISO format, UTC if no offset (default: now)')
+    parser.add_argument('--training-set', choices=['interval', 'random', 'labels'], default=None,
+                        help='build a training set with this sampling schedule')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2020, 1, 1),
+                        help='first sampling time for --training-set interval/random, UTC if no offset')
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2020, 1, 15, 12, 0, 0),
+                        help='last sampling time for --training-set interval/random, UTC if no offset')
+    parser.add_argument('--every-hours', type=float, default=24, help='sampling interval for --training-set interval')
+    parser.add_argument('--samples-per-house', type=int, default=10, help='random times per house for --training-set random')
+    parser.add_argument('--labels', default=None,
+                        help='label table (Parquet, local or s3://) with house_id and event_timestamp '
+                             'for --training-set labels')
+    parser.add_argument('--partition-houses', type=int, default=DEFAULT_PARTITION_ENTITIES,
+                        help='houses per --training-set output file')
+    parser.add_argument('--houses', type=int, default=600, help='house IDs in the entity DataFrame')
+    parser.add_argument('--timestamps-per-house', type=int, default=1, help='daily timestamps per house')
+    parser.add_argument('--output', default=None,
+                        help='local directory or s3://bucket/prefix for the result files '
+                             '(--chunked default: s3://test-bucket/feast/output/california, '
+                             '--training-set default: s3://test-bucket/feast/output/training)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=None, help='retrieval processes (default: CPU count)')
+    parser.add_argument('--check', action='store_true',
+                        help='compare the --chunked, --stream or --training-set result with a single retrieval')
+    args = parser.parse_args()
+    if args.latest:
+        as_of = args.as_of
+        if as_of is not None and as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=timezone.utc)
+        result = fetch_california_housing_latest(as_of, args.output)
+    elif args.training_set:
+        schedule: Union[IntervalSchedule, RandomSchedule, LabelSchedule]
+        if args.training_set == 'labels':
+            if not args.labels:
+                parser.error('--training-set labels needs --labels')
+            schedule = LabelSchedule(args.labels)
+        elif args.training_set == 'random':
+            schedule = RandomSchedule(args.start, args.end, args.samples_per_house)
+        else:
+            schedule = IntervalSchedule(args.start, args.end, pd.Timedelta(hours=args.every_hours))
+        results = fetch_california_training_set(
+            schedule,
+            args.output or 's3://test-bucket/feast/output/training',
+            partition_houses=args.partition_houses,
+            chunk_rows=args.chunk_rows,
+            workers=args.workers,
+            check=args.check,
+        )
+    elif args.stream:
+        rows = fetch_california_housing_stream(chunk_rows=args.chunk_rows, check=args.check)
+    elif args.chunked:
+        results = fetch_california_housing_data_chunked(
+            args.houses,
+            args.timestamps_per_house,
+            args.output or 's3://test-bucket/feast/output/california',
+            chunk_rows=args.chunk_rows,
+            workers=args.workers,
+            check=args.check,
+        )
+    else:
+        result = fetch_california_housing_data(cache=args.cache)
  
\ No newline at end of file
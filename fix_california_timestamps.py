@@ -2,35 +2,25 @@
 """
 Fix California housing data to have same timestamp for all records
 so Feast can fetch all data in one query.
+
+The dataset is rewritten one row group at a time: event_timestamp, created
+and house_id are never downloaded, and the fixed rows are streamed back to
+MinIO, so the fix runs in constant memory whatever the dataset size.
 """
-import boto3
-import pandas as pd
-from io import BytesIO
 from datetime import datetime
+import numpy as np
+import pyarrow as pa
+from minio_io import TIMESTAMP_TYPE, feature_view_schema, get_s3_client, load_feature_view, rewrite_dataset
 
 def fix_california_timestamps():
     print("🔧 FIXING CALIFORNIA HOUSING TIMESTAMPS")
     print("=" * 50)
     
     # MinIO configuration
-    s3_client = boto3.client(
-        's3',
-        endpoint_url="http://localhost:9001",
-        aws_access_key_id="minio",
-        aws_secret_access_key="minio123",
-        region_name='us-east-1'
-    )
+    s3_client = get_s3_client()
     
-    # Read existing data
     bucket_name = "test-bucket"
-    key = "feast/data/california_data.parquet"
-    
-    print("📖 Reading existing data...")
-    response = s3_client.get_object(Bucket=bucket_name, Key=key)
-    df = pd.read_parquet(BytesIO(response['Body'].read()))
-    
-    print(f"Original data shape: {df.shape}")
-    print(f"Original timestamp range: {df['event_timestamp'].min()} to {df['event_timestamp'].max()}")
+    prefix = "feast/data/california"
     
     # Fix the data:
     # 1. Set all timestamps to the same value
@@ -38,34 +28,28 @@ def fix_california_timestamps():
     
     fixed_timestamp = datetime(2020, 1, 15, 12, 0, 0)  # Single timestamp for all
     
-    df['house_id'] = range(len(df))  # 0, 1, 2, 3, ... 599
-    df['event_timestamp'] = fixed_timestamp
-    df['created'] = fixed_timestamp
-    
-    print(f"\n✅ Fixed data:")
-    print(f"   Shape: {df.shape}")
-    print(f"   house_id range: {df['house_id'].min()} - {df['house_id'].max()}")
-    print(f"   All timestamps: {df['event_timestamp'].iloc[0]}")
-    print(f"   Unique timestamps: {df['event_timestamp'].nunique()}")
+    def sequential_house_id(table, offset):
+        return pa.array(np.arange(offset, offset + table.num_rows, dtype=np.int64))
     
-    # Upload fixed data
-    print("\n💾 Converting to parquet...")
-    parquet_buffer = BytesIO()
-    df.to_parquet(parquet_buffer, index=False)
-    parquet_buffer.seek(0)
+    def fixed(table, offset):
+        return pa.array(np.full(table.num_rows, np.datetime64(fixed_timestamp, 'us')), type=TIMESTAMP_TYPE)
     
-    print("⬆️  Uploading fixed data to MinIO...")
-    s3_client.put_object(
-        Bucket=bucket_name,
-        Key=key,
-        Body=parquet_buffer.getvalue(),
-        ContentType='application/octet-stream'
+    # All rows now share one date, so this collapses to a single partition
+    print("📖 Streaming existing data through the fix...")
+    entries = rewrite_dataset(
+        bucket_name,
+        prefix,
+        {'house_id': sequential_house_id, 'event_timestamp': fixed, 'created': fixed},
+        s3_client=s3_client,
+        target_schema=feature_view_schema(load_feature_view("california_housing")),
     )
     
+    rows = sum(entry['rows'] for entry in entries)
     print("✅ Successfully uploaded fixed California housing data!")
-    print(f"   - All 600 records have the same timestamp: {fixed_timestamp}")
-    print(f"   - house_id now ranges from 0 to 599")
+    print(f"   - All {rows} records have the same timestamp: {fixed_timestamp}")
+    print(f"   - house_id now ranges from 0 to {rows - 1}")
+    print(f"   - {len(entries)} partition file(s) at s3://{bucket_name}/{prefix}/")
     print("   - Now Feast should fetch all records when queried!")
 
 if __name__ == "__main__":
-    fix_california_timestamps() 
\ No newline at end of file
+    fix_california_timestamps()
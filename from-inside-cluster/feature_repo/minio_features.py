@@ -33,7 +33,7 @@ minio_source = FileSource(
 # California housing data source
 california_source = FileSource(
     name="california_housing_source",
-    path="s3://test-bucket/feast/data/california_data.parquet",
+    path="s3://test-bucket/feast/data/california/",  # date=YYYY-MM-DD partitions
     timestamp_field="event_timestamp",
     created_timestamp_column="created",
     description="California housing data from MinIO S3 via cross-namespace DNS",
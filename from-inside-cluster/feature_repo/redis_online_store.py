@@ -0,0 +1,609 @@
+"""
+Redis online store with a shared connection pool and pipelined batch reads.
+
+Behaves like Feast's built-in ``redis`` online store (same keys, values and
+write path), but serves reads differently:
+
+- every FeatureStore in a process shares one client per connection string,
+  backed by a BlockingConnectionPool of at most ``max_connections``
+  connections, so requests never set up connections of their own and
+  concurrent requests wait for a free connection instead of failing;
+- get_online_features queues the HMGET of every entity of every requested
+  feature view into the same pipeline, so a request costs one round trip
+  instead of one per feature view;
+- requests of more than ``read_batch_size`` lookups are split into
+  sub-batches that run as concurrent pipelines on ``read_workers`` threads,
+  so latency stays flat as the number of entity rows grows.
+
+With ``cache_max_entries`` set, feature vectors are also cached in process,
+keyed by (feature view, entity key), least recently used first out and for at
+most ``cache_ttl_seconds``, for sync and async reads alike. Hits never reach
+Redis; a miss reads every feature of the view, so any later subset of them is
+a hit. online_write_batch (materialization and store.push) drops the keys it
+writes from the cache, and delete_table / delete_entity_values (teardown) the
+views they delete. Both publish on INVALIDATION_CHANNEL, which every process
+with a cache listens to, so writers in other processes invalidate it too;
+writers publish even without a cache of their own (``invalidate_on_write``,
+default true), so they must use this store type, not ``redis``. A
+read in flight during an invalidation does not cache the keys invalidated,
+and still caches the others. The TTL bounds how stale a vector can get if a
+message is missed. online_feature_cache(store) returns the cache, whose stats()
+has hit/miss counters.
+
+Select it in feature_store.yaml with:
+
+    online_store:
+        type: feature_repo.redis_online_store.PooledRedisOnlineStore
+        connection_string: localhost:6379
+        max_connections: 16     # optional: pool size per process
+        read_batch_size: 256    # optional: HMGETs per pipeline
+        read_workers: 4         # optional: concurrent pipelines per request
+        cache_max_entries: 100000   # optional: in-process cache size (default 0: no cache)
+        cache_ttl_seconds: 60       # optional: in-process cache TTL
+        invalidate_on_write: true   # optional: publish writes to other processes' caches (default true)
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+from feast import utils
+from feast.feature_view import FeatureView
+from feast.infra.online_stores.redis import (
+    RedisOnlineStore,
+    RedisOnlineStoreConfig,
+    RedisType,
+)
+from feast.infra.registry.base_registry import BaseRegistry
+from feast.online_response import OnlineResponse
+from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+from feast.protos.feast.types.Value_pb2 import RepeatedValue
+from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+from feast.repo_config import RepoConfig
+from redis import BlockingConnectionPool, Redis, SSLConnection
+
+REDIS_ONLINE_STORE_TYPE = "feature_repo.redis_online_store.PooledRedisOnlineStore"
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_READ_BATCH_SIZE = 256
+DEFAULT_READ_WORKERS = 4
+DEFAULT_CACHE_TTL_SECONDS = 60.0
+# Messages are "<feature view>\n<hex redis key>,<hex redis key>,...", "<feature view>\n*"
+# for every key of a view, or "*" for every key of every view
+INVALIDATION_CHANNEL = "feast:online_cache:invalidate"
+
+# Shared by every store instance of the process. redis-py pools reset their
+# connections when used from a forked child, so fork-based servers are safe
+_clients: Dict[tuple, Any] = {}
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_caches: Dict[tuple, "FeatureVectorCache"] = {}
+_lock = threading.Lock()
+
+
+class PooledRedisOnlineStoreConfig(RedisOnlineStoreConfig):
+    """Online store config for the pooled Redis online store"""
+
+    type: Literal["feature_repo.redis_online_store.PooledRedisOnlineStore"] = (
+        REDIS_ONLINE_STORE_TYPE  # type: ignore[assignment]
+    )
+    """ Online store type selector"""
+
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    """ Connections in the process-wide pool of each connection string"""
+
+    read_batch_size: int = DEFAULT_READ_BATCH_SIZE
+    """ Entity lookups (HMGETs) per pipeline"""
+
+    read_workers: int = DEFAULT_READ_WORKERS
+    """ Pipelines of one request run concurrently"""
+
+    cache_max_entries: int = 0
+    """ Feature vectors cached per process, least recently used evicted first (0: no cache)"""
+
+    cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS
+    """ Seconds a cached feature vector is served for"""
+
+    invalidate_on_write: bool = True
+    """ Publish written and deleted keys on INVALIDATION_CHANNEL, for the caches of other processes"""
+
+
+class FeatureVectorCache:
+    """LRU cache of Redis feature hashes keyed by (feature view, redis key), with a TTL.
+
+    Values are dicts of hash field -> raw value. hits, misses, evictions and
+    invalidations count lookups and entries since the cache was created.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a read records it and hands it to put_many
+        self.version = 0
+        # Version of the latest invalidation of each recently invalidated key, oldest first
+        self._invalidated: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+        self._view_invalidated: Dict[str, int] = {}
+        # Reads older than this may have missed a forgotten invalidation
+        self._oldest_readable = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_many(self, feature_view: str, keys: List[bytes]) -> List[Optional[dict]]:
+        """The cached value of each key, None for misses and expired entries."""
+        now = time.monotonic()
+        values: List[Optional[dict]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((feature_view, key))
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end((feature_view, key))
+                    values.append(entry[1])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[(feature_view, key)]
+                    values.append(None)
+                    self.misses += 1
+        return values
+
+    def put_many(
+        self, feature_view: str, keys: List[bytes], values: List[dict], version: int
+    ):
+        """Cache values read from Redis when the cache was at `version`.
+
+        Keys invalidated since are skipped: their values may have been read
+        before the write that invalidated them. Other keys are cached.
+        """
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if version < self._oldest_readable or self._view_invalidated.get(feature_view, 0) > version:
+                return
+            for key, value in zip(keys, values):
+                if self._invalidated.get((feature_view, key), 0) > version:
+                    continue
+                self._entries[(feature_view, key)] = (expires, value)
+                self._entries.move_to_end((feature_view, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, feature_view: str, keys: List[bytes]):
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._invalidated[(feature_view, key)] = self.version
+                self._invalidated.move_to_end((feature_view, key))
+                if self._entries.pop((feature_view, key), None) is not None:
+                    self.invalidations += 1
+            # Forget the oldest invalidations; reads from before them are no longer cached
+            while len(self._invalidated) > self.max_entries:
+                _, self._oldest_readable = self._invalidated.popitem(last=False)
+
+    def invalidate_view(self, feature_view: str):
+        """Drop every key of a feature view."""
+        with self._lock:
+            self.version += 1
+            self._view_invalidated[feature_view] = self.version
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == feature_view]:
+                del self._entries[entry_key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._oldest_readable = self.version
+            self._entries.clear()
+            self._invalidated.clear()
+            self._view_invalidated.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class PooledRedisOnlineStore(RedisOnlineStore):
+    def _get_client(self, online_store_config: RedisOnlineStoreConfig):
+        """The process-wide client of this connection string, created on first use."""
+        key = (
+            online_store_config.redis_type,
+            online_store_config.connection_string,
+            online_store_config.sentinel_master,
+            getattr(online_store_config, "max_connections", DEFAULT_MAX_CONNECTIONS),
+        )
+        with _lock:
+            if key not in _clients:
+                if online_store_config.redis_type == RedisType.redis:
+                    _clients[key] = _pooled_client(online_store_config)
+                else:
+                    # Cluster and sentinel clients keep their own pools per node
+                    self._client = None
+                    _clients[key] = super()._get_client(online_store_config)
+            return _clients[key]
+
+    def _get_cache(
+        self, online_store_config: RedisOnlineStoreConfig
+    ) -> Optional[FeatureVectorCache]:
+        """The process-wide cache of this connection string (None when disabled), listening for invalidations."""
+        max_entries = getattr(online_store_config, "cache_max_entries", 0)
+        if max_entries <= 0:
+            return None
+        key = _cache_key(online_store_config)
+        cache = _caches.get(key)
+        if cache is None:
+            client = self._get_client(online_store_config)
+            with _lock:
+                cache = _caches.get(key)
+                if cache is None:
+                    cache = FeatureVectorCache(
+                        max_entries,
+                        getattr(online_store_config, "cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS),
+                    )
+                    _subscribe_invalidations(client, cache)
+                    _caches[key] = cache
+        return cache
+
+    def online_write_batch(
+        self,
+        config: RepoConfig,
+        table: FeatureView,
+        data: List[
+            Tuple[EntityKeyProto, Dict[str, ValueProto], datetime, Optional[datetime]]
+        ],
+        progress: Optional[Callable[[int], Any]],
+    ) -> None:
+        super().online_write_batch(config, table, data, progress)
+        if not _publishes(config.online_store) and _caches.get(_cache_key(config.online_store)) is None:
+            return
+        keys = self._generate_redis_keys_for_entities(config, [row[0] for row in data])
+        self._invalidate(config.online_store, table.name, keys)
+
+    def delete_entity_values(self, config: RepoConfig, join_keys: List[str]):
+        # Also how teardown deletes. Every view keyed by join_keys lost its rows, and the views are not known here
+        super().delete_entity_values(config, join_keys)
+        self._invalidate(config.online_store)
+
+    def delete_table(self, config: RepoConfig, table: FeatureView):
+        super().delete_table(config, table)
+        self._invalidate(config.online_store, table.name)
+
+    def _invalidate(
+        self,
+        online_store_config: RedisOnlineStoreConfig,
+        feature_view: Optional[str] = None,
+        keys: Optional[List[bytes]] = None,
+    ):
+        """Drop keys of feature_view from the caches: all of its keys if None, every view's if feature_view is None.
+
+        This process's cache now; the other processes' when they get the
+        message on INVALIDATION_CHANNEL. Writers publish whether or not they
+        cache themselves: materialization and push usually run without one.
+        """
+        cache = _caches.get(_cache_key(online_store_config))
+        if cache is not None:
+            _apply_invalidation(cache, feature_view, keys)
+        if not _publishes(online_store_config):
+            return
+        if feature_view is None:
+            message = b"*"
+        elif keys is None:
+            message = feature_view.encode() + b"\n*"
+        else:
+            message = feature_view.encode() + b"\n" + b",".join(key.hex().encode() for key in keys)
+        self._get_client(online_store_config).publish(INVALIDATION_CHANNEL, message)
+
+    def online_read(
+        self,
+        config: RepoConfig,
+        table: FeatureView,
+        entity_keys: List[EntityKeyProto],
+        requested_features: Optional[List[str]] = None,
+    ) -> List[Tuple[Optional[datetime], Optional[Dict[str, ValueProto]]]]:
+        requested_features, hset_keys = self._generate_hset_keys_for_features(
+            table, list(requested_features or [])
+        )
+        keys = self._generate_redis_keys_for_entities(config, entity_keys)
+        (redis_values,) = self._read_pipelined(config, [(table, keys, hset_keys)])
+        return self._convert_redis_values_to_protobuf(
+            redis_values, table.name, requested_features
+        )
+
+    async def online_read_async(
+        self,
+        config: RepoConfig,
+        table: FeatureView,
+        entity_keys: List[EntityKeyProto],
+        requested_features: Optional[List[str]] = None,
+    ) -> List[Tuple[Optional[datetime], Optional[Dict[str, ValueProto]]]]:
+        """Like online_read, on the async client: cached keys are served from the cache, the others read and cached."""
+        cache = self._get_cache(config.online_store)
+        if cache is None:
+            return await super().online_read_async(
+                config, table, entity_keys, requested_features
+            )
+        requested_features, hset_keys = self._generate_hset_keys_for_features(
+            table, list(requested_features or [])
+        )
+        keys = self._generate_redis_keys_for_entities(config, entity_keys)
+
+        version = cache.version
+        cached = cache.get_many(table.name, keys)
+        missing = [key for key, value in zip(keys, cached) if value is None]
+        _, view_hset_keys = self._generate_hset_keys_for_features(table)
+        values = []
+        if missing:
+            client = await self._get_client_async(config.online_store)
+            async with client.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.hmget(key, view_hset_keys)
+                values = await pipe.execute()
+        read = [dict(zip(view_hset_keys, value)) for value in values]
+        cache.put_many(table.name, missing, read, version)
+        return self._convert_redis_values_to_protobuf(
+            _hash_values(cached, read, hset_keys), table.name, requested_features
+        )
+
+    def get_online_features(
+        self,
+        config: RepoConfig,
+        features: Union[List[str], Any],
+        entity_rows: Union[
+            List[Dict[str, Any]],
+            Mapping[str, Union[Sequence[Any], Sequence[ValueProto], RepeatedValue]],
+        ],
+        registry: BaseRegistry,
+        project: str,
+        full_feature_names: bool = False,
+    ) -> OnlineResponse:
+        """Like OnlineStore.get_online_features, with every feature view read in the same pipelines."""
+        if isinstance(entity_rows, list):
+            columnar: Dict[str, List[Any]] = {k: [] for k in entity_rows[0].keys()}
+            for entity_row in entity_rows:
+                for key, value in entity_row.items():
+                    try:
+                        columnar[key].append(value)
+                    except KeyError as e:
+                        raise ValueError(
+                            "All entity_rows must have the same keys."
+                        ) from e
+            entity_rows = columnar
+
+        (
+            join_key_values,
+            grouped_refs,
+            entity_name_to_join_key_map,
+            requested_on_demand_feature_views,
+            feature_refs,
+            requested_result_row_names,
+            online_features_response,
+        ) = utils._prepare_entities_to_read_from_online_store(
+            registry=registry,
+            project=project,
+            features=features,
+            entity_values=entity_rows,
+            full_feature_names=full_feature_names,
+            native_entity_values=True,
+        )
+
+        # Queue the lookups of every feature view first, then read them all at once
+        tables, reads = [], []
+        for table, requested_features in grouped_refs:
+            table_entity_values, idxs, output_len = utils._get_unique_entities(
+                table,
+                join_key_values,
+                entity_name_to_join_key_map,
+            )
+            entity_key_protos = utils._get_entity_key_protos(table_entity_values)
+            read_features, hset_keys = self._generate_hset_keys_for_features(
+                table, list(requested_features)
+            )
+            keys = self._generate_redis_keys_for_entities(config, entity_key_protos)
+            tables.append((table, requested_features, read_features, idxs, output_len))
+            reads.append((table, keys, hset_keys))
+
+        for (table, requested_features, read_features, idxs, output_len), redis_values in zip(
+            tables, self._read_pipelined(config, reads)
+        ):
+            read_rows = self._convert_redis_values_to_protobuf(
+                redis_values, table.name, read_features
+            )
+            feature_data = utils._convert_rows_to_protobuf(
+                requested_features, read_rows
+            )
+            utils._populate_response_from_feature_data(
+                feature_data,
+                idxs,
+                online_features_response,
+                full_feature_names,
+                requested_features,
+                table,
+                output_len,
+            )
+
+        if requested_on_demand_feature_views:
+            utils._augment_response_with_on_demand_transforms(
+                online_features_response,
+                feature_refs,
+                requested_on_demand_feature_views,
+                full_feature_names,
+            )
+
+        utils._drop_unneeded_columns(
+            online_features_response, requested_result_row_names
+        )
+        return OnlineResponse(online_features_response)
+
+    def _read_pipelined(
+        self, config: RepoConfig, reads: List[Tuple[FeatureView, List[bytes], List[str]]]
+    ) -> List[List[list]]:
+        """HMGET each (feature view, redis keys, hash fields) read; one list of values per read, in order.
+
+        Cached keys are served from the cache; the others are read from Redis
+        and cached.
+        """
+        online_store_config = config.online_store
+        cache = self._get_cache(online_store_config)
+        if cache is None:
+            return self._hmget_batched(
+                online_store_config, [(keys, hset_keys) for _, keys, hset_keys in reads]
+            )
+
+        version = cache.version
+        cached_reads, missing_reads = [], []
+        for table, keys, hset_keys in reads:
+            cached = cache.get_many(table.name, keys)
+            missing = [key for key, value in zip(keys, cached) if value is None]
+            # Misses read every feature of the view, so later subsets of them are hits
+            _, view_hset_keys = self._generate_hset_keys_for_features(table)
+            cached_reads.append(cached)
+            missing_reads.append((missing, view_hset_keys))
+
+        results = []
+        for (table, _, hset_keys), cached, (missing, view_hset_keys), values in zip(
+            reads, cached_reads, missing_reads, self._hmget_batched(online_store_config, missing_reads)
+        ):
+            read = [dict(zip(view_hset_keys, value)) for value in values]
+            cache.put_many(table.name, missing, read, version)
+            results.append(_hash_values(cached, read, hset_keys))
+        return results
+
+    def _hmget_batched(
+        self, online_store_config: RedisOnlineStoreConfig, reads: List[Tuple[List[bytes], List[str]]]
+    ) -> List[List[list]]:
+        """HMGET each (redis keys, hash fields) read; one list of values per read, in order.
+
+        All lookups are cut into pipelines of read_batch_size, which run
+        concurrently when there are several.
+        """
+        client = self._get_client(online_store_config)
+        batch_size = getattr(online_store_config, "read_batch_size", DEFAULT_READ_BATCH_SIZE)
+        workers = getattr(online_store_config, "read_workers", DEFAULT_READ_WORKERS)
+
+        lookups = [(key, hset_keys) for keys, hset_keys in reads for key in keys]
+        batches = [lookups[i : i + batch_size] for i in range(0, len(lookups), batch_size)]
+        if len(batches) > 1 and workers > 1:
+            values = [
+                value
+                for batch_values in _executor(workers).map(
+                    lambda batch: _hmget_pipeline(client, batch), batches
+                )
+                for value in batch_values
+            ]
+        else:
+            values = [value for batch in batches for value in _hmget_pipeline(client, batch)]
+
+        results, start = [], 0
+        for keys, _ in reads:
+            results.append(values[start : start + len(keys)])
+            start += len(keys)
+        return results
+
+
+def online_feature_cache(store) -> Optional[FeatureVectorCache]:
+    """The in-process feature vector cache of a FeatureStore's online store (None when disabled)."""
+    online_store = store._get_provider().online_store
+    if not isinstance(online_store, PooledRedisOnlineStore):
+        return None
+    return online_store._get_cache(store.config.online_store)
+
+
+def _publishes(online_store_config: RedisOnlineStoreConfig) -> bool:
+    return getattr(online_store_config, "invalidate_on_write", True)
+
+
+def _cache_key(online_store_config: RedisOnlineStoreConfig) -> tuple:
+    return (
+        online_store_config.redis_type,
+        online_store_config.connection_string,
+        online_store_config.sentinel_master,
+    )
+
+
+def _hash_values(
+    cached: List[Optional[dict]], read: List[dict], hset_keys: List[str]
+) -> List[list]:
+    """The hset_keys values of each key, like HMGET: cached ones from cached, misses from read (in order)."""
+    misses = iter(read)
+    return [
+        [hashes.get(hset_key) for hset_key in hset_keys]
+        for hashes in (value if value is not None else next(misses) for value in cached)
+    ]
+
+
+def _apply_invalidation(
+    cache: FeatureVectorCache, feature_view: Optional[str], keys: Optional[List[bytes]]
+):
+    if feature_view is None:
+        cache.clear()
+    elif keys is None:
+        cache.invalidate_view(feature_view)
+    else:
+        cache.invalidate(feature_view, keys)
+
+
+def _subscribe_invalidations(client, cache: FeatureVectorCache):
+    """Invalidate the cache from INVALIDATION_CHANNEL messages, on a daemon thread."""
+
+    def invalidate(message):
+        feature_view, separator, keys = message["data"].partition(b"\n")
+        if not separator:
+            _apply_invalidation(cache, None, None)
+        elif keys == b"*":
+            _apply_invalidation(cache, feature_view.decode(), None)
+        else:
+            _apply_invalidation(
+                cache,
+                feature_view.decode(),
+                [bytes.fromhex(key.decode()) for key in keys.split(b",") if key],
+            )
+
+    def reconnecting(error, pubsub, thread):
+        # Messages published while disconnected are lost: start over
+        cache.clear()
+        time.sleep(1)
+
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: invalidate})
+    pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=reconnecting)
+
+
+def _pooled_client(online_store_config: RedisOnlineStoreConfig) -> Redis:
+    startup_nodes, kwargs = RedisOnlineStore._parse_connection_string(
+        online_store_config.connection_string
+    )
+    if kwargs.pop("ssl", False):
+        kwargs["connection_class"] = SSLConnection
+    pool = BlockingConnectionPool(
+        host=startup_nodes[0]["host"],
+        port=int(startup_nodes[0]["port"]),
+        max_connections=getattr(online_store_config, "max_connections", DEFAULT_MAX_CONNECTIONS),
+        **kwargs,
+    )
+    return Redis(connection_pool=pool)
+
+
+def _hmget_pipeline(client, lookups: List[Tuple[bytes, List[str]]]) -> list:
+    with client.pipeline(transaction=False) as pipe:
+        for redis_key_bin, hset_keys in lookups:
+            pipe.hmget(redis_key_bin, hset_keys)
+        return pipe.execute()
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    with _lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="redis-read"
+            )
+        return _executors[workers]
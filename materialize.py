@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Parallel bulk materialization of a FeatureView into the online store (Redis)
+
+store.materialize() reads the whole window in one process, converts every row
+to protos and writes them in one call. Here the view's entities (read from the
+source's entity index) are cut into contiguous key ranges, and a pool of
+--workers processes materializes one range at a time:
+
+  - the latest row per entity in the window is read with the range's keys
+    pushed into the Parquet scan, so each worker decodes only the row groups
+    its keys can be in (a hash partitioning would make every worker decode
+    every row group);
+  - the rows are written in --batch-rows batches, each one Redis pipeline
+    (one round trip to check the stored timestamps, one to write), with up to
+    --connections batches in flight on the worker's connection pool while the
+    next batch is converted.
+
+Rows are written through the online store's own online_write_batch, so keys,
+serialization, the newer-timestamp check and key TTLs are the same as Feast's.
+The window is recorded in the registry like store.materialize() does, so
+materialize_incremental continues from its end.
+
+    python materialize.py --start 2020-01-01 --end 2020-01-15T12:00:00 --workers 8 --connections 4
+
+At most --workers x --connections Redis connections are open at any time.
+
+--backfill splits [start, end] into --chunk-hours time chunks instead and
+materializes --workers chunks at a time, each one reading only the files its
+window can be in. Chunks are slots of a fixed grid counted from the Unix epoch,
+so they do not move with start and end. Completed slots are recorded in a
+checkpoint table in the SQL registry's database, so rerunning a backfill after
+a failure (even with the default end, now) skips them and only materializes
+what is left. A partial first or last slot is never recorded and is redone on
+every run:
+
+    python materialize.py --backfill --start 2019-01-01 --end 2020-01-01 --chunk-hours 24 --workers 8
+
+Chunks can complete in any order: the Redis online store only overwrites an
+entity's row with a newer one, so the result is the same as one job.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta, timezone
+from feast import FeatureStore
+from feast.infra.registry.sql import SqlRegistry
+from feast.utils import _convert_arrow_to_proto
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, delete, insert, select
+from feature_repo.minio_offline_store import read_latest_values, source_file_cache
+from retrieval import active_entity_df
+
+DEFAULT_BATCH_ROWS = 10_000
+DEFAULT_CONNECTIONS = 4
+# Key ranges per worker: enough for the pool to balance ranges of uneven cost
+PARTITIONS_PER_WORKER = 4
+DEFAULT_CHUNK_HOURS = 24
+
+# Completed backfill chunks, in the SQL registry's database. Times are epoch microseconds (UTC)
+checkpoints = Table(
+    "materialization_checkpoints",
+    MetaData(),
+    Column("project_id", String(255), primary_key=True),
+    Column("feature_view_name", String(255), primary_key=True),
+    Column("chunk_start", BigInteger, primary_key=True),
+    Column("chunk_end", BigInteger, primary_key=True),
+    Column("rows", BigInteger, nullable=False),
+    Column("completed_timestamp", BigInteger, nullable=False),
+)
+
+# One FeatureStore (and online store connection pool) per worker process, created by _init_worker
+_worker_store = None
+
+
+def _init_worker(repo_path):
+    global _worker_store
+    _worker_store = FeatureStore(repo_path=repo_path)
+
+
+def key_partitions(keys, partitions):
+    """Split keys into at most `partitions` contiguous, non-empty ranges of sorted keys."""
+    keys = pd.Series(keys).drop_duplicates().sort_values(ignore_index=True)
+    size = max(1, -(-len(keys) // partitions))
+    return [keys.iloc[start:start + size].to_numpy() for start in range(0, len(keys), size)]
+
+
+def _materialize_partition(index, feature_view_name, keys, start, end, batch_rows, connections):
+    """Process pool worker: read the latest rows of one key range (all keys if None) and write them to the online store."""
+    store = _worker_store
+    feature_view = store.get_feature_view(feature_view_name)
+    source = feature_view.batch_source
+    source_names = {value: key for key, value in (source.field_mapping or {}).items()}
+    join_keys = [column.name for column in feature_view.entity_columns]
+    features = [feature.name for feature in feature_view.features]
+
+    started = time.perf_counter()
+    table = read_latest_values(
+        source,
+        store.repo_path,
+        [source_names.get(name, name) for name in join_keys],
+        [source_names.get(name, name) for name in features],
+        source.timestamp_field,
+        source.created_timestamp_column,
+        start_date=start,
+        end_date=end,
+        cache=source_file_cache(store.config.offline_store),
+        entity_keys=None if keys is None else {source_names.get(join_keys[0], join_keys[0]): pd.Series(keys)},
+    )
+    # Features and join keys by their view names; timestamps keep the source names the conversion reads
+    renamed = {key: value for key, value in (source.field_mapping or {}).items()
+               if key not in (source.timestamp_field, source.created_timestamp_column)}
+    table = table.rename_columns([renamed.get(name, name) for name in table.column_names])
+    read_seconds = time.perf_counter() - started
+
+    provider = store._get_provider()
+    join_key_types = {column.name: column.dtype.to_value_type() for column in feature_view.entity_columns}
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        for offset in range(0, table.num_rows, batch_rows):
+            rows = _convert_arrow_to_proto(table.slice(offset, batch_rows).combine_chunks(), feature_view,
+                                           join_key_types)
+            # Bounded: converted batches never pile up ahead of the connections
+            if len(in_flight) >= connections:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(executor.submit(provider.online_write_batch, store.config, feature_view, rows, None))
+        for future in in_flight:
+            future.result()
+
+    return {
+        'partition': index,
+        'keys': table.num_rows if keys is None else len(keys),
+        'rows': table.num_rows,
+        'read_seconds': read_seconds,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def materialize_parallel(store, feature_view_name, start=None, end=None, workers=None,
+                         connections=DEFAULT_CONNECTIONS, batch_rows=DEFAULT_BATCH_ROWS):
+    """Materialize the latest values in [start, end] of a FeatureView into the online store, in parallel.
+
+    end defaults to now and start to end - ttl. Only entities with rows in
+    the window are read (from the entity index). Returns one summary dict per
+    key range written.
+    """
+    feature_view = store.get_feature_view(feature_view_name)
+    end = end or datetime.now(timezone.utc)
+    if start is None and feature_view.ttl and feature_view.ttl.total_seconds():
+        start = end - feature_view.ttl
+    workers = workers or os.cpu_count() or 1
+    join_key = feature_view.entity_columns[0].name
+
+    print(f"🔎 Finding entities of {feature_view_name} with rows in [{start}, {end}]...")
+    keys = active_entity_df(store, feature_view_name, start=start, end=end)[join_key]
+    partitions = key_partitions(keys, workers * PARTITIONS_PER_WORKER)
+    print(f"⚙️  {len(keys):,} entities in {len(partitions)} key ranges, {workers} workers x {connections} connections")
+
+    started = time.perf_counter()
+    results = []
+    # spawn, not fork: the parent's FeatureStore already runs threads whose locks a fork would copy
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(str(store.repo_path),)) as executor:
+        futures = [
+            executor.submit(_materialize_partition, index, feature_view_name, partition_keys, start, end,
+                            batch_rows, connections)
+            for index, partition_keys in enumerate(partitions)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"   ✅ range {result['partition']:>4}: {result['rows']:,} rows in {result['seconds']:.1f}s "
+                  f"(read {result['read_seconds']:.1f}s, {result['rows'] / result['seconds']:,.0f} rows/s)")
+    results.sort(key=lambda result: result['partition'])
+
+    # Recorded like store.materialize(), so materialize_incremental starts from end
+    store.registry.apply_materialization(feature_view, store.project, start, end)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    print(f"✅ Materialized {rows:,} rows of {feature_view_name} in {elapsed:,.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return results
+
+
+def time_chunks(start, end, chunk):
+    """Split [start, end] along a grid of `chunk`-long slots counted from the Unix epoch.
+
+    Only the first and last windows can be shorter than a slot; every other
+    window is a whole slot, the same whatever start and end are.
+    """
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc if start.tzinfo else None)
+    slot_start = epoch + (start - epoch) // chunk * chunk
+    chunks = []
+    while slot_start < end:
+        chunks.append((max(slot_start, start), min(slot_start + chunk, end)))
+        slot_start += chunk
+    return chunks
+
+
+def _epoch_us(value):
+    return int(value.timestamp()) * 1_000_000 + value.microsecond
+
+
+def _checkpoint_engine(store):
+    if not isinstance(store.registry, SqlRegistry):
+        raise ValueError("Backfill checkpoints are kept in the registry database: set registry_type: sql")
+    engine = store.registry.write_engine
+    checkpoints.create(engine, checkfirst=True)
+    return engine
+
+
+def completed_chunks(engine, project, feature_view_name):
+    """(chunk_start, chunk_end) in epoch microseconds of the chunks already materialized."""
+    query = select(checkpoints.c.chunk_start, checkpoints.c.chunk_end).where(
+        checkpoints.c.project_id == project,
+        checkpoints.c.feature_view_name == feature_view_name,
+    )
+    with engine.connect() as conn:
+        return {tuple(row) for row in conn.execute(query)}
+
+
+def _record_chunk(engine, project, feature_view_name, chunk_start, chunk_end, rows):
+    key = dict(project_id=project, feature_view_name=feature_view_name,
+               chunk_start=_epoch_us(chunk_start), chunk_end=_epoch_us(chunk_end))
+    with engine.begin() as conn:
+        conn.execute(delete(checkpoints).where(*(checkpoints.c[name] == value for name, value in key.items())))
+        conn.execute(insert(checkpoints).values(**key, rows=rows, completed_timestamp=int(time.time())))
+
+
+def backfill(store, feature_view_name, start=None, end=None, chunk=timedelta(hours=DEFAULT_CHUNK_HOURS),
+             workers=None, connections=DEFAULT_CONNECTIONS, batch_rows=DEFAULT_BATCH_ROWS):
+    """Materialize [start, end] of a FeatureView chunk by chunk, skipping chunks a previous run completed.
+
+    end defaults to now and start to end - ttl. Chunks follow time_chunks'
+    epoch grid; each completed whole slot is checkpointed in the SQL
+    registry's database as soon as it is written, so a later run over an
+    overlapping window skips it. Partial slots at either end are always
+    redone. The window is recorded in the registry once every chunk is done.
+    Raises RuntimeError after the other chunks finish if any chunk failed.
+    """
+    feature_view = store.get_feature_view(feature_view_name)
+    end = end or datetime.now(timezone.utc)
+    if start is None:
+        if not (feature_view.ttl and feature_view.ttl.total_seconds()):
+            raise ValueError(f"{feature_view_name} has no ttl: pass a start")
+        start = end - feature_view.ttl
+    workers = workers or os.cpu_count() or 1
+    engine = _checkpoint_engine(store)
+
+    chunks = time_chunks(start, end, chunk)
+    done = completed_chunks(engine, store.project, feature_view_name)
+    pending = [(index, window) for index, window in enumerate(chunks)
+               if not (window[1] - window[0] == chunk and (_epoch_us(window[0]), _epoch_us(window[1])) in done)]
+    print(f"⚙️  Backfilling {feature_view_name} over [{start}, {end}]: {len(chunks)} chunks of {chunk}, "
+          f"{len(chunks) - len(pending)} already done, {workers} workers x {connections} connections")
+
+    started = time.perf_counter()
+    results, failed = [], []
+    # spawn, not fork: the parent's FeatureStore already runs threads whose locks a fork would copy
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(str(store.repo_path),)) as executor:
+        futures = {
+            executor.submit(_materialize_partition, index, feature_view_name, None, chunk_start, chunk_end,
+                            batch_rows, connections): (chunk_start, chunk_end)
+            for index, (chunk_start, chunk_end) in pending
+        }
+        for future in as_completed(futures):
+            chunk_start, chunk_end = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append((chunk_start, chunk_end))
+                print(f"   ❌ chunk [{chunk_start}, {chunk_end}]: {e}")
+                continue
+            # Partial slots are redone next time: their window differs from run to run
+            if chunk_end - chunk_start == chunk:
+                _record_chunk(engine, store.project, feature_view_name, chunk_start, chunk_end, result['rows'])
+            results.append(result)
+            print(f"   ✅ chunk [{chunk_start}, {chunk_end}]: {result['rows']:,} rows in {result['seconds']:.1f}s "
+                  f"({len(results)}/{len(pending)})")
+    results.sort(key=lambda result: result['partition'])
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    print(f"✅ Materialized {rows:,} rows of {feature_view_name} in {elapsed:,.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(chunks)} chunks failed; rerun the backfill to retry them")
+
+    # Recorded like store.materialize(), so materialize_incremental starts from end
+    store.registry.apply_materialization(feature_view, store.project, start, end)
+    return results
+
+
+def _parse_time(value):
+    value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repo-path', default='./feature_repo')
+    parser.add_argument('--view', default='california_housing', help='feature view to materialize')
+    parser.add_argument('--start', type=_parse_time, default=None,
+                        help='window start, ISO format, UTC if no offset (default: end - ttl)')
+    parser.add_argument('--end', type=_parse_time, default=None,
+                        help='window end, ISO format, UTC if no offset (default: now)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS,
+                        help='pipelined batches in flight per worker, one Redis connection each')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='rows per Redis pipeline')
+    parser.add_argument('--backfill', action='store_true',
+                        help='materialize in checkpointed time chunks, skipping chunks a previous run completed')
+    parser.add_argument('--chunk-hours', type=float, default=DEFAULT_CHUNK_HOURS, help='backfill chunk length')
+    args = parser.parse_args()
+
+    store = FeatureStore(repo_path=args.repo_path)
+    if args.backfill:
+        results = backfill(
+            store,
+            args.view,
+            start=args.start,
+            end=args.end,
+            chunk=timedelta(hours=args.chunk_hours),
+            workers=args.workers,
+            connections=args.connections,
+            batch_rows=args.batch_rows,
+        )
+    else:
+        results = materialize_parallel(
+            store,
+            args.view,
+            start=args.start,
+            end=args.end,
+            workers=args.workers,
+            connections=args.connections,
+            batch_rows=args.batch_rows,
+        )
@@ -0,0 +1,1041 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for reading and writing Parquet data in MinIO.
+
+The ingestion scripts used to serialize a whole DataFrame into a BytesIO and
+send it with a single put_object call. The helpers here stream Parquet row
+groups straight into an S3 multipart upload instead, so memory stays bounded
+by a few row groups and parts are uploaded in parallel.
+
+Datasets are laid out Hive-style (``<prefix>/date=YYYY-MM-DD/part-*.parquet``)
+so the MinIO offline store in feature_repo/minio_offline_store.py can skip
+partitions outside a query's time range. Every write also commits a small
+``<prefix>/_manifest.json`` listing the dataset's files; readers list files
+from it, so appends cost O(new rows) and a half-finished write is never
+visible.
+
+Ingestion also maintains ``<prefix>/_entity_index`` (a Parquet file): the distinct
+entity keys with their first and last event timestamps, sorted by key, so
+entity DataFrames ("every house active in a window") are built from a small
+file instead of a scan of the data.
+"""
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlparse
+
+import boto3
+import pandas as pd
+from botocore.exceptions import ClientError
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from botocore.client import Config
+
+# MinIO configuration (same defaults the scripts use via port-forward)
+DEFAULT_ENDPOINT_URL = "http://localhost:9001"
+DEFAULT_ACCESS_KEY = "minio"
+DEFAULT_SECRET_KEY = "minio123"
+
+# S3 requires every part except the last one to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+DEFAULT_MAX_WORKERS = 4
+
+# Hive-style partition layout: <prefix>/date=YYYY-MM-DD[/house_bucket=NN]/part-<uuid>.parquet
+DATE_PARTITION = "date"
+ENTITY_BUCKET_PARTITION = "house_bucket"
+PARTITION_DATE_FORMAT = "%Y-%m-%d"
+
+# Dataset manifest committed next to the data files
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_COMMIT_RETRIES = 10
+
+# Entity-key index committed next to the data files (entity key, first_timestamp, last_timestamp).
+# Parquet, but without the extension: Dask (Feast's file offline store) reads every *.parquet file of a directory
+ENTITY_INDEX_NAME = "_entity_index"
+# Name the index had before; moved to ENTITY_INDEX_NAME when read
+LEGACY_ENTITY_INDEX_NAME = "_entity_index.parquet"
+
+# Object metadata key holding the hash of the logical file content
+CONTENT_HASH_METADATA = "content-sha256"
+
+# Event and created timestamps are always written tz-aware
+TIMESTAMP_TYPE = pa.timestamp('us', tz='UTC')
+
+# Bytes fetched from the end of a Parquet file to read its footer in one request
+FOOTER_READ_SIZE = 64 * 1024
+PARQUET_MAGIC = b'PAR1'
+
+
+def get_s3_client(max_pool_connections=None):
+    """Create a boto3 S3 client for MinIO.
+
+    Endpoint and credentials come from FEAST_S3_ENDPOINT_URL, AWS_ACCESS_KEY_ID
+    and AWS_SECRET_ACCESS_KEY, falling back to the local port-forward defaults.
+    """
+    return boto3.client(
+        's3',
+        endpoint_url=os.environ.get("FEAST_S3_ENDPOINT_URL", DEFAULT_ENDPOINT_URL),
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", DEFAULT_ACCESS_KEY),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", DEFAULT_SECRET_KEY),
+        config=Config(
+            signature_version='s3v4',
+            max_pool_connections=max_pool_connections or DEFAULT_MAX_WORKERS * 2,
+        ),
+        region_name='us-east-1'
+    )
+
+
+def get_arrow_filesystem():
+    """Create a pyarrow S3FileSystem for MinIO (ranged reads for ParquetFile)."""
+    endpoint = urlparse(os.environ.get("FEAST_S3_ENDPOINT_URL", DEFAULT_ENDPOINT_URL))
+    return pafs.S3FileSystem(
+        access_key=os.environ.get("AWS_ACCESS_KEY_ID", DEFAULT_ACCESS_KEY),
+        secret_key=os.environ.get("AWS_SECRET_ACCESS_KEY", DEFAULT_SECRET_KEY),
+        endpoint_override=endpoint.netloc,
+        scheme=endpoint.scheme or 'http',
+        region='us-east-1',
+    )
+
+
+class MultipartUploadWriter:
+    """Write-only file object that streams its bytes into an S3 multipart upload.
+
+    Bytes are buffered until a part is full, then handed to a thread pool that
+    uploads parts concurrently. At most ``max_workers`` parts are in flight, so
+    memory is bounded by roughly ``(max_workers + 1) * part_size``. Objects
+    smaller than one part are sent with a single put_object on close.
+    """
+
+    def __init__(self, s3_client, bucket, key, part_size=DEFAULT_PART_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, content_type='application/octet-stream',
+                 metadata=None):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes, got {part_size}")
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.content_type = content_type
+        self.metadata = metadata or {}
+        self.closed = False
+        self.result = None
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._futures = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    # File-object protocol used by pyarrow.parquet.ParquetWriter
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def readable(self):
+        return False
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("I/O operation on closed MultipartUploadWriter")
+        data = memoryview(data).cast('B')
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit_part(part)
+        return len(data)
+
+    def _submit_part(self, body):
+        if self._upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type,
+                Metadata=self.metadata,
+            )
+            self._upload_id = response['UploadId']
+        part_number = len(self._futures) + 1
+        # Block until a worker slot frees up so buffered parts stay bounded
+        self._slots.acquire()
+        future = self._executor.submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _upload_part(self, part_number, body):
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._upload_id is None:
+                # Small object: a single request is cheaper than a multipart upload
+                response = self.s3_client.put_object(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    Body=bytes(self._buffer),
+                    ContentType=self.content_type,
+                    Metadata=self.metadata,
+                )
+                parts = 0
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                completed = [future.result() for future in self._futures]
+                response = self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={'Parts': completed},
+                )
+                parts = len(completed)
+            self._buffer = bytearray()
+            self.result = {
+                'bucket': self.bucket,
+                'key': self.key,
+                'size': self._position,
+                'parts': parts,
+                'etag': response['ETag'],
+            }
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self):
+        """Abort the multipart upload so no partial object or orphaned parts remain."""
+        self.closed = True
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_dataframe_batches(df, schema=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """Yield Arrow record batches of at most row_group_size rows from a DataFrame."""
+    for start in range(0, len(df), row_group_size):
+        chunk = df.iloc[start:start + row_group_size]
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        yield from table.to_batches()
+
+
+def upload_batches(batches, schema, bucket, key, s3_client=None,
+                   row_group_size=DEFAULT_ROW_GROUP_SIZE, part_size=DEFAULT_PART_SIZE,
+                   max_workers=DEFAULT_MAX_WORKERS, metadata=None):
+    """Stream an iterable of Arrow record batches to s3://bucket/key as Parquet.
+
+    Each batch is written as it arrives, so only the current row group and the
+    parts in flight are held in memory. Returns a dict with the object key,
+    total size in bytes, number of parts, ETag and row count.
+    """
+    s3_client = s3_client or get_s3_client(max_pool_connections=max_workers * 2)
+    rows = 0
+    with MultipartUploadWriter(s3_client, bucket, key, part_size=part_size,
+                               max_workers=max_workers, metadata=metadata) as sink:
+        with pq.ParquetWriter(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=row_group_size)
+                rows += batch.num_rows
+    result = dict(sink.result)
+    result['rows'] = rows
+    return result
+
+
+class ContentHasher:
+    """Incremental SHA-256 of a DataFrame's column names, dtypes and values.
+
+    Feeding a frame in row batches gives the same digest as hashing it whole,
+    so streaming writers can record the same hash as upload_dataframe.
+    """
+
+    def __init__(self):
+        self._digest = None
+
+    def update(self, df):
+        if self._digest is None:
+            self._digest = hashlib.sha256()
+            self._digest.update(
+                json.dumps([[str(name), str(dtype)] for name, dtype in df.dtypes.items()]).encode()
+            )
+        self._digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+
+    def hexdigest(self):
+        return self._digest.hexdigest() if self._digest else None
+
+
+def dataframe_content_hash(df):
+    """SHA-256 of a DataFrame's column names, dtypes and values (not its Parquet bytes)."""
+    hasher = ContentHasher()
+    hasher.update(df)
+    return hasher.hexdigest()
+
+
+def head_object(s3_client, bucket, key):
+    """Return the head_object response for a key, or None if it does not exist."""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404', 'NotFound'):
+            return None
+        raise
+
+
+def read_parquet_metadata(s3_client, bucket, key, read_size=FOOTER_READ_SIZE):
+    """Read a Parquet file's footer with ranged GETs, without touching its data pages.
+
+    One suffix-range request usually covers the whole footer; a second one
+    fetches the rest when it is larger than read_size. Returns the pyarrow
+    FileMetaData, the object size and the number of bytes fetched.
+    """
+    response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{read_size}")
+    tail = response['Body'].read()
+    size = int(response['ContentRange'].rsplit('/', 1)[-1]) if 'ContentRange' in response else len(tail)
+    if len(tail) < 12 or tail[-4:] != PARQUET_MAGIC:
+        raise ValueError(f"s3://{bucket}/{key} is not a Parquet file")
+    footer_size = int.from_bytes(tail[-8:-4], 'little') + 8
+    fetched = len(tail)
+    if footer_size > len(tail):
+        start = size - footer_size
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{size - len(tail) - 1}")
+        head = response['Body'].read()
+        fetched += len(head)
+        tail = head + tail
+    # The metadata parser only needs the footer, preceded by the leading magic bytes
+    metadata = pq.read_metadata(BytesIO(PARQUET_MAGIC + tail[-footer_size:]))
+    return metadata, size, fetched
+
+
+def column_statistics(*metadata):
+    """Aggregate row-group statistics per column over one or more files' footers.
+
+    Returns {column: {min, max, null_count, compressed_size, uncompressed_size}}.
+    min/max (or null_count) are None when any row group lacks them, since
+    the overall value is then unknown.
+    """
+    stats = {}
+    for file_metadata in metadata:
+        for row_group in range(file_metadata.num_row_groups):
+            group = file_metadata.row_group(row_group)
+            for index in range(group.num_columns):
+                chunk = group.column(index)
+                column = stats.setdefault(chunk.path_in_schema, {
+                    'min': None,
+                    'max': None,
+                    'has_min_max': True,
+                    'null_count': 0,
+                    'compressed_size': 0,
+                    'uncompressed_size': 0,
+                })
+                column['compressed_size'] += chunk.total_compressed_size
+                column['uncompressed_size'] += chunk.total_uncompressed_size
+                statistics = chunk.statistics
+                if statistics is None or not statistics.has_null_count:
+                    column['null_count'] = None
+                elif column['null_count'] is not None:
+                    column['null_count'] += statistics.null_count
+                if statistics is None or not statistics.has_min_max:
+                    column['has_min_max'] = False
+                elif column['has_min_max']:
+                    column['min'] = statistics.min if column['min'] is None else min(column['min'], statistics.min)
+                    column['max'] = statistics.max if column['max'] is None else max(column['max'], statistics.max)
+    for column in stats.values():
+        if not column.pop('has_min_max'):
+            column['min'] = column['max'] = None
+    return stats
+
+
+def upload_dataframe(df, bucket, key, s3_client=None, schema=None,
+                     row_group_size=DEFAULT_ROW_GROUP_SIZE, part_size=DEFAULT_PART_SIZE,
+                     max_workers=DEFAULT_MAX_WORKERS, skip_unchanged=False, content_hash=None):
+    """Upload a DataFrame to s3://bucket/key as Parquet through a multipart upload.
+
+    The content hash is stored as object metadata. With skip_unchanged=True an
+    object whose stored hash already matches is left as is (one HEAD request)
+    and the result is marked ``skipped``.
+    """
+    s3_client = s3_client or get_s3_client(max_pool_connections=max_workers * 2)
+    content_hash = content_hash or dataframe_content_hash(df)
+    if skip_unchanged:
+        existing = head_object(s3_client, bucket, key)
+        if existing and existing.get('Metadata', {}).get(CONTENT_HASH_METADATA) == content_hash:
+            return {
+                'bucket': bucket,
+                'key': key,
+                'size': existing['ContentLength'],
+                'parts': 0,
+                'etag': existing['ETag'],
+                'rows': len(df),
+                'content_sha256': content_hash,
+                'skipped': True,
+            }
+
+    if schema is None:
+        schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    result = upload_batches(
+        iter_dataframe_batches(df, schema=schema, row_group_size=row_group_size),
+        schema,
+        bucket,
+        key,
+        s3_client=s3_client,
+        row_group_size=row_group_size,
+        part_size=part_size,
+        max_workers=max_workers,
+        metadata={CONTENT_HASH_METADATA: content_hash},
+    )
+    result['content_sha256'] = content_hash
+    result['skipped'] = False
+    return result
+
+
+def list_parquet_objects(s3_client, bucket, prefix):
+    """List the data file objects (Key, ETag, Size, ...) under a prefix, skipping _/. sidecar files."""
+    objects = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    prefix = prefix.rstrip('/') + '/' if prefix.strip('/') else ''
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            name = obj['Key'].rsplit('/', 1)[-1]
+            if name.endswith('.parquet') and not name.startswith(('_', '.')):
+                objects.append(obj)
+    return objects
+
+
+def list_parquet_keys(s3_client, bucket, prefix):
+    """List the data file keys under a prefix, skipping _/. sidecar files."""
+    return [obj['Key'] for obj in list_parquet_objects(s3_client, bucket, prefix)]
+
+
+def manifest_key(prefix):
+    return f"{prefix.rstrip('/')}/{MANIFEST_NAME}"
+
+
+def read_manifest(s3_client, bucket, prefix):
+    """Return (manifest, etag) for a dataset, or (None, None) if it has no manifest."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=manifest_key(prefix))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    return json.loads(response['Body'].read()), response['ETag']
+
+
+def commit_manifest(s3_client, bucket, prefix, added=(), removed=(), replace=False):
+    """Atomically add (and remove) file entries in the dataset manifest.
+
+    Uses a conditional put on the manifest's ETag, retrying on conflict, so
+    concurrent appends never lose each other's files. With replace=True the
+    manifest lists exactly the added files afterwards.
+    """
+    for _ in range(MANIFEST_COMMIT_RETRIES):
+        manifest, etag = read_manifest(s3_client, bucket, prefix)
+        files = {} if replace or manifest is None else {f['key']: f for f in manifest['files']}
+        for key in removed:
+            files.pop(key, None)
+        for entry in added:
+            files[entry['key']] = entry
+        new_manifest = {
+            'version': (manifest['version'] + 1) if manifest else 1,
+            'updated_at': pd.Timestamp.now(tz='UTC').isoformat(),
+            'files': sorted(files.values(), key=lambda f: f['key']),
+        }
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        try:
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=manifest_key(prefix),
+                Body=json.dumps(new_manifest, indent=1).encode(),
+                ContentType='application/json',
+                **condition,
+            )
+            return new_manifest
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+    raise RuntimeError(f"Could not commit {manifest_key(prefix)} after {MANIFEST_COMMIT_RETRIES} attempts")
+
+
+def manifest_entry(upload, timestamps=None):
+    """Build a manifest file entry from an upload result and the file's event timestamps."""
+    entry = {key: upload[key] for key in ('key', 'size', 'etag', 'rows', 'content_sha256') if key in upload}
+    if timestamps is not None and len(timestamps):
+        timestamps = pd.to_datetime(timestamps, utc=True)
+        entry['min_timestamp'] = timestamps.min().isoformat()
+        entry['max_timestamp'] = timestamps.max().isoformat()
+    return entry
+
+
+def dataset_version(s3_client, bucket, prefix):
+    """A string that changes whenever the data under a prefix (or a single .parquet key) changes.
+
+    That is the manifest's ETag for datasets with a manifest (every commit
+    rewrites it), and a hash of the data files' keys and ETags otherwise.
+    """
+    if prefix.endswith('.parquet'):
+        head = head_object(s3_client, bucket, prefix)
+        return head['ETag'] if head else None
+    _, etag = read_manifest(s3_client, bucket, prefix)
+    if etag:
+        return etag
+    objects = sorted((obj['Key'], obj['ETag']) for obj in list_parquet_objects(s3_client, bucket, prefix))
+    return hashlib.sha256(json.dumps(objects).encode()).hexdigest()
+
+
+def list_dataset_keys(s3_client, bucket, prefix):
+    """List a dataset's data files from its manifest, or by listing the prefix if it has none."""
+    manifest, _ = read_manifest(s3_client, bucket, prefix)
+    if manifest is not None:
+        return [entry['key'] for entry in manifest['files']]
+    return list_parquet_keys(s3_client, bucket, prefix)
+
+
+def read_dataset(s3_client, bucket, prefix):
+    """Read every data file of a dataset into one DataFrame."""
+    frames = [
+        pd.read_parquet(BytesIO(s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()))
+        for key in list_dataset_keys(s3_client, bucket, prefix)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def delete_keys(s3_client, bucket, keys):
+    """Delete keys in batches of 1000 (the delete_objects limit)."""
+    keys = list(keys)
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=bucket,
+            Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True},
+        )
+
+
+def entity_index_key(prefix):
+    return f"{prefix.rstrip('/')}/{ENTITY_INDEX_NAME}"
+
+
+def entity_index(table, entity_column, timestamp_column='event_timestamp'):
+    """Distinct entity keys of a table or DataFrame with their first and last event timestamps.
+
+    The result has the columns entity_column, first_timestamp and
+    last_timestamp and is sorted by key; tz-naive timestamps are read as UTC.
+    """
+    if isinstance(table, pd.DataFrame):
+        table = pa.Table.from_pandas(table[[entity_column, timestamp_column]], preserve_index=False)
+    keys = table[entity_column]
+    timestamps = table[timestamp_column].cast(TIMESTAMP_TYPE, safe=False)
+    valid = pc.is_valid(keys)
+    index = pa.table({entity_column: keys.filter(valid), 'first_timestamp': timestamps.filter(valid),
+                      'last_timestamp': timestamps.filter(valid)})
+    return _reduce_entity_index(index)
+
+
+def merge_entity_index(*indexes):
+    """Merge entity indexes: per key, the earliest first and the latest last timestamp."""
+    indexes = [index for index in indexes if index is not None]
+    if len(indexes) == 1:
+        return indexes[0]
+    return _reduce_entity_index(pa.concat_tables(indexes, promote_options='permissive'))
+
+
+def _reduce_entity_index(index):
+    entity_column = index.column_names[0]
+    grouped = index.group_by(entity_column, use_threads=False).aggregate(
+        [('first_timestamp', 'min'), ('last_timestamp', 'max')]
+    )
+    return pa.table({
+        entity_column: grouped[entity_column],
+        'first_timestamp': grouped['first_timestamp_min'],
+        'last_timestamp': grouped['last_timestamp_max'],
+    }).sort_by(entity_column)
+
+
+def read_entity_index(s3_client, bucket, prefix):
+    """Return (index, etag) for a dataset, or (None, None) if it has no entity index.
+
+    An index still stored under LEGACY_ENTITY_INDEX_NAME is moved to
+    ENTITY_INDEX_NAME first.
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=entity_index_key(prefix))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+        if not _migrate_legacy_entity_index(s3_client, bucket, prefix):
+            return None, None
+        response = s3_client.get_object(Bucket=bucket, Key=entity_index_key(prefix))
+    return pq.read_table(BytesIO(response['Body'].read())), response['ETag']
+
+
+def _migrate_legacy_entity_index(s3_client, bucket, prefix):
+    """Move <prefix>/_entity_index.parquet to <prefix>/_entity_index; False if there is none.
+
+    Dask reads every *.parquet file of a directory, so the old name broke
+    Feast's file offline store. The copy is a conditional put: if another
+    writer already created the new index, that one is kept.
+    """
+    legacy_key = f"{prefix.rstrip('/')}/{LEGACY_ENTITY_INDEX_NAME}"
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=legacy_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return False
+        raise
+    try:
+        s3_client.put_object(Bucket=bucket, Key=entity_index_key(prefix), Body=response['Body'].read(),
+                             IfNoneMatch='*')
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+            raise
+    s3_client.delete_object(Bucket=bucket, Key=legacy_key)
+    return True
+
+
+def commit_entity_index(s3_client, bucket, prefix, index, replace=False):
+    """Merge index into the dataset's entity index (or replace it) with a conditional put.
+
+    Like commit_manifest it retries on conflict, so concurrent appends never
+    lose each other's keys. Returns the committed index.
+    """
+    for _ in range(MANIFEST_COMMIT_RETRIES):
+        current, etag = read_entity_index(s3_client, bucket, prefix)
+        new_index = index
+        if current is not None and not replace:
+            if current.column_names[0] != index.column_names[0]:
+                raise ValueError(f"{entity_index_key(prefix)} indexes {current.column_names[0]!r}, "
+                                 f"not {index.column_names[0]!r}")
+            new_index = merge_entity_index(current, index)
+        buffer = BytesIO()
+        pq.write_table(new_index, buffer, sorting_columns=[pq.SortingColumn(0)])
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        try:
+            s3_client.put_object(Bucket=bucket, Key=entity_index_key(prefix), Body=buffer.getvalue(),
+                                 **condition)
+            return new_index
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+    raise RuntimeError(f"Could not commit {entity_index_key(prefix)} after {MANIFEST_COMMIT_RETRIES} attempts")
+
+
+def build_entity_index(bucket, prefix, entity_column, timestamp_column='event_timestamp',
+                       s3_client=None, filesystem=None):
+    """(Re)build a dataset's entity index from its data files and commit it.
+
+    Only the two indexed columns are read, batch by batch, so memory is
+    bounded by the number of distinct keys. Returns the index.
+    """
+    s3_client = s3_client or get_s3_client()
+    filesystem = filesystem or get_arrow_filesystem()
+    index = None
+    for key in list_dataset_keys(s3_client, bucket, prefix):
+        with filesystem.open_input_file(f"{bucket}/{key}") as source:
+            parquet_file = pq.ParquetFile(source)
+            file_indexes = [
+                entity_index(pa.Table.from_batches([batch]), entity_column, timestamp_column)
+                for batch in parquet_file.iter_batches(columns=[entity_column, timestamp_column])
+            ]
+            if not file_indexes:
+                file_indexes = [entity_index(parquet_file.schema_arrow.empty_table(), entity_column,
+                                             timestamp_column)]
+        index = merge_entity_index(index, *file_indexes)
+    if index is None:
+        raise ValueError(f"No data files under s3://{bucket}/{prefix.rstrip('/')}/ to index")
+    return commit_entity_index(s3_client, bucket, prefix, index, replace=True)
+
+
+def entities_active_between(index, start=None, end=None):
+    """Rows of an entity index whose [first_timestamp, last_timestamp] overlaps [start, end]."""
+    mask = pa.array([True] * index.num_rows, pa.bool_())
+    if start is not None:
+        mask = pc.and_(mask, pc.greater_equal(index['last_timestamp'], _utc_scalar(start)))
+    if end is not None:
+        mask = pc.and_(mask, pc.less_equal(index['first_timestamp'], _utc_scalar(end)))
+    return index.filter(mask)
+
+
+def _utc_scalar(value):
+    """A timestamp scalar comparable with TIMESTAMP_TYPE columns (tz-naive means UTC)."""
+    value = pd.Timestamp(value)
+    value = value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+    return pa.scalar(value, TIMESTAMP_TYPE)
+
+
+def load_feature_view(view_name, repo_path="./feature_repo"):
+    """Return a FeatureView from the registry, or from the repo definitions if not applied yet."""
+    from pathlib import Path
+    from feast import FeatureStore
+    from feast.errors import FeatureViewNotFoundException
+    from feast.repo_operations import parse_repo
+
+    try:
+        return FeatureStore(repo_path=repo_path).get_feature_view(view_name)
+    except FeatureViewNotFoundException:
+        for feature_view in parse_repo(Path(repo_path).resolve()).feature_views:
+            if feature_view.name == view_name:
+                return feature_view
+        raise
+
+
+def feature_view_schema(feature_view):
+    """Arrow schema of a FeatureView's batch source columns.
+
+    Entity and feature columns get the Arrow type of their declared Feast
+    dtype (Float32 -> float32, ...), the timestamp columns get
+    ``timestamp[us, UTC]``. Column names follow the source's field_mapping.
+    """
+    from feast.type_map import feast_value_type_to_pa
+
+    source = feature_view.batch_source
+    source_names = {feature: column for column, feature in (source.field_mapping or {}).items()}
+    fields = [
+        pa.field(source_names.get(field.name, field.name), feast_value_type_to_pa(field.dtype.to_value_type()))
+        for field in feature_view.entity_columns + feature_view.features
+    ]
+    for column in (source.timestamp_field, source.created_timestamp_column):
+        if column:
+            fields.append(pa.field(column, TIMESTAMP_TYPE))
+    return pa.schema(fields)
+
+
+def coerce_to_schema(df, target_schema):
+    """Cast the DataFrame columns named in target_schema to its types.
+
+    Floats are downcast, integers cast exactly, and timestamps converted to
+    UTC (tz-naive values are taken as UTC). Columns not in the schema are
+    kept as they are. Returns the coerced DataFrame and the Arrow schema to
+    write it with, in the DataFrame's column order.
+    """
+    df = df.copy()
+    fields = []
+    for column in df.columns:
+        if column not in target_schema.names:
+            fields.append(pa.Schema.from_pandas(df[[column]].iloc[:0], preserve_index=False).field(column))
+            continue
+        field = target_schema.field(column)
+        if pa.types.is_timestamp(field.type):
+            df[column] = pd.to_datetime(df[column], utc=True).astype(f"datetime64[{field.type.unit}, UTC]")
+        else:
+            df[column] = df[column].astype(field.type.to_pandas_dtype())
+        fields.append(field)
+    return df, pa.schema(fields)
+
+
+def partition_dates(timestamps):
+    """Return the UTC partition date string for each timestamp (tz-naive means UTC)."""
+    timestamps = pd.to_datetime(timestamps, utc=True)
+    return timestamps.dt.strftime(PARTITION_DATE_FORMAT)
+
+
+def partition_key(prefix, date, entity_bucket=None):
+    """Build a new data file key inside the date (and optional entity bucket) partition."""
+    parts = [prefix.rstrip('/'), f"{DATE_PARTITION}={date}"]
+    if entity_bucket is not None:
+        parts.append(f"{ENTITY_BUCKET_PARTITION}={int(entity_bucket):02d}")
+    parts.append(f"part-{uuid.uuid4().hex}.parquet")
+    return '/'.join(parts)
+
+
+def upload_partitioned(df, bucket, prefix, timestamp_column='event_timestamp',
+                       entity_column=None, num_entity_buckets=None, s3_client=None,
+                       schema=None, overwrite=True, skip_unchanged=True, index_column=None,
+                       **upload_kwargs):
+    """Upload a DataFrame as a Hive-partitioned Parquet dataset under s3://bucket/prefix.
+
+    Rows are split by the UTC date of timestamp_column and, if num_entity_buckets
+    is set, by ``entity_column % num_entity_buckets``. Partition values live only
+    in the object path, so every file keeps the original column set.
+
+    The new files become visible in one manifest commit once they are all
+    uploaded. With overwrite=True the manifest is replaced and objects from the
+    previous version are deleted afterwards; with overwrite=False the rows are
+    appended as delta files and existing objects are left untouched.
+
+    When overwriting with skip_unchanged=True, a partition whose content hash
+    matches the file already listed in the manifest for that partition is not
+    re-encoded or re-uploaded, as long as a HEAD shows the object still has the
+    recorded ETag. Re-running an unchanged ingestion then costs only HEADs.
+
+    With index_column set, the dataset's entity index is committed right after
+    the manifest: replaced when overwriting, merged with the new keys when
+    appending.
+
+    Returns the list of per-file upload results.
+    """
+    s3_client = s3_client or get_s3_client()
+    prefix = prefix.rstrip('/')
+    if schema is None:
+        schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+
+    group_keys = [partition_dates(df[timestamp_column]).rename(DATE_PARTITION)]
+    if num_entity_buckets:
+        group_keys.append((df[entity_column] % num_entity_buckets).rename(ENTITY_BUCKET_PARTITION))
+
+    previous_keys = set(list_parquet_keys(s3_client, bucket, prefix)) if overwrite else set()
+    previous_entries = _entries_by_partition(s3_client, bucket, prefix) if overwrite and skip_unchanged else {}
+    results = []
+    entries = []
+    for values, group in df.groupby(group_keys, sort=True):
+        values = values if isinstance(values, tuple) else (values,)
+        key = partition_key(prefix, *values)
+        content_hash = dataframe_content_hash(group)
+        result = _reuse_unchanged(s3_client, bucket, previous_entries.get(key.rsplit('/', 1)[0], []),
+                                  content_hash)
+        if result is None:
+            result = upload_dataframe(group, bucket, key, s3_client=s3_client, schema=schema,
+                                      content_hash=content_hash, **upload_kwargs)
+        results.append(result)
+        entries.append(manifest_entry(result, group[timestamp_column]))
+
+    commit_manifest(s3_client, bucket, prefix, added=entries, replace=overwrite)
+    if index_column:
+        commit_entity_index(s3_client, bucket, prefix, entity_index(df, index_column, timestamp_column),
+                            replace=overwrite)
+    delete_keys(s3_client, bucket, previous_keys - {result['key'] for result in results})
+    return results
+
+
+def _entries_by_partition(s3_client, bucket, prefix):
+    """Group the current manifest entries by partition directory."""
+    manifest, _ = read_manifest(s3_client, bucket, prefix)
+    entries = {}
+    for entry in (manifest or {}).get('files', []):
+        entries.setdefault(entry['key'].rsplit('/', 1)[0], []).append(entry)
+    return entries
+
+
+def _reuse_unchanged(s3_client, bucket, partition_entries, content_hash):
+    """Return an upload result for the partition's existing file if its content is unchanged."""
+    # Partitions holding several files (e.g. after appends) are rewritten as one
+    if len(partition_entries) != 1 or partition_entries[0].get('content_sha256') != content_hash:
+        return None
+    entry = partition_entries[0]
+    existing = head_object(s3_client, bucket, entry['key'])
+    if existing is None or existing['ETag'] != entry['etag']:
+        return None
+    return dict(entry, bucket=bucket, parts=0, skipped=True)
+
+
+class PartitionedDatasetWriter:
+    """Stream Arrow tables into a date-partitioned dataset, one open file per partition.
+
+    Rows are routed to ``date=YYYY-MM-DD`` partitions by timestamp_column and
+    appended to a multipart upload per partition, so memory is bounded by the
+    parts in flight, not by the dataset. close() returns the manifest entries
+    of the written files; committing them is left to the caller.
+    """
+
+    def __init__(self, s3_client, bucket, prefix, schema, timestamp_column='event_timestamp',
+                 row_group_size=DEFAULT_ROW_GROUP_SIZE, part_size=DEFAULT_PART_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/')
+        self.schema = schema
+        self.timestamp_column = timestamp_column
+        self.row_group_size = row_group_size
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self._partitions = {}
+
+    def write_table(self, table):
+        table = table.cast(self.schema)
+        dates = pc.strftime(table[self.timestamp_column], format=PARTITION_DATE_FORMAT)
+        for date in pc.unique(dates).to_pylist():
+            self._write_partition(date, table.filter(pc.equal(dates, date)))
+
+    def _write_partition(self, date, table):
+        state = self._partitions.get(date)
+        if state is None:
+            key = partition_key(self.prefix, date)
+            sink = MultipartUploadWriter(self.s3_client, self.bucket, key, part_size=self.part_size,
+                                         max_workers=self.max_workers)
+            state = self._partitions[date] = {
+                'key': key,
+                'sink': sink,
+                'writer': pq.ParquetWriter(sink, self.schema),
+                'hasher': ContentHasher(),
+                'rows': 0,
+                'timestamps': [],
+            }
+        state['writer'].write_table(table, row_group_size=self.row_group_size)
+        state['hasher'].update(table.to_pandas())
+        state['rows'] += table.num_rows
+        bounds = pc.min_max(table[self.timestamp_column])
+        state['timestamps'].extend([bounds['min'].as_py(), bounds['max'].as_py()])
+
+    def close(self):
+        entries = []
+        for state in self._partitions.values():
+            state['writer'].close()
+            state['sink'].close()
+            upload = dict(state['sink'].result, rows=state['rows'],
+                          content_sha256=state['hasher'].hexdigest())
+            entries.append(manifest_entry(upload, state['timestamps']))
+        return entries
+
+    def abort(self):
+        for state in self._partitions.values():
+            state['sink'].abort()
+
+
+def rewrite_dataset(bucket, prefix, transforms, s3_client=None, filesystem=None,
+                    read_columns=(), target_schema=None, timestamp_column='event_timestamp',
+                    **writer_kwargs):
+    """Rewrite selected columns of a dataset without loading it into memory.
+
+    Every file is read row group by row group through ranged GETs. Columns in
+    ``transforms`` are not downloaded unless listed in read_columns; each
+    transform is called as ``transform(table, row_offset)`` with the row group's
+    other columns and the row's position in the dataset, and returns the new
+    column. Columns named in target_schema are cast to its types. Rows are
+    written to their (possibly new) date partitions through multipart uploads,
+    the manifest is replaced in one commit, and the old files are deleted. An
+    existing entity index is rebuilt from the rewritten rows.
+
+    pyarrow has no API for copying encoded column chunks, so the untouched
+    columns are decoded and re-encoded; memory stays bounded per row group.
+
+    Returns the manifest entries of the rewritten dataset.
+    """
+    s3_client = s3_client or get_s3_client()
+    filesystem = filesystem or get_arrow_filesystem()
+    previous_keys = set(list_parquet_keys(s3_client, bucket, prefix))
+    previous_index, _ = read_entity_index(s3_client, bucket, prefix)
+    index_column = previous_index.column_names[0] if previous_index is not None else None
+
+    writer = None
+    index = None
+    offset = 0
+    try:
+        for key in list_dataset_keys(s3_client, bucket, prefix):
+            with filesystem.open_input_file(f"{bucket}/{key}") as source:
+                parquet_file = pq.ParquetFile(source)
+                schema = parquet_file.schema_arrow.remove_metadata()
+                columns_to_read = [
+                    name for name in schema.names
+                    if name not in transforms or name in read_columns
+                ]
+                output_names = schema.names + [name for name in transforms if name not in schema.names]
+                for row_group in range(parquet_file.num_row_groups):
+                    table = parquet_file.read_row_group(row_group, columns=columns_to_read)
+                    columns = {name: table[name] for name in columns_to_read}
+                    for name, transform in transforms.items():
+                        columns[name] = transform(table, offset)
+                    output = pa.table([columns[name] for name in output_names], names=output_names)
+                    if writer is None:
+                        writer = PartitionedDatasetWriter(
+                            s3_client, bucket, prefix, _merge_schema(output.schema, target_schema),
+                            timestamp_column=timestamp_column, **writer_kwargs
+                        )
+                    writer.write_table(output)
+                    if index_column:
+                        index = merge_entity_index(index, entity_index(output, index_column, timestamp_column))
+                    offset += table.num_rows
+        entries = writer.close() if writer else []
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+
+    commit_manifest(s3_client, bucket, prefix, added=entries, replace=True)
+    if index is not None:
+        commit_entity_index(s3_client, bucket, prefix, index, replace=True)
+    delete_keys(s3_client, bucket, previous_keys - {entry['key'] for entry in entries})
+    return entries
+
+
+def _merge_schema(schema, target_schema):
+    """Replace the types in schema with target_schema's for the columns it names."""
+    if target_schema is None:
+        return schema
+    return pa.schema([
+        target_schema.field(field.name) if field.name in target_schema.names else field
+        for field in schema
+    ])
+
+
+def transform_object(bucket, key, transform, s3_client=None, filesystem=None,
+                     timestamp_column='event_timestamp', row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                     part_size=DEFAULT_PART_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+    """Rewrite one Parquet object in place with ``transform(table) -> table``.
+
+    The object is read row group by row group through ranged GETs and the
+    transformed rows are streamed into a multipart upload of the same key,
+    which only replaces the object once every row group is written. The
+    transform must keep rows in their date partition; use rewrite_dataset
+    when rows move. Returns the object's new manifest entry.
+    """
+    s3_client = s3_client or get_s3_client()
+    filesystem = filesystem or get_arrow_filesystem()
+    hasher = ContentHasher()
+    rows = 0
+    timestamps = []
+    match = re.search(rf"(?:^|/){DATE_PARTITION}=([^/]+)/", key)
+    partition_date = match.group(1) if match else None
+
+    with filesystem.open_input_file(f"{bucket}/{key}") as source:
+        parquet_file = pq.ParquetFile(source)
+        if parquet_file.num_row_groups:
+            tables = (transform(parquet_file.read_row_group(i)) for i in range(parquet_file.num_row_groups))
+        else:
+            tables = iter([transform(parquet_file.schema_arrow.empty_table())])
+        first = next(tables)
+
+        with MultipartUploadWriter(s3_client, bucket, key, part_size=part_size,
+                                   max_workers=max_workers) as sink:
+            with pq.ParquetWriter(sink, first.schema) as writer:
+                for table in itertools.chain([first], tables):
+                    writer.write_table(table, row_group_size=row_group_size)
+                    hasher.update(table.to_pandas())
+                    rows += table.num_rows
+                    if timestamp_column in table.column_names and table.num_rows:
+                        bounds = [value.as_py() for value in pc.min_max(table[timestamp_column]).values()]
+                        timestamps.extend(bounds)
+                        # Raising here aborts the upload, leaving the original object in place
+                        if partition_date and set(partition_dates(pd.Series(bounds))) != {partition_date}:
+                            raise ValueError(
+                                f"{key}: transform moved rows out of {DATE_PARTITION}={partition_date}; "
+                                "use rewrite_dataset to repartition"
+                            )
+
+    upload = dict(sink.result, rows=rows, content_sha256=hasher.hexdigest())
+    return manifest_entry(upload, timestamps)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Streaming, out-of-core statistical profile of a Parquet dataset in MinIO.
+
+Every column is summarized in one pass over row groups with mergeable
+sketches: running moments (count/mean/variance/min/max), a KLL sketch for
+quantiles and HyperLogLog for distinct counts. Row groups are profiled in a
+process pool and the per-task summaries are merged, so memory is bounded by
+one row group per worker and the sketches' fixed size, not by the dataset.
+
+The sketches are small NumPy implementations so the profiler needs no
+dependency beyond what the repo already installs:
+
+* KLLSketch (Karnin, Lang, Liberty 2016): rank error about 1.7 / k
+  (under 1% with the default k=200), a few thousand items per column.
+* HyperLogLog with 2**14 registers: about 0.8% relative error, 16 KiB per
+  column.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from minio_io import get_arrow_filesystem, get_s3_client, list_dataset_keys, read_parquet_metadata
+
+DEFAULT_KLL_K = 200
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_ROW_GROUPS_PER_TASK = 4
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class Moments:
+    """Count, mean, sum of squared deviations, min and max, merged with Chan's formula."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        if not len(values):
+            return
+        other = Moments()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        """Sample standard deviation, like pandas describe()."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class KLLSketch:
+    """Mergeable quantile sketch: level h holds items of weight 2**h.
+
+    When a level outgrows its capacity it is sorted and every other item
+    (from a random offset) is promoted to the level above.
+    """
+
+    def __init__(self, k=DEFAULT_KLL_K):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng()
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                promoted = items[odd:][self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, fractions):
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return [math.nan for _ in fractions]
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = np.asarray(fractions) * cumulative[-1]
+        return values[np.minimum(np.searchsorted(cumulative, ranks), len(values) - 1)].tolist()
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit pandas hashes; merging takes register maxima."""
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.precision)) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting over the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+def _leading_zeros(values):
+    """Vectorized count of leading zero bits in uint64 values (64 for zero)."""
+    values = values.copy()
+    count = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = values < (np.uint64(1) << np.uint64(64 - shift))
+        count += small * shift
+        values[small] <<= np.uint64(shift)
+    return count + (values == 0)
+
+
+class ColumnProfile:
+    """Mergeable summary of one column: nulls, moments, quantiles and distinct count."""
+
+    def __init__(self, data_type):
+        self.data_type = data_type
+        self.numeric = pa.types.is_integer(data_type) or pa.types.is_floating(data_type) \
+            or pa.types.is_timestamp(data_type) or pa.types.is_boolean(data_type)
+        self.null_count = 0
+        # Non-null values, NaN included: an upper bound for the distinct count
+        self.value_count = 0
+        self.moments = Moments()
+        self.quantiles = KLLSketch()
+        self.distinct = HyperLogLog()
+
+    def update(self, column):
+        self.null_count += column.null_count
+        column = pc.drop_null(column)
+        if pa.types.is_timestamp(self.data_type):
+            column = column.cast(pa.int64())
+        elif pa.types.is_boolean(self.data_type):
+            column = column.cast(pa.int8())
+        values = column.to_numpy()
+        self.value_count += len(values)
+        self.distinct.update(values)
+        if self.numeric:
+            values = values.astype(np.float64)
+            # NaN is a value to distinct counts but not to moments and quantiles
+            values = values[~np.isnan(values)]
+            self.moments.update(values)
+            self.quantiles.update(values)
+
+    def merge(self, other):
+        self.null_count += other.null_count
+        self.value_count += other.value_count
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+
+    def describe(self):
+        """describe()-style statistics, with timestamps reported as timestamps."""
+        stats = {'count': self.moments.count if self.numeric else None, 'null_count': self.null_count,
+                 'distinct (approx)': min(self.distinct.estimate(), self.value_count)}
+        if not self.numeric or not self.moments.count:
+            return stats
+        q25, q50, q75 = self.quantiles.quantiles(QUANTILES)
+        stats.update({'mean': self.moments.mean, 'std': self.moments.std, 'min': self.moments.min,
+                      '25%': q25, '50%': q50, '75%': q75, 'max': self.moments.max})
+        if pa.types.is_timestamp(self.data_type):
+            unit, tz = self.data_type.unit, self.data_type.tz
+            for name in ('mean', 'min', '25%', '50%', '75%', 'max'):
+                stats[name] = pd.Timestamp(int(stats[name]), unit=unit, tz=tz)
+            stats['std'] = pd.Timedelta(stats['std'], unit=unit)
+        return stats
+
+
+def profile_row_groups(bucket, key, row_groups, columns=None):
+    """Process pool worker: profile the given row groups of one file."""
+    filesystem = get_arrow_filesystem()
+    profiles = {}
+    with filesystem.open_input_file(f"{bucket}/{key}") as source:
+        parquet_file = pq.ParquetFile(source)
+        for row_group in row_groups:
+            table = parquet_file.read_row_group(row_group, columns=columns)
+            for name, column in zip(table.column_names, table.columns):
+                if name not in profiles:
+                    profiles[name] = ColumnProfile(column.type)
+                profiles[name].update(column)
+    return profiles
+
+
+def profile_dataset(bucket, prefix, columns=None, workers=None,
+                    row_groups_per_task=DEFAULT_ROW_GROUPS_PER_TASK):
+    """Profile every column of a dataset in one parallel pass; returns {column: ColumnProfile}."""
+    s3_client = get_s3_client(max_pool_connections=16)
+    keys = list_dataset_keys(s3_client, bucket, prefix)
+    # Footers give each file's row-group count, so big files are split across tasks
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        footers = list(executor.map(lambda key: read_parquet_metadata(s3_client, bucket, key)[0], keys))
+
+    profiles = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(profile_row_groups, bucket, key,
+                            range(start, min(start + row_groups_per_task, metadata.num_row_groups)), columns)
+            for key, metadata in zip(keys, footers)
+            for start in range(0, metadata.num_row_groups, row_groups_per_task)
+        ]
+        for future in as_completed(futures):
+            for name, profile in future.result().items():
+                if name in profiles:
+                    profiles[name].merge(profile)
+                else:
+                    profiles[name] = profile
+    return profiles
+
+
+def describe(profiles):
+    """Turn profile_dataset() output into a DataFrame laid out like df.describe()."""
+    index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'null_count', 'distinct (approx)']
+    return pd.DataFrame({name: profile.describe() for name, profile in profiles.items()}, index=index)
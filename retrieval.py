@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""
+Historical feature retrieval helpers for entity DataFrames too large for one call.
+
+get_historical_features_chunked() sorts entity_df by event timestamp and
+entity key and cuts it into chunks, so each chunk covers a narrow time range
+(the MinIO offline store then reads only the partitions that range needs).
+The chunks run in a process pool, one FeatureStore per worker. Each chunk's
+point-in-time join result is streamed to its own Parquet file, locally or in
+MinIO, so memory per worker is bounded by the chunk, not by entity_df.
+
+export_latest() dumps a whole FeatureView as of a point in time (the latest
+row per entity within the view's TTL) with one scan of the source and no
+entity_df at all.
+
+active_entity_df() builds an entity_df of every entity with rows in a time
+window from the source's entity index sidecar, instead of hard-coding key
+ranges or scanning the source to find them.
+
+iter_historical_features() streams a retrieval as a pyarrow RecordBatchReader,
+chunk by chunk, and feature_arrays() turns a batch's Float32 feature columns
+into NumPy arrays without copying. check_chunked_retrieval() verifies that a
+chunked retrieval returns the same rows as one get_historical_features call.
+
+get_historical_features_cached() memoizes retrievals in a ResultCache (a
+local directory or an s3:// prefix), keyed on the feature references, the
+entity_df content, the offline store config and the current version of every
+source involved.
+
+build_training_set() samples every entity at many points in time (an
+IntervalSchedule, a RandomSchedule or a LabelSchedule driven by a label
+table) and streams the point-in-time joined rows to one Parquet file per
+entity partition; each partition's entity rows are generated in its worker,
+so neither the full entity_df nor the full result is held in memory.
+check_training_set() compares a build with a single retrieval of its rows.
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from feature_repo.minio_offline_store import read_latest_values, source_file_cache, split_entity_df
+from minio_io import (TIMESTAMP_TYPE, build_entity_index, commit_manifest, dataframe_content_hash, dataset_version,
+                      delete_keys, entities_active_between, feature_view_schema, get_arrow_filesystem, get_s3_client,
+                      head_object, list_parquet_keys, list_parquet_objects, manifest_entry, read_entity_index,
+                      upload_batches)
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_BATCH_ROWS = 64 * 1024
+DEFAULT_CACHE_MAX_BYTES = 5 * 1024 ** 3
+DEFAULT_CACHE_MAX_AGE = timedelta(days=7)
+# Entities per training set partition (one worker task and one output file each)
+DEFAULT_PARTITION_ENTITIES = 1_000
+
+# One FeatureStore per worker process, created by _init_worker
+_worker_store = None
+
+
+def result_schema(store, entity_df, features, full_feature_names=False, timestamp_column='event_timestamp'):
+    """Arrow schema of a retrieval result, so every chunk is written with the same types.
+
+    Without it a chunk whose features are all missing would be written with
+    null or object columns instead of the view's types.
+    """
+    fields = [
+        pa.field(name, TIMESTAMP_TYPE) if name == timestamp_column else field
+        for name, field in zip(entity_df.columns, pa.Schema.from_pandas(entity_df, preserve_index=False))
+    ]
+    for reference in features:
+        view_name, feature_name = reference.split(':')
+        view_schema = feature_view_schema(store.get_feature_view(view_name))
+        name = f"{view_name}__{feature_name}" if full_feature_names else feature_name
+        fields.append(pa.field(name, view_schema.field(feature_name).type))
+    return pa.schema(fields)
+
+
+def _init_worker(repo_path):
+    global _worker_store
+    from feast import FeatureStore
+    _worker_store = FeatureStore(repo_path=repo_path)
+
+
+def _write_table(table, output, name):
+    """Write one chunk's result under output (a local directory or s3://bucket/prefix)."""
+    if output.startswith('s3://'):
+        bucket, _, prefix = output[len('s3://'):].partition('/')
+        key = f"{prefix.rstrip('/')}/{name}"
+        result = upload_batches(table.to_batches(), table.schema, bucket, key, max_workers=2)
+        return dict(result, path=f"s3://{bucket}/{key}")
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, name)
+    # Written aside and renamed, so readers never see a partial file
+    temporary = os.path.join(output, f".{name}.tmp-{os.getpid()}")
+    pq.write_table(table, temporary)
+    os.replace(temporary, path)
+    return {'path': path, 'key': path, 'size': os.path.getsize(path), 'rows': table.num_rows}
+
+
+def _publish(results, output):
+    """Commit the written files as the output dataset and drop files left over from a previous, larger run."""
+    written = {result['key'] for result in results}
+    if output.startswith('s3://'):
+        bucket, _, prefix = output[len('s3://'):].partition('/')
+        s3_client = get_s3_client()
+        commit_manifest(s3_client, bucket, prefix,
+                        added=[manifest_entry(result, result['timestamps']) for result in results], replace=True)
+        delete_keys(s3_client, bucket, set(list_parquet_keys(s3_client, bucket, prefix)) - written)
+    else:
+        for path in set(glob.glob(os.path.join(output, 'part-*.parquet'))) - written:
+            os.remove(path)
+
+
+def _retrieve_chunk(index, entity_df, features, output, schema, full_feature_names, timestamp_column):
+    """Process pool worker: point-in-time join one chunk and write it to Parquet."""
+    job = _worker_store.get_historical_features(
+        entity_df=entity_df, features=features, full_feature_names=full_feature_names
+    )
+    table = job.to_arrow()
+    table = pa.table(
+        [table[name].cast(schema.field(name).type) if name in schema.names else table[name]
+         for name in table.column_names],
+        names=table.column_names,
+    )
+    result = _write_table(table, output, f"part-{index:05d}.parquet")
+    timestamps = pc.min_max(table[timestamp_column]) if table.num_rows else None
+    result['timestamps'] = [timestamps['min'].as_py(), timestamps['max'].as_py()] if timestamps else []
+    return result
+
+
+def get_historical_features_chunked(entity_df, features, output, repo_path="./feature_repo",
+                                    chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, full_feature_names=False,
+                                    timestamp_column='event_timestamp'):
+    """Run get_historical_features over entity_df in parallel chunks, streaming results to Parquet.
+
+    output is a local directory or an s3://bucket/prefix; each chunk becomes
+    one part-NNNNN.parquet file. For MinIO outputs a manifest is committed
+    once all chunks are written, so the result reads like any other dataset.
+    Returns the list of written files with their row counts.
+    """
+    from feast import FeatureStore
+    store = FeatureStore(repo_path=repo_path)
+    schema = result_schema(store, entity_df, features, full_feature_names, timestamp_column)
+
+    started = time.perf_counter()
+    results = []
+    # spawn, not fork: the parent's FeatureStore already runs threads whose locks a fork would copy
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(repo_path,)) as executor:
+        futures = [
+            executor.submit(_retrieve_chunk, index, chunk, features, output, schema, full_feature_names,
+                            timestamp_column)
+            for index, chunk in enumerate(split_entity_df(entity_df, chunk_rows, timestamp_column))
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"   ✅ {result['path']}: {result['rows']:,} rows")
+    results.sort(key=lambda result: result['path'])
+
+    _publish(results, output)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    print(f"✅ Retrieved {rows:,} rows in {len(results)} chunks in {elapsed:,.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return results
+
+
+def iter_historical_features(store, entity_df, features, chunk_rows=DEFAULT_CHUNK_ROWS, full_feature_names=False,
+                             timestamp_column='event_timestamp', batch_size=DEFAULT_BATCH_ROWS):
+    """Stream get_historical_features over entity_df as a pyarrow RecordBatchReader.
+
+    entity_df is retrieved in chunks (see split_entity_df), one after the
+    other, and each chunk's result is handed out as record batches of at most
+    batch_size rows as soon as it is ready. Peak memory is one chunk's result
+    and the first rows arrive after the first chunk, not the whole join. Rows
+    come in chunk order (by timestamp, then entity key), and every batch has
+    the view's types (see result_schema).
+    """
+    schema = result_schema(store, entity_df, features, full_feature_names, timestamp_column)
+
+    def batches():
+        for chunk in split_entity_df(entity_df, chunk_rows, timestamp_column):
+            job = store.get_historical_features(
+                entity_df=chunk, features=features, full_feature_names=full_feature_names
+            )
+            # MinioRetrievalJob joins and hands out batch_size entity rows at a time; other jobs are converted whole
+            if hasattr(job, 'to_arrow_batches'):
+                reader = job.to_arrow_batches(batch_size)
+            else:
+                reader = job.to_arrow().to_reader(max_chunksize=batch_size)
+            for batch in reader:
+                yield batch.select(schema.names).cast(schema)
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+def check_chunked_retrieval(store, entity_df, features, chunk_rows=DEFAULT_CHUNK_ROWS, full_feature_names=False,
+                            timestamp_column='event_timestamp'):
+    """Raise AssertionError unless retrieving entity_df in chunks gives the rows of one call.
+
+    Both results are typed by result_schema and sorted by the entity_df
+    columns before they are compared. Returns the number of rows compared.
+    """
+    schema = result_schema(store, entity_df, features, full_feature_names, timestamp_column)
+    chunked = iter_historical_features(store, entity_df, features, chunk_rows=chunk_rows,
+                                       full_feature_names=full_feature_names,
+                                       timestamp_column=timestamp_column).read_all()
+    single = store.get_historical_features(
+        entity_df=entity_df, features=features, full_feature_names=full_feature_names
+    ).to_arrow().select(schema.names).cast(schema)
+    order = [(name, 'ascending') for name in entity_df.columns]
+    pd.testing.assert_frame_equal(single.sort_by(order).to_pandas(), chunked.sort_by(order).to_pandas())
+    return single.num_rows
+
+
+def feature_arrays(batch, columns=None):
+    """NumPy arrays of a record batch's float32 columns (or of the given columns), by name.
+
+    Columns without nulls are zero-copy, read-only views of the Arrow
+    buffers; columns with nulls are copied, with NaN for the nulls.
+    """
+    arrays = {}
+    for name, column in zip(batch.schema.names, batch.columns):
+        wanted = name in columns if columns is not None else pa.types.is_float32(column.type)
+        if not wanted:
+            continue
+        if column.null_count:
+            column = pc.fill_null(column, pa.scalar(np.nan, column.type))
+        arrays[name] = column.to_numpy(zero_copy_only=True)
+    return arrays
+
+
+def export_latest(store, feature_view_name, as_of=None, features=None, output=None, full_feature_names=False):
+    """Latest feature values per entity as of as_of (default: now) for a whole FeatureView.
+
+    Equivalent to a point-in-time join with one entity_df row per entity at
+    as_of, but computed with a single scan of the source: only rows in
+    [as_of - ttl, as_of] are read (partition pruned), and they are reduced to
+    the latest row per entity as they stream in. Returns a pyarrow Table with
+    the join keys, the event timestamp and the features, typed like the view;
+    with output (a local directory or s3://bucket/prefix) it is also written
+    there as a one-file dataset.
+    """
+    feature_view = store.get_feature_view(feature_view_name)
+    source = feature_view.batch_source
+    as_of = as_of or datetime.now(timezone.utc)
+    start_date = as_of - feature_view.ttl if feature_view.ttl and feature_view.ttl.total_seconds() else None
+    features = features or [feature.name for feature in feature_view.features]
+    join_keys = [column.name for column in feature_view.entity_columns]
+
+    # Sources may name columns differently from the view
+    source_names = {value: key for key, value in (source.field_mapping or {}).items()}
+    table = read_latest_values(
+        source,
+        store.repo_path,
+        [source_names.get(name, name) for name in join_keys],
+        [source_names.get(name, name) for name in features],
+        source.timestamp_field,
+        source.created_timestamp_column,
+        start_date=start_date,
+        end_date=as_of,
+        cache=source_file_cache(store.config.offline_store),
+    )
+    table = table.rename_columns([source.field_mapping.get(name, name) if source.field_mapping else name
+                                  for name in table.column_names])
+
+    view_schema = feature_view_schema(feature_view)
+    timestamp_field = source.field_mapping.get(source.timestamp_field, source.timestamp_field) \
+        if source.field_mapping else source.timestamp_field
+    names = join_keys + [timestamp_field] + features
+    table = pa.table(
+        [table[name].cast(TIMESTAMP_TYPE if name == timestamp_field else view_schema.field(name).type)
+         for name in names],
+        names=[f"{feature_view_name}__{name}" if full_feature_names and name in features else name
+               for name in names],
+    )
+
+    if output:
+        result = _write_table(table, output, "part-00000.parquet")
+        result['timestamps'] = [] if not table.num_rows else [
+            value.as_py() for value in pc.min_max(table[timestamp_field]).values()
+        ]
+        _publish([result], output)
+    return table
+
+
+def active_entity_df(store, feature_view_name, start=None, end=None, event_timestamp=None):
+    """Entity DataFrame of every entity with rows in [start, end] in a FeatureView's source.
+
+    Keys come from the source's _entity_index (built from the data on
+    first use if the source has none), so no data file is read. The view's
+    first join key is the indexed one. end defaults
+    to now and start to end - ttl; every row gets event_timestamp (default:
+    end), which makes the result a ready entity_df for get_historical_features.
+    """
+    feature_view = store.get_feature_view(feature_view_name)
+    source = feature_view.batch_source
+    bucket, _, prefix = source.path[len('s3://'):].partition('/')
+    end = end or datetime.now(timezone.utc)
+    if start is None and feature_view.ttl and feature_view.ttl.total_seconds():
+        start = end - feature_view.ttl
+    join_key = feature_view.entity_columns[0].name
+    source_names = {value: key for key, value in (source.field_mapping or {}).items()}
+
+    s3_client = get_s3_client()
+    index, _ = read_entity_index(s3_client, bucket, prefix)
+    if index is None:
+        print(f"🗂️ No entity index under s3://{bucket}/{prefix.rstrip('/')}/, building it...")
+        index = build_entity_index(bucket, prefix, source_names.get(join_key, join_key), source.timestamp_field,
+                                   s3_client=s3_client)
+
+    keys = entities_active_between(index, start, end).column(0)
+    return pd.DataFrame({
+        join_key: keys.to_pandas(),
+        'event_timestamp': pd.Series(pd.Timestamp(event_timestamp or end), index=range(len(keys))),
+    })
+
+
+def retrieval_cache_key(store, entity_df, features, full_feature_names=False):
+    """Hash of a get_historical_features request and the data it would read.
+
+    Covers the feature references, full_feature_names, entity_df's columns,
+    dtypes and values, the offline store config (its join_engine decides which
+    rows come back), each feature view's definition and the current version
+    of its source (see minio_io.dataset_version). Returns None if a source is
+    not in MinIO, since such a request cannot be keyed on its data.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([store.project, list(features), full_feature_names]).encode())
+    digest.update(json.dumps(store.config.offline_store.model_dump(mode='json'), sort_keys=True).encode())
+    digest.update(dataframe_content_hash(entity_df).encode())
+    s3_client = get_s3_client()
+    for view_name in sorted({reference.split(':')[0] for reference in features}):
+        feature_view = store.get_feature_view(view_name)
+        path = feature_view.batch_source.path
+        if not path.startswith('s3://'):
+            return None
+        bucket, _, prefix = path[len('s3://'):].partition('/')
+        digest.update(feature_view.to_proto().spec.SerializeToString(deterministic=True))
+        digest.update(str(dataset_version(s3_client, bucket, prefix)).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Retrieval results stored as <key>.parquet under a local directory or an s3://bucket/prefix.
+
+    Entries older than max_age are ignored and deleted; once the cache holds
+    more than max_bytes, the oldest entries are deleted first (locally a hit
+    refreshes an entry's age, so eviction is least recently used there).
+    """
+
+    def __init__(self, location, max_bytes=DEFAULT_CACHE_MAX_BYTES, max_age=DEFAULT_CACHE_MAX_AGE):
+        self.location = location.rstrip('/')
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.s3 = self.location.startswith('s3://')
+        if self.s3:
+            self.bucket, _, self.prefix = self.location[len('s3://'):].partition('/')
+            self.s3_client = get_s3_client()
+
+    def get(self, key):
+        """The cached table for key, or None."""
+        name = f"{key}.parquet"
+        if self.s3:
+            head = head_object(self.s3_client, self.bucket, f"{self.prefix}/{name}")
+            if head is None or self._expired(head['LastModified']):
+                return None
+            return pq.read_table(f"{self.bucket}/{self.prefix}/{name}", filesystem=get_arrow_filesystem())
+        path = os.path.join(self.location, name)
+        try:
+            modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+            if self._expired(modified):
+                return None
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return table
+
+    def put(self, key, table):
+        _write_table(table, self.location, f"{key}.parquet")
+        self.expire()
+
+    def expire(self):
+        """Delete expired entries, then the oldest ones until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), reverse=True)
+        total = 0
+        stale = []
+        for modified, size, path in entries:
+            total += size
+            if self._expired(modified) or total > self.max_bytes:
+                stale.append(path)
+        if self.s3:
+            delete_keys(self.s3_client, self.bucket, stale)
+        else:
+            for path in stale:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _entries(self):
+        """(last modified, size, key or path) of every entry."""
+        if self.s3:
+            return [(obj['LastModified'], obj['Size'], obj['Key'])
+                    for obj in list_parquet_objects(self.s3_client, self.bucket, self.prefix)]
+        return [
+            (datetime.fromtimestamp(stat.st_mtime, timezone.utc), stat.st_size, path)
+            for path in glob.glob(os.path.join(self.location, '*.parquet'))
+            for stat in [os.stat(path)]
+        ]
+
+    def _expired(self, modified):
+        return datetime.now(timezone.utc) - modified > self.max_age
+
+
+def get_historical_features_cached(store, entity_df, features, cache, full_feature_names=False):
+    """get_historical_features(...).to_arrow(), memoized in cache (a ResultCache or a location for one).
+
+    A request whose features, entity_df, offline store config and source
+    versions match a cached one returns the stored table without running the join; any new commit to
+    a source changes the key, so stale results are never returned.
+    """
+    if not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+    key = retrieval_cache_key(store, entity_df, features, full_feature_names)
+    if key is not None:
+        table = cache.get(key)
+        if table is not None:
+            print(f"♻️  Cached result {key[:12]} from {cache.location} ({table.num_rows:,} rows)")
+            return table
+
+    table = store.get_historical_features(
+        entity_df=entity_df, features=features, full_feature_names=full_feature_names
+    ).to_arrow()
+    if key is not None:
+        cache.put(key, table)
+        print(f"💾 Cached result {key[:12]} in {cache.location}")
+    return table
+
+
+def _utc(value):
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+class IntervalSchedule:
+    """Sample every entity at start, start + every, ... up to end (inclusive)."""
+
+    def __init__(self, start, end, every):
+        self.start = _utc(start)
+        self.end = _utc(end)
+        self.every = pd.Timedelta(every)
+
+    def entity_rows(self, keys, join_key, partition):
+        timestamps = pd.date_range(self.start, self.end, freq=self.every, unit='us')
+        return pd.DataFrame({
+            join_key: np.repeat(np.asarray(keys), len(timestamps)),
+            'event_timestamp': timestamps[np.tile(np.arange(len(timestamps)), len(keys))],
+        })
+
+
+class RandomSchedule:
+    """Sample every entity at samples_per_entity uniformly random times in [start, end].
+
+    Times are drawn per entity partition from (seed, partition), so a build
+    with the same entities and partition size is reproducible.
+    """
+
+    def __init__(self, start, end, samples_per_entity, seed=42):
+        self.start = _utc(start)
+        self.end = _utc(end)
+        self.samples_per_entity = samples_per_entity
+        self.seed = seed
+
+    def entity_rows(self, keys, join_key, partition):
+        rng = np.random.default_rng([self.seed, partition])
+        span_us = (self.end - self.start) // pd.Timedelta(1, 'us')
+        offsets = rng.integers(0, span_us + 1, len(keys) * self.samples_per_entity)
+        return pd.DataFrame({
+            join_key: np.repeat(np.asarray(keys), self.samples_per_entity),
+            'event_timestamp': (self.start + pd.to_timedelta(offsets, unit='us')).as_unit('us'),
+        })
+
+
+class LabelSchedule:
+    """Sample entities at the rows of a label table, whose other columns are carried into the training set.
+
+    labels is a DataFrame or a Parquet file or directory (local or
+    s3://bucket/prefix) with the join key and timestamp_column. Tables on disk
+    are read per entity partition, with the partition's keys as a filter.
+    """
+
+    def __init__(self, labels, timestamp_column='event_timestamp'):
+        self.labels = labels
+        self.timestamp_column = timestamp_column
+
+    def _dataset(self):
+        if self.labels.startswith('s3://'):
+            return ds.dataset(self.labels[len('s3://'):], filesystem=get_arrow_filesystem(), format='parquet')
+        return ds.dataset(self.labels, format='parquet')
+
+    def entities(self, join_key):
+        if isinstance(self.labels, pd.DataFrame):
+            keys = self.labels[join_key].dropna().unique()
+        else:
+            keys = pc.unique(self._dataset().to_table(columns=[join_key]).column(0).drop_null()).to_numpy()
+        return np.sort(keys)
+
+    def entity_rows(self, keys, join_key, partition):
+        if isinstance(self.labels, pd.DataFrame):
+            rows = self.labels[self.labels[join_key].isin(keys)]
+        else:
+            rows = self._dataset().to_table(filter=ds.field(join_key).isin(list(keys))).to_pandas()
+        rows = rows.rename(columns={self.timestamp_column: 'event_timestamp'})
+        rows['event_timestamp'] = pd.to_datetime(rows['event_timestamp'], utc=True).astype('datetime64[us, UTC]')
+        return rows.reset_index(drop=True)
+
+    def subset(self, keys, join_key):
+        """The schedule for one entity partition, small enough to send to a worker."""
+        if isinstance(self.labels, pd.DataFrame):
+            return LabelSchedule(self.labels[self.labels[join_key].isin(keys)], self.timestamp_column)
+        return self
+
+
+def _timestamp_range(batches, column, bounds):
+    """Pass batches through, keeping the min and max of column in bounds."""
+    for batch in batches:
+        if batch.num_rows and batch.column(column).null_count < batch.num_rows:
+            low, high = (value.as_py() for value in pc.min_max(batch.column(column)).values())
+            bounds[:] = [min(bounds[0], low), max(bounds[1], high)] if bounds else [low, high]
+        yield batch
+
+
+def _write_batches(batches, schema, output, name):
+    """Stream record batches into one Parquet file under output (a local directory or s3://bucket/prefix)."""
+    if output.startswith('s3://'):
+        bucket, _, prefix = output[len('s3://'):].partition('/')
+        key = f"{prefix.rstrip('/')}/{name}"
+        result = upload_batches(batches, schema, bucket, key, max_workers=2)
+        return dict(result, path=f"s3://{bucket}/{key}")
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, name)
+    temporary = os.path.join(output, f".{name}.tmp-{os.getpid()}")
+    rows = 0
+    with pq.ParquetWriter(temporary, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    os.replace(temporary, path)
+    return {'path': path, 'key': path, 'size': os.path.getsize(path), 'rows': rows}
+
+
+def _build_partition(index, keys, schedule, join_key, features, output, chunk_rows, full_feature_names):
+    """Process pool worker: sample one entity partition, join it and stream the result to Parquet."""
+    entity_df = schedule.entity_rows(keys, join_key, index)
+    if entity_df.empty:
+        return None
+    reader = iter_historical_features(_worker_store, entity_df, features, chunk_rows=chunk_rows,
+                                      full_feature_names=full_feature_names)
+    timestamps = []
+    result = _write_batches(_timestamp_range(reader, 'event_timestamp', timestamps), reader.schema, output,
+                            f"part-{index:05d}.parquet")
+    result['timestamps'] = timestamps
+    return result
+
+
+def _training_partitions(store, features, schedule, entities, partition_entities):
+    """(join_key, sorted entity partitions) of a training set; see build_training_set."""
+    view_name = features[0].split(':')[0]
+    join_key = store.get_feature_view(view_name).entity_columns[0].name
+    if entities is None:
+        if isinstance(schedule, LabelSchedule):
+            entities = schedule.entities(join_key)
+        else:
+            entities = active_entity_df(store, view_name, start=schedule.start, end=schedule.end)[join_key]
+    entities = np.sort(pd.unique(np.asarray(entities)))
+    return join_key, [entities[start:start + partition_entities] for start in range(0, len(entities), partition_entities)]
+
+
+def build_training_set(store, features, schedule, output, entities=None, partition_entities=DEFAULT_PARTITION_ENTITIES,
+                       chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, full_feature_names=False):
+    """Point-in-time training set of features at schedule's sampling times, streamed to Parquet.
+
+    schedule is an IntervalSchedule, RandomSchedule or LabelSchedule.
+    entities are join key values of the first feature view (default: the
+    label table's keys, or every entity active between the schedule's start
+    and end, from the entity index). They are sorted and cut into partitions
+    of partition_entities; each partition's entity rows are generated in a
+    worker process, retrieved chunk_rows at a time and streamed to its own
+    part-NNNNN.parquet under output (a local directory or
+    s3://bucket/prefix, committed like get_historical_features_chunked's).
+    Neither the full entity_df nor the full result is ever built.
+    """
+    join_key, partitions = _training_partitions(store, features, schedule, entities, partition_entities)
+    print(f"🎯 Building a training set for {sum(map(len, partitions)):,} entities in {len(partitions)} partitions "
+          f"-> {output}")
+
+    started = time.perf_counter()
+    results = []
+    # spawn, not fork: the parent's FeatureStore already runs threads whose locks a fork would copy
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(str(store.repo_path),)) as executor:
+        futures = [
+            executor.submit(_build_partition, index, keys,
+                            schedule.subset(keys, join_key) if isinstance(schedule, LabelSchedule) else schedule,
+                            join_key, features, output, chunk_rows, full_feature_names)
+            for index, keys in enumerate(partitions)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                continue
+            results.append(result)
+            print(f"   ✅ {result['path']}: {result['rows']:,} rows")
+    results.sort(key=lambda result: result['path'])
+
+    _publish(results, output)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    print(f"✅ Wrote {rows:,} training rows in {len(results)} files in {elapsed:,.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return results
+
+
+def check_training_set(store, features, schedule, output, entities=None,
+                       partition_entities=DEFAULT_PARTITION_ENTITIES, full_feature_names=False):
+    """Raise AssertionError unless build_training_set's output equals one get_historical_features call.
+
+    The entity rows are sampled exactly as build_training_set sampled them
+    (same partitions, so RandomSchedule draws the same times) and retrieved
+    in a single call, so the full entity_df and result are built in memory:
+    meant for checking a build on a sample. Returns the number of rows compared.
+    """
+    join_key, partitions = _training_partitions(store, features, schedule, entities, partition_entities)
+    entity_df = pd.concat([schedule.entity_rows(keys, join_key, index) for index, keys in enumerate(partitions)],
+                          ignore_index=True)
+    schema = result_schema(store, entity_df, features, full_feature_names)
+    if output.startswith('s3://'):
+        built = ds.dataset(output[len('s3://'):], filesystem=get_arrow_filesystem(), format='parquet')
+    else:
+        built = ds.dataset(output, format='parquet')
+    built = built.to_table().select(schema.names).cast(schema)
+    single = store.get_historical_features(
+        entity_df=entity_df, features=features, full_feature_names=full_feature_names
+    ).to_arrow().select(schema.names).cast(schema)
+    order = [(name, 'ascending') for name in entity_df.columns]
+    pd.testing.assert_frame_equal(single.sort_by(order).to_pandas(), built.sort_by(order).to_pandas())
+    return single.num_rows
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
-import boto3
+import argparse
 import pandas as pd
 import numpy as np
-from io import BytesIO
 import tensorflow.keras as keras
+from minio_io import coerce_to_schema, feature_view_schema, get_s3_client, load_feature_view, upload_partitioned
 
-def upload_california_data_to_minio():
+def upload_california_data_to_minio(append=False):
     print("🚀 Loading California housing data and uploading to MinIO...")
     
     # Load California housing dataset from Keras
@@ -47,6 +47,10 @@ def upload_california_data_to_minio():
     df['event_timestamp'] = pd.date_range('2020-01-01', periods=len(df), freq='H')
     df['created'] = pd.date_range('2020-01-01', periods=len(df), freq='H')
     
+    # Write the dtypes the california_housing FeatureView declares (Float32, UTC timestamps)
+    print("🧬 Coercing columns to the california_housing FeatureView schema...")
+    df, schema = coerce_to_schema(df, feature_view_schema(load_feature_view("california_housing")))
+    
     print(f"✅ Created DataFrame with {len(df)} rows, {len(df.columns)} columns")
     print("📋 Columns:", list(df.columns))
     print("\n📊 First few rows:")
@@ -54,39 +58,25 @@ def upload_california_data_to_minio():
     
     # MinIO configuration
     print("\n🔧 Configuring MinIO client...")
-    s3_client = boto3.client(
-        's3',
-        endpoint_url="http://localhost:9001",
-        aws_access_key_id="minio",
-        aws_secret_access_key="minio123",
-        region_name='us-east-1'
-    )
+    s3_client = get_s3_client()
     
-    # Convert to parquet bytes
-    print("💾 Converting to parquet bytes...")
-    parquet_buffer = BytesIO()
-    df.to_parquet(parquet_buffer, index=False)
-    parquet_buffer.seek(0)
-    
-    # Upload to MinIO
+    # Stream date-partitioned parquet to MinIO via multipart uploads
     bucket_name = "test-bucket"
-    key = "feast/data/california_data.parquet"
+    prefix = "feast/data/california"
     
-    print(f"⬆️  Uploading to s3://{bucket_name}/{key}")
-    s3_client.put_object(
-        Bucket=bucket_name,
-        Key=key,
-        Body=parquet_buffer.getvalue(),
-        ContentType='application/octet-stream'
-    )
+    if append:
+        # New rows become delta files; existing files are never rewritten
+        print(f"⬆️  Appending delta files to s3://{bucket_name}/{prefix}/")
+    else:
+        print(f"⬆️  Streaming partitioned parquet to s3://{bucket_name}/{prefix}/")
+    uploads = upload_partitioned(df, bucket_name, prefix, s3_client=s3_client, schema=schema,
+                                 overwrite=not append, index_column='house_id')
     
-    print("✅ Upload successful!")
+    skipped = sum(upload['skipped'] for upload in uploads)
+    print(f"✅ Upload successful! ({len(uploads)} date partitions, {skipped} unchanged and skipped)")
     
-    # Verify the upload
-    print("🔍 Verifying upload...")
-    response = s3_client.head_object(Bucket=bucket_name, Key=key)
-    size = response['ContentLength']
-    print(f"✅ File uploaded successfully! Size: {size} bytes")
+    size = sum(upload['size'] for upload in uploads)
+    print(f"✅ Dataset size: {size} bytes")
     
     # Show data info
     print(f"\n📈 Dataset summary:")
@@ -96,4 +86,8 @@ def upload_california_data_to_minio():
     print(f"   - Time range: {df['event_timestamp'].min()} to {df['event_timestamp'].max()}")
 
 if __name__ == "__main__":
-    upload_california_data_to_minio() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Upload the Keras California housing dataset to MinIO")
+    parser.add_argument('--append', action='store_true',
+                        help='append rows as delta files instead of rewriting the dataset')
+    args = parser.parse_args()
+    upload_california_data_to_minio(append=args.append) 
\ No newline at end of file